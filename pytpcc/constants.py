@@ -163,3 +163,19 @@ TransactionTypes = enum(
     "PAYMENT",
     "STOCK_LEVEL",
 )
+
+## The parameter of each transaction that holds the time at which it runs
+TIMESTAMP_PARAMS = {
+    TransactionTypes.DELIVERY: "ol_delivery_d",
+    TransactionTypes.NEW_ORDER: "o_entry_d",
+    TransactionTypes.PAYMENT: "h_date",
+}
+
+## The one-byte codes of the transactions in binary traces and event logs
+TRANSACTION_CODES = [
+    TransactionTypes.DELIVERY,
+    TransactionTypes.NEW_ORDER,
+    TransactionTypes.ORDER_STATUS,
+    TransactionTypes.PAYMENT,
+    TransactionTypes.STOCK_LEVEL,
+]
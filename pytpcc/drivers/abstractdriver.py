@@ -71,10 +71,19 @@ class AbstractDriver(object):
         """Optional callback to indicate to the driver that the data loading phase is finished."""
         return None
 
+    def loadFinalize(self):
+        """Optional callback that is invoked once in the main process after all of the loaders have finished,
+        e.g., to build indexes that were left out during the load."""
+        return None
+
     def loadFinishItem(self):
         """Optional callback to indicate to the driver that the ITEM data has been passed to the driver."""
         return None
 
+    def loadStartWarehouse(self, w_id):
+        """Optional callback to indicate to the driver that the data for the given warehouse is about to be passed to the driver."""
+        return None
+
     def loadFinishWarehouse(self, w_id):
         """Optional callback to indicate to the driver that the data for the given warehouse is finished."""
         return None
@@ -83,10 +92,38 @@ class AbstractDriver(object):
         """Optional callback to indicate to the driver that the data for the given district is finished."""
         return None
         
+    def loadDeleteItems(self):
+        """Remove the contents of the ITEM table so that it can be loaded again.
+        Drivers must implement this and loadDeleteWarehouse to support --resume-load."""
+        raise NotImplementedError("%s does not implement loadDeleteItems" % (self.driver_name))
+
+    def loadDeleteWarehouse(self, w_id):
+        """Remove all of the data of a partially loaded warehouse so that it can be loaded again"""
+        raise NotImplementedError("%s does not implement loadDeleteWarehouse" % (self.driver_name))
+        
     def loadTuples(self, tableName, tuples):
         """Load a list of tuples into the target table"""
         raise NotImplementedError("%s does not implement loadTuples" % (self.driver_name))
         
+    def readMetadata(self):
+        """Returns the dict that the last load stored with writeMetadata(), or None
+        if there is none or the driver does not keep metadata"""
+        return None
+        
+    def writeMetadata(self, metadata):
+        """Store a dict that describes the loaded data: the scale parameters
+        of the whole database, the seed and the NURand constants"""
+        pass
+        
+    def snapshot(self, name):
+        """Save the current contents of the database under the given name so that
+        it can be brought back with restore()"""
+        raise NotImplementedError("%s does not implement snapshot" % (self.driver_name))
+        
+    def restore(self, name):
+        """Replace the contents of the database with the snapshot of the given name"""
+        raise NotImplementedError("%s does not implement restore" % (self.driver_name))
+        
     def executeStart(self):
         """Optional callback before the execution phase starts"""
         return None
@@ -166,4 +203,62 @@ class AbstractDriver(object):
             threshold
         """
         raise NotImplementedError("%s does not implement doStockLevel" % (self.driver_name))
-## CLASS
\ No newline at end of file
+## CLASS
+## ==============================================
+## AsyncAbstractDriver
+## ==============================================
+class AsyncAbstractDriver(AbstractDriver):
+    """
+        The asynchronous counterpart of AbstractDriver. The execution callbacks
+        and transactions are coroutines that the asyncio executor awaits, so a
+        single process can keep many terminals busy against a network database.
+        All of a client's terminals share one driver instance, so it has to be
+        able to run many transactions at once (e.g. with a connection pool).
+        The loading callbacks are the same as AbstractDriver's.
+    """
+    
+    async def executeStart(self):
+        """Optional callback before the execution phase starts"""
+        return None
+        
+    async def executeFinish(self):
+        """Callback after the execution phase finishes"""
+        return None
+        
+    async def executeTransaction(self, txn, params):
+        """Execute a transaction based on the given name"""
+        
+        if constants.TransactionTypes.DELIVERY == txn:
+            result = await self.doDelivery(params)
+        elif constants.TransactionTypes.NEW_ORDER == txn:
+            result = await self.doNewOrder(params)
+        elif constants.TransactionTypes.ORDER_STATUS == txn:
+            result = await self.doOrderStatus(params)
+        elif constants.TransactionTypes.PAYMENT == txn:
+            result = await self.doPayment(params)
+        elif constants.TransactionTypes.STOCK_LEVEL == txn:
+            result = await self.doStockLevel(params)
+        else:
+            assert False, "Unexpected TransactionType: " + txn
+        return result
+        
+    async def doDelivery(self, params):
+        """Execute DELIVERY Transaction (see AbstractDriver.doDelivery)"""
+        raise NotImplementedError("%s does not implement doDelivery" % (self.driver_name))
+    
+    async def doNewOrder(self, params):
+        """Execute NEW_ORDER Transaction (see AbstractDriver.doNewOrder)"""
+        raise NotImplementedError("%s does not implement doNewOrder" % (self.driver_name))
+
+    async def doOrderStatus(self, params):
+        """Execute ORDER_STATUS Transaction (see AbstractDriver.doOrderStatus)"""
+        raise NotImplementedError("%s does not implement doOrderStatus" % (self.driver_name))
+
+    async def doPayment(self, params):
+        """Execute PAYMENT Transaction (see AbstractDriver.doPayment)"""
+        raise NotImplementedError("%s does not implement doPayment" % (self.driver_name))
+
+    async def doStockLevel(self, params):
+        """Execute STOCK_LEVEL Transaction (see AbstractDriver.doStockLevel)"""
+        raise NotImplementedError("%s does not implement doStockLevel" % (self.driver_name))
+## CLASS
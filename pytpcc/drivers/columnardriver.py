@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+
+import os
+import glob
+import shutil
+import logging
+
+import constants
+from util import schema
+from util import columnar
+from .abstractdriver import *
+
+## ==============================================
+## ColumnarDriver
+## ==============================================
+class ColumnarDriver(AbstractDriver):
+    """
+        Exports the generated tables as fixed-width columnar files that
+        analytical tools and in-memory drivers can memory-map without
+        copying, instead of pushing every value through loadTuples again.
+        Use util.columnar.loadTable() to open an exported table.
+    """
+    DEFAULT_CONFIG = {
+        "directory": ("The path to the directory to store the columnar table files", "/tmp/tpcc-columns" ),
+        "format": ("npy writes one NumPy file per column, arrow writes one Arrow IPC file per table", "npy" ),
+    }
+    OPTIONAL_CONFIG = {
+        "format": "npy",
+    }
+    
+    def __init__(self, ddl):
+        super(ColumnarDriver, self).__init__("columnar", ddl)
+        self.directory = None
+        self.format = None
+        self.part = None
+        self.tables = None
+        self.table_outputs = { }
+    ## DEF
+    
+    def makeDefaultConfig(self):
+        return ColumnarDriver.DEFAULT_CONFIG
+    ## DEF
+    
+    def loadConfig(self, config):
+        for key in ColumnarDriver.DEFAULT_CONFIG.keys():
+            if key in ColumnarDriver.OPTIONAL_CONFIG: continue
+            assert key in config, "Missing parameter '%s' in %s configuration" % (key, self.name)
+        
+        self.directory = config["directory"]
+        assert self.directory
+        if not os.path.exists(self.directory): os.makedirs(self.directory)
+        
+        self.format = config.get("format", ColumnarDriver.OPTIONAL_CONFIG["format"])
+        assert self.format in columnar.FORMATS, "Unsupported format '%s'" % self.format
+        if self.format == "arrow":
+            assert columnar.HAVE_ARROW, "The pyarrow module is required for the arrow format"
+        else:
+            assert columnar.HAVE_NUMPY, "NumPy is required for the npy format"
+        self.tables = schema.readTables(self.ddl)
+        
+        ## Each loader process writes its own part of every table and
+        ## loadFinalize combines them
+        if config.get("load", False): self.part = os.getpid()
+        
+        if config["reset"]:
+            for tableName in constants.ALL_TABLES:
+                if os.path.exists(os.path.join(self.directory, tableName)):
+                    shutil.rmtree(os.path.join(self.directory, tableName))
+                for path in glob.glob(columnar.arrowPath(self.directory, tableName)) + \
+                            glob.glob(columnar.arrowPath(self.directory, tableName, "*")):
+                    os.unlink(path)
+            ## FOR
+        ## IF
+    ## DEF
+    
+    def loadTuples(self, tableName, tuples):
+        if len(tuples) == 0: return
+        if not tableName in self.table_outputs:
+            if self.format == "arrow":
+                writer = columnar.ArrowTableWriter(self.directory, tableName, self.tables[tableName], self.part)
+            else:
+                writer = columnar.NumpyTableWriter(self.directory, tableName, self.tables[tableName], self.part)
+            self.table_outputs[tableName] = writer
+        ## IF
+        self.table_outputs[tableName].append(tuples)
+    ## DEF
+    
+    def loadFinish(self):
+        for tableName, writer in self.table_outputs.items():
+            writer.finish()
+            logging.debug("Wrote %d %s rows" % (writer.rows, tableName))
+        ## FOR
+        self.table_outputs.clear()
+    ## DEF
+    
+    def loadFinalize(self):
+        for tableName in constants.ALL_TABLES:
+            columnar.mergeParts(self.directory, tableName)
+    ## DEF
+## CLASS
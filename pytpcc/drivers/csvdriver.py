@@ -26,10 +26,69 @@
 
 import os
 import csv
+import queue
+import logging
+import threading
+import traceback
 from datetime import datetime
 from pprint import pprint,pformat
 
-from abstractdriver import *
+import constants
+from util import csvfile
+from .abstractdriver import *
+
+## The number of batches that may wait for each table writer
+QUEUE_SIZE = 16
+
+## ==============================================
+## TableWriter
+## ==============================================
+class TableWriter(threading.Thread):
+    """
+        Formats and compresses the rows of one table in its own thread. The
+        CSV formatting holds the GIL but the compression and the file writes
+        release it, so the tables are written in parallel with each other and
+        with the data generation.
+    """
+
+    def __init__(self, path, compression):
+        super(TableWriter, self).__init__(name="CsvWriter-%s" % os.path.basename(path), daemon=True)
+        self.path = path
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.output = csvfile.openWriter(path, compression)
+        self.rows = 0
+        self.error = None
+    ## DEF
+
+    def run(self):
+        writer = csv.writer(self.output, lineterminator="\n")
+        try:
+            while True:
+                tuples = self.queue.get()
+                if tuples is None: break
+                ## Keep draining after a failure so that put() never blocks
+                if self.error: continue
+                try:
+                    writer.writerows(tuples)
+                    self.rows += len(tuples)
+                except Exception:
+                    self.error = traceback.format_exc()
+            ## WHILE
+        finally:
+            self.output.close()
+    ## DEF
+
+    def write(self, tuples):
+        if self.error: raise RuntimeError("Failed to write %s:\n%s" % (self.path, self.error))
+        self.queue.put(tuples)
+    ## DEF
+
+    def finish(self):
+        self.queue.put(None)
+        self.join()
+        if self.error: raise RuntimeError("Failed to write %s:\n%s" % (self.path, self.error))
+    ## DEF
+## CLASS
 
 ## ==============================================
 ## CSVDriver
@@ -38,13 +97,20 @@ class CsvDriver(AbstractDriver):
     DEFAULT_CONFIG = {
         "table_directory": ("The path to the directory to store the table CSV files", "/tmp/tpcc-tables" ),
         "txn_directory": ("The path to the directory to store the txn CSV files", "/tmp/tpcc-txns" ),
+        "compression": ("The compression of the table CSV files (none, gzip or zstd)", "none" ),
+    }
+    OPTIONAL_CONFIG = {
+        "compression": "none",
     }
     
     def __init__(self, ddl):
         super(CsvDriver, self).__init__("csv", ddl)
         self.table_directory = None
         self.table_outputs = { }
+        self.compression = None
+        self.part = None
         self.txn_directory = None
+        self.txn_files = { }
         self.txn_outputs = { }
         self.txn_params = { }
     ## DEF
@@ -55,12 +121,29 @@ class CsvDriver(AbstractDriver):
     
     def loadConfig(self, config):
         for key in CsvDriver.DEFAULT_CONFIG.keys():
+            if key in CsvDriver.OPTIONAL_CONFIG: continue
             assert key in config, "Missing parameter '%s' in %s configuration" % (key, self.name)
         
         self.table_directory = config["table_directory"]
         assert self.table_directory
         if not os.path.exists(self.table_directory): os.makedirs(self.table_directory)
         
+        self.compression = config.get("compression", CsvDriver.OPTIONAL_CONFIG["compression"])
+        assert self.compression in csvfile.COMPRESSIONS, "Unsupported compression '%s'" % self.compression
+        if self.compression == "zstd":
+            assert csvfile.HAVE_ZSTD, "The zstandard module is required for zstd compression"
+        
+        ## Each loader process writes its own part of every table
+        if config.get("load", False): self.part = os.getpid()
+        
+        if config["reset"]:
+            for tableName in constants.ALL_TABLES:
+                for path in csvfile.tableFiles(self.table_directory, tableName):
+                    logging.debug("Deleting %s" % path)
+                    os.unlink(path)
+            ## FOR
+        ## IF
+        
         self.txn_directory = config["txn_directory"]
         assert self.txn_directory
         if not os.path.exists(self.txn_directory): os.makedirs(self.txn_directory)
@@ -68,22 +151,37 @@ class CsvDriver(AbstractDriver):
     
     def loadTuples(self, tableName, tuples):
         if not tableName in self.table_outputs:
-            path = os.path.join(self.table_directory, "%s.csv" % tableName)
-            self.table_outputs[tableName] = csv.writer(open(path, 'wb'), quoting=csv.QUOTE_ALL)
+            path = csvfile.tablePath(self.table_directory, tableName, self.compression, self.part)
+            self.table_outputs[tableName] = TableWriter(path, self.compression)
+            self.table_outputs[tableName].start()
         ## IF
-        self.table_outputs[tableName].writerows(tuples)
+        self.table_outputs[tableName].write(tuples)
+    ## DEF
+    
+    def loadFinish(self):
+        for tableName, writer in self.table_outputs.items():
+            writer.finish()
+            logging.debug("Wrote %d %s rows to %s" % (writer.rows, tableName, writer.path))
+        ## FOR
+        self.table_outputs.clear()
     ## DEF
     
     def executeTransaction(self, txn, params):
         if not txn in self.txn_outputs:
             path = os.path.join(self.txn_directory, "%s.csv" % txn)
-            self.txn_outputs[txn] = csv.writer(open(path, 'wb'), quoting=csv.QUOTE_ALL)
-            self.txn_params[txn] = params.keys()[:]
+            self.txn_files[txn] = open(path, "w", newline="", buffering=csvfile.BUFFER_SIZE)
+            self.txn_outputs[txn] = csv.writer(self.txn_files[txn])
+            self.txn_params[txn] = list(params.keys())
             self.txn_outputs[txn].writerow(["Timestamp"] + self.txn_params[txn])
         ## IF
         row = [datetime.now()] + [params[k] for k in self.txn_params[txn]]
         self.txn_outputs[txn].writerow(row)
     ## DEF
+    
+    def executeFinish(self):
+        for f in self.txn_files.values():
+            f.close()
+        self.txn_files.clear()
+        self.txn_outputs.clear()
+    ## DEF
 ## CLASS
-
-        
@@ -206,7 +206,17 @@ class MongodbDriver(AbstractDriver):
         constants.TABLENAME_ORDER_LINE,
         constants.TABLENAME_HISTORY,
     ]
-    
+    ## The key of each collection that holds the warehouse id
+    WAREHOUSE_KEYS = {
+        constants.TABLENAME_WAREHOUSE:  "W_ID",
+        constants.TABLENAME_DISTRICT:   "D_W_ID",
+        constants.TABLENAME_CUSTOMER:   "C_W_ID",
+        constants.TABLENAME_HISTORY:    "H_W_ID",
+        constants.TABLENAME_STOCK:      "S_W_ID",
+        constants.TABLENAME_ORDERS:     "O_W_ID",
+        constants.TABLENAME_NEW_ORDER:  "NO_W_ID",
+        constants.TABLENAME_ORDER_LINE: "OL_W_ID",
+    }
     
     def __init__(self, ddl):
         super(MongodbDriver, self).__init__("mongodb", ddl)
@@ -347,6 +357,24 @@ class MongodbDriver(AbstractDriver):
             self.w_orders.clear()
         ## IF
 
+    ## ----------------------------------------------
+    ## loadDeleteItems
+    ## ----------------------------------------------
+    def loadDeleteItems(self):
+        self.database[constants.TABLENAME_ITEM].remove({ })
+
+    ## ----------------------------------------------
+    ## loadDeleteWarehouse
+    ## ----------------------------------------------
+    def loadDeleteWarehouse(self, w_id):
+        logging.info("Deleting partially loaded warehouse %d" % w_id)
+        for name, key in MongodbDriver.WAREHOUSE_KEYS.items():
+            if self.denormalize and name in MongodbDriver.DENORMALIZED_TABLES[1:]: continue
+            self.database[name].remove({ key: w_id })
+        ## FOR
+        self.w_customers.clear()
+        self.w_orders.clear()
+
     ## ----------------------------------------------
     ## loadFinish
     ## ----------------------------------------------
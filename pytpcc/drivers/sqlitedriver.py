@@ -32,8 +32,18 @@
 from __future__ import with_statement
 
 import os
+import re
+import glob
+import time
+import json
+import shutil
 import sqlite3
+try:
+    import fcntl
+except ImportError:
+    pass
 import logging
+from datetime import datetime
 #import commands
 from pprint import pprint,pformat
 import sys
@@ -100,6 +110,51 @@ TXN_QUERIES = {
 
 is_nfs4_ext_loaded = False
 
+## The Linux ioctl that makes a file share the blocks of another (a reflink)
+FICLONE = 0x40049409
+
+def copyFile(source, target):
+    """
+        Copy a database file as cheaply as the file system allows and return
+        the method that was used. A reflink shares the blocks on file systems
+        like btrfs and XFS, copy_file_range copies inside the kernel, and a
+        regular copy is the last resort.
+    """
+    tmp_target = "%s.tmp-%d" % (target, os.getpid())
+    with open(source, "rb") as src, open(tmp_target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            method = "reflink"
+        except (NameError, OSError):
+            try:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0: break
+                    remaining -= copied
+                method = "copy_file_range"
+            except (AttributeError, OSError):
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+                shutil.copyfileobj(src, dst, 1 << 20)
+                method = "copy"
+        ## TRY
+    os.replace(tmp_target, target)
+    return method
+## DEF
+
+## The Loader stamps every row with the same datetime object, so remember the
+## last conversion instead of formatting the same value for every row
+last_datetime = [ None, None ]
+def adaptDatetime(value):
+    if value is not last_datetime[0]:
+        last_datetime[0] = value
+        last_datetime[1] = value.isoformat(" ")
+    return last_datetime[1]
+## DEF
+sqlite3.register_adapter(datetime, adaptDatetime)
+
 ## ==============================================
 ## SqliteDriver
 ## ==============================================
@@ -109,7 +164,49 @@ class SqliteDriver(abstractdriver.AbstractDriver):
         "vfs": ("The SQLite VFS", "unix"),
         "journal_mode": ("The journal mode, e.g., wal, delete, etc.", "delete"),
         "locking_mode": ("The locking mode, either normal or exclusive", "normal"),
-        "cache_size": ("The SQLite cache size in multiples of 1024 kb", 2000)
+        "cache_size": ("The SQLite cache size in multiples of 1024 kb", 2000),
+        "bulk_load": ("If true, load without secondary indexes and with unsafe pragmas, and build the indexes at the end", False),
+        "shard_load": ("If true, each loader process writes to its own database file and the files are merged at the end", False),
+    }
+    ## Parameters that older configuration files may not have
+    OPTIONAL_CONFIG = {
+        "bulk_load": False,
+        "shard_load": False,
+    }
+    
+    ## Shard files are named <database>.shard-<pid>
+    SHARD_SUFFIX = ".shard-"
+    
+    ## Intermediate files of a merge of more than MERGE_GROUP_SIZE shards
+    ## are named <database>.merge-<level>-<n>
+    MERGE_SUFFIX = ".merge-"
+    
+    ## The number of shards attached at once while merging. SQLite allows
+    ## at most 10 attached databases by default.
+    MERGE_GROUP_SIZE = 8
+    
+    ## Pragmas used while bulk loading. A crash during a bulk load can leave
+    ## the database corrupt, so it has to be reloaded with --reset.
+    BULK_LOAD_PRAGMAS = [
+        ("synchronous", "OFF"),
+        ("journal_mode", "MEMORY"),
+        ("temp_store", "MEMORY"),
+        ("cache_size", "-%d" % (512 * 1024)),
+    ]
+    
+    ## The table that holds the metadata of the last load, as one JSON value
+    METADATA_TABLE = "TPCC_METADATA"
+    
+    ## The column of each table that holds the warehouse id
+    WAREHOUSE_COLUMNS = {
+        constants.TABLENAME_WAREHOUSE:  "W_ID",
+        constants.TABLENAME_DISTRICT:   "D_W_ID",
+        constants.TABLENAME_CUSTOMER:   "C_W_ID",
+        constants.TABLENAME_HISTORY:    "H_W_ID",
+        constants.TABLENAME_STOCK:      "S_W_ID",
+        constants.TABLENAME_ORDERS:     "O_W_ID",
+        constants.TABLENAME_NEW_ORDER:  "NO_W_ID",
+        constants.TABLENAME_ORDER_LINE: "OL_W_ID",
     }
     
     def __init__(self, ddl):
@@ -129,6 +226,7 @@ class SqliteDriver(abstractdriver.AbstractDriver):
     ## ----------------------------------------------
     def loadConfig(self, config):
         for key in SqliteDriver.DEFAULT_CONFIG.keys():
+            if key in SqliteDriver.OPTIONAL_CONFIG: continue
             assert key in config, "Missing parameter '%s' in %s configuration" % (key, self.name)
 
         self.database = str(config["database"])
@@ -136,6 +234,9 @@ class SqliteDriver(abstractdriver.AbstractDriver):
         self.journal_mode = str(config["journal_mode"]).lower()
         self.locking_mode = str(config["locking_mode"]).lower()
         self.cache_size = int(config["cache_size"])
+        self.bulk_load = self.getFlag(config, "bulk_load")
+        self.shard_load = self.getFlag(config, "shard_load")
+        self.saved_pragmas = None
 
         # if config["reset"] and os.path.exists(self.database):
         #     logging.debug("Deleting database '%s'" % self.database)
@@ -152,7 +253,39 @@ class SqliteDriver(abstractdriver.AbstractDriver):
         else:
             assert self.vfs == "unix", "unsupported vfs"
 
-        self.conn = sqlite3.connect(self.database)
+        ## In shard mode every loader process writes to a private database
+        ## file, so the loaders never wait for each other's write locks
+        self.shard = None
+        if self.shard_load and config.get("load", False):
+            self.shard = "%s%s%d" % (self.database, SqliteDriver.SHARD_SUFFIX, os.getpid())
+            logging.debug("Loading into shard %s" % self.shard)
+
+        self.connect()
+
+        if config["reset"]:
+            tables, indexes = self.readDDL()
+            ## Bulk loads build the secondary indexes in loadFinalize
+            if self.bulk_load: indexes = [ ]
+            for statement in tables + indexes:
+                self.cursor.execute(statement);
+            for shard in self.findShards() + self.findMergeFiles():
+                logging.debug("Deleting stale shard %s" % shard)
+                os.unlink(shard)
+        ## IF
+        
+        if self.shard:
+            tables, indexes = self.readDDL()
+            for statement in tables:
+                self.cursor.execute(re.sub(r"CREATE\s+TABLE\s+(?!IF\s)", "CREATE TABLE IF NOT EXISTS ", statement, count=1, flags=re.IGNORECASE))
+            self.conn.commit()
+        ## IF
+
+    ## ----------------------------------------------
+    ## connect
+    ## ----------------------------------------------
+    def connect(self):
+        """Open the database (or this loader's shard) and apply the configured pragmas"""
+        self.conn = sqlite3.connect(self.shard if self.shard else self.database)
         self.cursor = self.conn.cursor()
 
         try:
@@ -179,11 +312,53 @@ class SqliteDriver(abstractdriver.AbstractDriver):
         except sqlite3.OperationalError as err:
             print(err)
 
-        if config["reset"]:
-            with open(self.ddl) as ddl:
-                ddl_statements = "".join([l for l in ddl if not l.startswith("--")]).split(";")
-            for statement in ddl_statements:
-                self.cursor.execute(statement);
+    ## ----------------------------------------------
+    ## getFlag
+    ## ----------------------------------------------
+    def getFlag(self, config, key):
+        value = config.get(key, SqliteDriver.OPTIONAL_CONFIG[key])
+        return str(value).lower() in ("true", "1", "yes", "on")
+
+    ## ----------------------------------------------
+    ## readDDL
+    ## ----------------------------------------------
+    def readDDL(self):
+        """Returns the CREATE TABLE and the CREATE INDEX statements of the DDL file"""
+        with open(self.ddl) as ddl:
+            ddl_statements = "".join([l for l in ddl if not l.startswith("--")]).split(";")
+        tables = [ ]
+        indexes = [ ]
+        for statement in ddl_statements:
+            if re.match(r"\s*CREATE\s+(UNIQUE\s+)?INDEX", statement, re.IGNORECASE):
+                indexes.append(statement)
+            else:
+                tables.append(statement)
+        ## FOR
+        return (tables, indexes)
+
+    ## ----------------------------------------------
+    ## setPragmas
+    ## ----------------------------------------------
+    def setPragmas(self, pragmas):
+        """Sets the given (name, value) pragmas and returns their previous values"""
+        previous = [ ]
+        for name, value in pragmas:
+            try:
+                self.cursor.execute("PRAGMA %s" % name)
+                previous.append((name, self.cursor.fetchone()[0]))
+                self.cursor.execute("PRAGMA %s=%s" % (name, value))
+            except sqlite3.OperationalError as err:
+                logging.warn("Failed to set PRAGMA %s=%s: %s" % (name, value, err))
+        ## FOR
+        return (previous)
+
+    ## ----------------------------------------------
+    ## loadStart
+    ## ----------------------------------------------
+    def loadStart(self):
+        if self.bulk_load:
+            self.conn.commit()
+            self.saved_pragmas = self.setPragmas(SqliteDriver.BULK_LOAD_PRAGMAS)
 
     ## ----------------------------------------------
     ## loadTuples
@@ -198,12 +373,231 @@ class SqliteDriver(abstractdriver.AbstractDriver):
         logging.debug("Loaded %d tuples for tableName %s" % (len(tuples), tableName))
         return
 
+    ## ----------------------------------------------
+    ## loadFinishItem
+    ## ----------------------------------------------
+    def loadFinishItem(self):
+        ## Commit each completed part so that a resumed load can rely on it
+        self.conn.commit()
+
+    ## ----------------------------------------------
+    ## loadFinishWarehouse
+    ## ----------------------------------------------
+    def loadFinishWarehouse(self, w_id):
+        self.conn.commit()
+
+    ## ----------------------------------------------
+    ## loadDeleteItems
+    ## ----------------------------------------------
+    def loadDeleteItems(self):
+        self.cursor.execute("DELETE FROM %s" % constants.TABLENAME_ITEM)
+        self.conn.commit()
+
+    ## ----------------------------------------------
+    ## loadDeleteWarehouse
+    ## ----------------------------------------------
+    def loadDeleteWarehouse(self, w_id):
+        logging.info("Deleting partially loaded warehouse %d" % w_id)
+        for tableName, column in SqliteDriver.WAREHOUSE_COLUMNS.items():
+            self.cursor.execute("DELETE FROM %s WHERE %s = ?" % (tableName, column), [ w_id ])
+        self.conn.commit()
+
     ## ----------------------------------------------
     ## loadFinish
     ## ----------------------------------------------
     def loadFinish(self):
         logging.info("Commiting changes to database")
         self.conn.commit()
+        if self.saved_pragmas:
+            self.setPragmas(self.saved_pragmas)
+            self.saved_pragmas = None
+
+    ## ----------------------------------------------
+    ## loadFinalize
+    ## ----------------------------------------------
+    def loadFinalize(self):
+        if self.shard_load: self.mergeShards()
+        if not self.bulk_load: return
+        
+        tables, indexes = self.readDDL()
+        saved_pragmas = self.setPragmas(SqliteDriver.BULK_LOAD_PRAGMAS)
+        for statement in indexes:
+            statement = re.sub(r"INDEX\s+(?!IF\s)", "INDEX IF NOT EXISTS ", statement, count=1, flags=re.IGNORECASE)
+            logging.info("Building index: %s" % statement.strip())
+            self.cursor.execute(statement)
+        ## FOR
+        logging.info("Analyzing database")
+        self.cursor.execute("ANALYZE")
+        self.conn.commit()
+        self.setPragmas(saved_pragmas)
+
+    ## ----------------------------------------------
+    ## readMetadata
+    ## ----------------------------------------------
+    def readMetadata(self):
+        try:
+            self.cursor.execute("SELECT VALUE FROM %s WHERE NAME = 'load'" % SqliteDriver.METADATA_TABLE)
+            row = self.cursor.fetchone()
+            if row: return json.loads(row[0])
+        except sqlite3.OperationalError:
+            pass
+        
+        ## Databases that were loaded before the metadata was recorded
+        try:
+            self.cursor.execute("SELECT MAX(W_ID) FROM WAREHOUSE")
+            row = self.cursor.fetchone()
+            if row and row[0]: return { "warehouses": row[0] }
+        except sqlite3.OperationalError:
+            pass
+        return None
+
+    ## ----------------------------------------------
+    ## writeMetadata
+    ## ----------------------------------------------
+    def writeMetadata(self, metadata):
+        self.cursor.execute("CREATE TABLE IF NOT EXISTS %s (NAME VARCHAR(32) PRIMARY KEY, VALUE TEXT)" % SqliteDriver.METADATA_TABLE)
+        self.cursor.execute("INSERT OR REPLACE INTO %s VALUES ('load', ?)" % SqliteDriver.METADATA_TABLE, (json.dumps(metadata), ))
+        self.conn.commit()
+
+    ## ----------------------------------------------
+    ## findShards
+    ## ----------------------------------------------
+    def findShards(self):
+        """Returns the shard files of the database that are left from loader processes"""
+        pattern = re.compile(re.escape(self.database + SqliteDriver.SHARD_SUFFIX) + r"\d+$")
+        return sorted([ f for f in glob.glob(glob.escape(self.database) + SqliteDriver.SHARD_SUFFIX + "*") if pattern.match(f) ])
+
+    def findMergeFiles(self):
+        """Returns the intermediate files that an interrupted merge left behind"""
+        pattern = re.compile(re.escape(self.database + SqliteDriver.MERGE_SUFFIX) + r"\d+-\d+$")
+        return sorted([ f for f in glob.glob(glob.escape(self.database) + SqliteDriver.MERGE_SUFFIX + "*") if pattern.match(f) ])
+
+    ## ----------------------------------------------
+    ## mergeShards
+    ## ----------------------------------------------
+    def mergeShards(self):
+        """Copy the contents of every shard into the database in primary key order"""
+        shards = self.findShards()
+        if not shards: return
+        logging.info("Merging %d shards into %s" % (len(shards), self.database))
+        
+        ## The intermediate files of an interrupted merge are made again
+        ## from the shards, which are only deleted at the very end
+        for path in self.findMergeFiles():
+            os.unlink(path)
+        
+        saved_pragmas = self.setPragmas(SqliteDriver.BULK_LOAD_PRAGMAS)
+        ## Only MERGE_GROUP_SIZE shards can be attached at once, so larger sets
+        ## are first combined into intermediate files, and the rows are only
+        ## sorted once all of them can be copied into the database together
+        originals = shards
+        level = 0
+        while len(shards) > SqliteDriver.MERGE_GROUP_SIZE:
+            merged = [ ]
+            for first in range(0, len(shards), SqliteDriver.MERGE_GROUP_SIZE):
+                path = "%s%s%d-%d" % (self.database, SqliteDriver.MERGE_SUFFIX, level, len(merged))
+                self.cursor.execute("ATTACH DATABASE ? AS merged", [ path ])
+                self.copyShards(shards[first:first + SqliteDriver.MERGE_GROUP_SIZE], "merged")
+                self.cursor.execute("DETACH DATABASE merged")
+                merged.append(path)
+            ## FOR
+            if shards is not originals:
+                for path in shards: os.unlink(path)
+            shards = merged
+            level += 1
+        ## WHILE
+        self.copyShards(shards, "main")
+        self.setPragmas(saved_pragmas)
+        
+        for path in originals + (shards if shards is not originals else [ ]):
+            os.unlink(path)
+
+    ## ----------------------------------------------
+    ## copyShards
+    ## ----------------------------------------------
+    def copyShards(self, group, target):
+        """Copy the tables of the given shards into the target database.
+        The rows are inserted into the main database in primary key order."""
+        names = [ "shard%d" % i for i in range(len(group)) ]
+        for name, shard in zip(names, group):
+            self.cursor.execute("ATTACH DATABASE ? AS %s" % name, [ shard ])
+        
+        for tableName in constants.ALL_TABLES:
+            rows = "SELECT * FROM (%s)" % " UNION ALL ".join([ "SELECT * FROM %s.%s" % (name, tableName) for name in names ])
+            if target != "main":
+                self.cursor.execute("CREATE TABLE %s.%s AS %s" % (target, tableName, rows))
+                continue
+            
+            ## table_info numbers the primary key columns from 1 in key order
+            info = self.cursor.execute("PRAGMA main.table_info(%s)" % tableName).fetchall()
+            pkey = [ row[1] for row in sorted(info, key=lambda row: row[5]) if row[5] > 0 ]
+            sql = "INSERT INTO main.%s %s" % (tableName, rows)
+            if pkey: sql += " ORDER BY %s" % ",".join(pkey)
+            self.cursor.execute(sql)
+        ## FOR
+        self.conn.commit()
+        
+        for name in names:
+            self.cursor.execute("DETACH DATABASE %s" % name)
+
+    ## ----------------------------------------------
+    ## snapshot
+    ## ----------------------------------------------
+    def snapshot(self, name):
+        path = self.snapshotPath(name)
+        start = time.time()
+        self.conn.commit()
+        if self.vfs == "unix":
+            if self.journal_mode == "wal":
+                self.cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            ## Hold a read lock so that nobody changes the file while it is copied
+            self.cursor.execute("BEGIN")
+            self.cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+            try:
+                method = copyFile(self.database, path)
+            finally:
+                self.conn.rollback()
+        else:
+            ## The backup API waits for every statement on the connection to finish
+            self.cursor.close()
+            self.cursor = self.conn.cursor()
+            target = sqlite3.connect(path)
+            self.conn.backup(target)
+            target.close()
+            method = "backup API"
+        ## IF
+        logging.info("Saved snapshot %s using %s in %.1f sec" % (path, method, time.time() - start))
+
+    ## ----------------------------------------------
+    ## restore
+    ## ----------------------------------------------
+    def restore(self, name):
+        path = self.snapshotPath(name)
+        start = time.time()
+        if self.vfs == "unix":
+            assert os.path.exists(path), "Snapshot '%s' does not exist" % path
+            self.conn.close()
+            ## A leftover journal would be applied to the restored file
+            for suffix in ("-journal", "-wal", "-shm"):
+                if os.path.exists(self.database + suffix):
+                    os.unlink(self.database + suffix)
+            method = copyFile(path, self.database)
+            self.connect()
+        else:
+            self.cursor.close()
+            self.cursor = self.conn.cursor()
+            source = sqlite3.connect(path)
+            source.backup(self.conn)
+            source.close()
+            method = "backup API"
+        ## IF
+        logging.info("Restored snapshot %s using %s in %.1f sec" % (path, method, time.time() - start))
+
+    ## ----------------------------------------------
+    ## snapshotPath
+    ## ----------------------------------------------
+    def snapshotPath(self, name):
+        return "%s.snapshot-%s" % (self.database, name)
 
     ## ----------------------------------------------
     ## doDelivery
@@ -11,7 +11,7 @@ def get_res(data, which):
     totals = data["results"]["TxnsTotal"]
     ct = totals["Ct"]
     duration = totals["Duration"]
-    dts = dict([(x["Txn"], x["Ct"]/x["Time"]) for x in data["results"]["Txns"]])
+    dts = dict([(x["Txn"], x["Ct"]/duration) for x in data["results"]["Txns"]])
     fn = {
         "total": ct / duration,
         "status": dts["ORDER_STATUS"] if "ORDER_STATUS" in dts else None
@@ -19,6 +19,11 @@ import os
 #
 # Experiments will all begin by copying the same initial database to a test
 # location.
+#
+# Alternatively, set "snapshot" in the sweep configuration to the name of a
+# snapshot that was saved next to each database with tpcc.py --snapshot NAME.
+# Experiments then begin by restoring that snapshot with tpcc.py --restore,
+# which uses reflinks or in-kernel copies where the file system supports them.
 
 def init_location(location, vfs, alt_path):
 
@@ -66,6 +71,23 @@ def init_location(location, vfs, alt_path):
         su_rm_all(location)
         cp(location)
 
+    flush_caches()
+
+def restore_snapshot(config_file, snapshot):
+    env = os.environ
+    if "LD_PRELOAD" not in env:
+        print("must define LD_PRELOAD with path to libsqlite3.so")
+        sys.exit(1)
+    res = subprocess.call(["python3", "tpcc.py",
+        "--config", config_file,
+        "--restore", snapshot,
+        "--no-execute", "sqlite"], env=env)
+    if res:
+        print("problem in restore")
+        sys.exit(1)
+    flush_caches()
+
+def flush_caches():
     if str.startswith(sys.platform, "linux"):
         res = subprocess.call(["/bin/sync"])
         if res:
@@ -136,7 +158,10 @@ if __name__ == "__main__":
                                     config["iteration"] = iteration
                                     config["read_weight"] = read_weight
                                     print("executing ", config)
-                                    init_location(database["path"], database["vfs"], database["alt_path"] if "alt_path" in database else None)
+                                    if "snapshot" in sweep_config:
+                                        restore_snapshot("tmp-config", sweep_config["snapshot"])
+                                    else:
+                                        init_location(database["path"], database["vfs"], database["alt_path"] if "alt_path" in database else None)
                                     result_file = "res-%s.json" % experiment_id
                                     res = run_test("tmp-config", clients, duration, read_weight, result_file)
                                     with open(result_file) as f:
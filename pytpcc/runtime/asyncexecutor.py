@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import sys
+import time
+import asyncio
+import inspect
+import logging
+import threading
+import traceback
+import concurrent.futures
+
+from . import executor
+from util import *
+
+## The most threads that a blocking driver's transactions are offloaded to
+MAX_THREADS = 64
+
+## ==============================================
+## AsyncExecutor
+## ==============================================
+class AsyncExecutor(executor.Executor):
+    """
+        Runs many terminals in one asyncio event loop. A driver whose
+        executeTransaction is a coroutine (see AsyncAbstractDriver) is
+        shared by all of the terminals. A blocking driver is wrapped in a
+        ThreadedDriver, which runs the transactions in a pool of threads with
+        one driver instance each, made by driverFactory.
+        
+        In a closed loop each terminal starts its next transaction as soon as
+        its previous one has finished. In an open loop the transactions are
+        started on the arrival schedule, with at most one in flight per
+        terminal; one that has to wait for a free terminal is still timed
+        from its scheduled start.
+    """
+    
+    def __init__(self, driver, scaleParameters, terminals, stop_on_error = False, weights=None, schedule=None,
+                 driverFactory=None, threads=None):
+        executor.Executor.__init__(self, driver, scaleParameters, stop_on_error, weights, schedule)
+        assert terminals > 0
+        self.terminals = terminals
+        if not inspect.iscoroutinefunction(driver.executeTransaction):
+            assert driverFactory, "%s is a blocking driver and needs a driverFactory" % driver
+            self.driver = ThreadedDriver(driverFactory, threads or min(terminals, MAX_THREADS))
+    ## DEF
+    
+    def execute(self, duration, record_detail, warmup=0, cooldown=0, delay=0, step=0):
+        """
+            Like Executor.execute, where the closed-loop terminals start
+            one after the other, step seconds apart, from delay seconds on.
+        """
+        r = results.Results(record_detail, self.interval, self.events)
+        r.reporter = self.reporter
+        assert r
+        logging.info("Executing benchmark for %d seconds with %d terminals" % (duration, self.terminals))
+        if warmup or cooldown: logging.info("Warming up for %d seconds and cooling down for %d seconds" % (warmup, cooldown))
+        self.debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        try:
+            asyncio.run(self.run(r, duration, warmup, cooldown, delay, step))
+        except KeyboardInterrupt:
+            return -1
+        
+        r.stopBenchmark()
+        return (r)
+    ## DEF
+
+    async def run(self, r, duration, warmup, cooldown, delay, step):
+        await self.driver.executeStart()
+        try:
+            start = r.startBenchmark(warmup, duration)
+            if self.schedule:
+                await self.executeOpenLoop(r, start, warmup + duration + cooldown)
+            else:
+                await asyncio.gather(*[ self.executeClosedLoop(r, start, warmup + duration + cooldown, delay + i * step) for i in range(self.terminals) ])
+        finally:
+            await self.driver.executeFinish()
+    ## DEF
+
+    async def executeClosedLoop(self, r, start, duration, delay):
+        """One terminal, which starts each transaction as soon as its previous one has finished"""
+        await asyncio.sleep(delay)
+        while (time.time() - start) <= duration:
+            try:
+                txn, params = self.doOne()
+            except StopIteration:
+                break
+            await self.runTransaction(r, txn, params, start, duration)
+        ## WHILE
+    ## DEF
+
+    async def executeOpenLoop(self, r, start, duration):
+        """Start each transaction on the first free terminal once it is due"""
+        self.startSchedule()
+        idle = asyncio.Semaphore(self.terminals)
+        running = set()
+        while True:
+            offset, txn, params = self.nextArrival()
+            if offset > duration:
+                if offset != float("inf"): await asyncio.sleep(max(0.0, start + duration - time.time()))
+                break
+            ## IF
+            self.scheduled += 1
+
+            delay = start + offset - time.time()
+            if delay > 0: await asyncio.sleep(delay)
+            await idle.acquire()
+            now = time.time()
+            if now - start > duration:
+                idle.release()
+                self.drainSchedule(r, start, duration, offset)
+                break
+            self.recordLag(now - (start + offset))
+
+            task = asyncio.create_task(self.runTransaction(r, txn, params, start, duration, start + offset))
+            task.add_done_callback(lambda t: idle.release())
+            running.add(task)
+            task.add_done_callback(running.discard)
+        ## WHILE
+        if running: await asyncio.gather(*running)
+        self.showSchedule(r)
+    ## DEF
+
+    async def runTransaction(self, r, txn, params, start, duration, scheduled=None):
+        """Execute one transaction, retrying it on errors, and record it in the results"""
+        txn_id = r.startTransaction(txn, scheduled)
+        if self.recorder: self.recorder.record((scheduled or time.time()) - start, txn, params)
+        if self.debug: logging.debug("Executing '%s' transaction" % txn)
+        try:
+            try_query = True
+            retry_ct = 0
+            while try_query and (time.time() - start) <= duration:
+                try:
+                    val = await self.driver.executeTransaction(txn, params)
+                    try_query = False
+                except Exception as ex:
+                    retry_ct += 1
+                    if self.reporter: self.reporter.error(txn)
+                    print("retry transaction ct %d" % retry_ct)
+                    if retry_ct >= 20:
+                        print("abort transaction")
+                        r.abortTransaction(txn_id)
+                        try_query = False
+                        raise ex
+                    if retry_ct > 3:
+                        await asyncio.sleep(0.01 * retry_ct * retry_ct)
+            if try_query:
+                r.abortTransaction(txn_id)
+                return
+        except (Exception, AssertionError) as ex:
+            logging.warn("Failed to execute Transaction '%s': %s" % (txn, ex))
+            if self.debug: traceback.print_exc(file=sys.stdout)
+            if self.stop_on_error: raise
+            if txn_id in r.running: r.abortTransaction(txn_id)
+            return
+        
+        r.stopTransaction(txn_id)
+    ## DEF
+## CLASS
+
+## ==============================================
+## ThreadedDriver
+## ==============================================
+class ThreadedDriver:
+    """
+        The asynchronous interface to a blocking driver. Each thread of the
+        pool gets its own driver instance, since a blocking driver's
+        connection can only be used by one thread at a time, and the
+        transactions are run on whichever thread is free.
+    """
+    
+    def __init__(self, factory, threads):
+        self.factory = factory
+        self.threads = threads
+        self.pool = None
+        self.local = threading.local()
+    ## DEF
+
+    def __str__(self):
+        return "%d threads" % self.threads
+    ## DEF
+
+    async def executeStart(self):
+        logging.debug("Starting %d driver threads" % self.threads)
+        self.pool = concurrent.futures.ThreadPoolExecutor(self.threads, thread_name_prefix="terminal")
+        await self.onEachThread(self.startThread)
+    ## DEF
+
+    async def executeFinish(self):
+        await self.onEachThread(self.finishThread)
+        self.pool.shutdown()
+    ## DEF
+
+    async def executeTransaction(self, txn, params):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, self.runTransaction, txn, params)
+    ## DEF
+
+    def runTransaction(self, txn, params):
+        return self.local.driver.executeTransaction(txn, params)
+    ## DEF
+
+    def startThread(self):
+        self.local.driver = self.factory()
+        self.local.driver.executeStart()
+    ## DEF
+
+    def finishThread(self):
+        self.local.driver.executeFinish()
+    ## DEF
+
+    async def onEachThread(self, function):
+        """Call function once on every thread of the pool"""
+        ## Nobody gets past the barrier until every thread has taken a call,
+        ## so no thread can take two of them
+        barrier = threading.Barrier(self.threads)
+        def call():
+            barrier.wait()
+            function()
+        ## DEF
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[ loop.run_in_executor(self.pool, call) for i in range(self.threads) ])
+    ## DEF
+## CLASS
@@ -41,13 +41,27 @@ from pprint import pprint,pformat
 import constants
 from util import *
 
+## How far behind its scheduled time an open-loop transaction may start
+## before it is counted as late
+LATE_THRESHOLD = 0.001
 
 class Executor:
     
-    def __init__(self, driver, scaleParameters, stop_on_error = False, weights=None):
+    def __init__(self, driver, scaleParameters, stop_on_error = False, weights=None, schedule=None):
         self.driver = driver
         self.scaleParameters = scaleParameters
         self.stop_on_error = stop_on_error
+        self.schedule = schedule
+        ## The ParameterStream that doOne takes the transactions from, if any
+        self.stream = None
+        ## The TraceWriter that records the transactions as they are issued, if any
+        self.recorder = None
+        ## The length of the intervals of the results' time series
+        self.interval = results.INTERVAL
+        ## The EventLog of the individual transactions, if any
+        self.events = None
+        ## The livemetrics.MetricsReporter of the executor, if any
+        self.reporter = None
 
         if not weights:
             self.weights = {
@@ -75,59 +89,172 @@ class Executor:
 
     ## DEF
     
-    def execute(self, duration, record_detail):
-        r = results.Results(record_detail)
+    def execute(self, duration, record_detail, warmup=0, cooldown=0, delay=0):
+        """
+            Run the workload for warmup + duration + cooldown seconds, of
+            which only the transactions that start in the duration seconds
+            are counted. A closed loop waits delay seconds before it starts,
+            so that the clients can ramp up one after the other.
+        """
+        r = results.Results(record_detail, self.interval, self.events)
+        r.reporter = self.reporter
         assert r
         logging.info("Executing benchmark for %d seconds" % duration)
-        start = r.startBenchmark()
-        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        if warmup or cooldown: logging.info("Warming up for %d seconds and cooling down for %d seconds" % (warmup, cooldown))
+        start = r.startBenchmark(warmup, duration)
+        self.debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        if self.schedule:
+            ret = self.executeOpenLoop(r, start, warmup + duration + cooldown)
+        else:
+            time.sleep(delay)
+            ret = self.executeClosedLoop(r, start, warmup + duration + cooldown)
+        if ret == -1: return -1
+            
+        r.stopBenchmark()
+        return (r)
+    ## DEF
 
+    def executeClosedLoop(self, r, start, duration):
+        """Start each transaction as soon as the previous one has finished"""
         while (time.time() - start) <= duration:
-            txn, params = self.doOne()
-            txn_id = r.startTransaction(txn)
-            
-            if debug: logging.debug("Executing '%s' transaction" % txn)
             try:
-                try_query = True
-                retry_ct = 0
-                while try_query and (time.time() - start) <= duration:
-                    try:
-                        val = self.driver.executeTransaction(txn, params)
+                txn, params = self.doOne()
+            except StopIteration:
+                logging.info("The replayed trace has ended")
+                break
+            if self.runTransaction(r, txn, params, start, duration) == -1: return -1
+        ## WHILE
+    ## DEF
+
+    def executeOpenLoop(self, r, start, duration):
+        """
+            Start the transactions at the times that the arrival schedule
+            gives, however long the earlier ones took. A transaction's time
+            is measured from when it was scheduled to start, so the time that
+            it spent waiting behind slow transactions counts against it
+            rather than being hidden by a lower arrival rate.
+        """
+        self.startSchedule()
+        while True:
+            offset, txn, params = self.nextArrival()
+            if offset > duration:
+                ## Run for the whole duration so that the rate is measured over
+                ## it, unless the replayed trace has ended
+                if offset != float("inf"): time.sleep(max(0.0, start + duration - time.time()))
+                break
+            ## IF
+            self.scheduled += 1
+
+            ## Behind the schedule this starts straight away, and the
+            ## transactions that can't start before the end are not run
+            now = time.time()
+            if now - start > duration:
+                self.drainSchedule(r, start, duration, offset)
+                break
+            lag = now - (start + offset)
+            if lag < 0:
+                time.sleep(-lag)
+            else:
+                self.recordLag(lag)
+            if self.runTransaction(r, txn, params, start, duration, start + offset) == -1: return -1
+        ## WHILE
+        self.showSchedule(r)
+    ## DEF
+
+    def startSchedule(self):
+        logging.info("Open loop: %s" % self.schedule)
+        self.scheduled = 0
+        self.late = 0
+        self.max_lag = 0.0
+        self.missed = 0
+    ## DEF
+
+    def nextArrival(self):
+        """Returns the next (offset, txn, params) from the arrival schedule"""
+        offset, txn = self.schedule.next()
+        if txn is arrivals.MIX:
+            try:
+                txn, params = self.doOne()
+            except StopIteration:
+                ## The replayed trace has ended
+                return (float("inf"), None, None)
+        else:
+            params = self.txn_params[txn]()
+        return (offset, txn, params)
+    ## DEF
+
+    def drainSchedule(self, r, start, duration, offset):
+        """Count the arrival at offset, which could not be started before the end,
+        and every later arrival that was due before the end as missed"""
+        while True:
+            self.missed += 1
+            r.missTransaction(start + offset)
+            offset = self.schedule.next()[0]
+            if offset > duration: break
+            self.scheduled += 1
+        ## WHILE
+    ## DEF
+
+    def recordLag(self, lag):
+        """Count a transaction that started lag seconds after its scheduled time"""
+        if lag > LATE_THRESHOLD:
+            self.late += 1
+            self.max_lag = max(self.max_lag, lag)
+    ## DEF
+
+    def showSchedule(self, r):
+        logging.info("Open loop: %d transactions scheduled, %d started more than %d ms late (at most %.1f ms), %d not started before the end" % \
+                     (self.scheduled, self.late, LATE_THRESHOLD * 1000, self.max_lag * 1000, self.missed))
+    ## DEF
+
+    def runTransaction(self, r, txn, params, start, duration, scheduled=None):
+        """Execute one transaction, retrying it on errors, and record it in the results"""
+        txn_id = r.startTransaction(txn, scheduled)
+        if self.recorder: self.recorder.record((scheduled or time.time()) - start, txn, params)
+        if self.debug: logging.debug("Executing '%s' transaction" % txn)
+        try:
+            try_query = True
+            retry_ct = 0
+            while try_query and (time.time() - start) <= duration:
+                try:
+                    val = self.driver.executeTransaction(txn, params)
+                    try_query = False
+                except Exception as ex:
+                    retry_ct += 1
+                    if self.reporter: self.reporter.error(txn)
+                    print("retry transaction ct %d" % retry_ct)
+                    if retry_ct >= 20:
+                        print("abort transaction")
+                        r.abortTransaction(txn_id)
                         try_query = False
-                    except Exception as ex:
-                        retry_ct += 1
-                        print("retry transaction ct %d" % retry_ct)
-                        if retry_ct >= 20:
-                            print("abort transaction")
-                            r.abortTransaction(txn_id)
-                            try_query = False
-                            raise ex
-                        if retry_ct > 3:
-                            time.sleep(0.01 * retry_ct * retry_ct)
-                if try_query:
-                    r.abortTransaction(txn_id)
-                    continue
-            except KeyboardInterrupt:
-                return -1
-            except (Exception, AssertionError) as ex:
-                logging.warn("Failed to execute Transaction '%s': %s" % (txn, ex))
-                if debug: traceback.print_exc(file=sys.stdout)
-                if self.stop_on_error: raise
+                        raise ex
+                    if retry_ct > 3:
+                        time.sleep(0.01 * retry_ct * retry_ct)
+            if try_query:
                 r.abortTransaction(txn_id)
-                continue
+                return
+        except KeyboardInterrupt:
+            return -1
+        except (Exception, AssertionError) as ex:
+            logging.warn("Failed to execute Transaction '%s': %s" % (txn, ex))
+            if self.debug: traceback.print_exc(file=sys.stdout)
+            if self.stop_on_error: raise
+            if txn_id in r.running: r.abortTransaction(txn_id)
+            return
 
-            #if debug: logging.debug("%s\nParameters:\n%s\nResult:\n%s" % (txn, pformat(params), pformat(val)))
-            
-            r.stopTransaction(txn_id)
-        ## WHILE
-            
-        r.stopBenchmark()
-        return (r)
+        #if debug: logging.debug("%s\nParameters:\n%s\nResult:\n%s" % (txn, pformat(params), pformat(val)))
+        
+        r.stopTransaction(txn_id)
     ## DEF
     
     def doOne(self):
         """Selects and executes a transaction at random. The number of new order transactions executed per minute is the official "tpmC" metric. See TPC-C 5.4.2 (page 71)."""
-        
+        if self.stream: return self.stream.next()
+        return self.selectTransaction()
+    ## DEF
+
+    def selectTransaction(self):
+        """Select a transaction from the mix and generate its parameters"""
         ## This is not strictly accurate: The requirement is for certain
         ## *minimum* percentages to be maintained. This is close to the right
         ## thing, but not precisely correct. See TPC-C 5.2.4 (page 68).
@@ -163,24 +290,18 @@ class Executor:
         ## 1% of transactions roll back
         rollback = False # FIXME rand.number(1, 100) == 1
 
-        i_ids = [ ]
-        i_w_ids = [ ]
-        i_qtys = [ ]
-        for i in range(0, ol_cnt):
-            if rollback and i + 1 == ol_cnt:
-                i_ids.append(self.scaleParameters.items + 1)
-            else:
-                i_ids.append(self.makeItemId())
+        i_ids = rand.nurand_many(ol_cnt, 8191, 1, self.scaleParameters.items)
+        if rollback: i_ids[-1] = self.scaleParameters.items + 1
 
-            ## 1% of items are from a remote warehouse
-            remote = (rand.number(1, 100) == 1)
-            if self.scaleParameters.warehouses > 1 and remote:
-                i_w_ids.append(rand.numberExcluding(self.scaleParameters.starting_warehouse, self.scaleParameters.ending_warehouse, w_id))
-            else:
-                i_w_ids.append(w_id)
+        ## 1% of items are from a remote warehouse
+        i_w_ids = [ w_id ] * ol_cnt
+        if self.scaleParameters.warehouses > 1:
+            for i, remote in enumerate(rand.numbers(ol_cnt, 1, 100)):
+                if remote == 1:
+                    i_w_ids[i] = rand.numberExcluding(self.scaleParameters.starting_warehouse, self.scaleParameters.ending_warehouse, w_id)
+            ## FOR
 
-            i_qtys.append(rand.number(1, constants.MAX_OL_QUANTITY))
-        ## FOR
+        i_qtys = rand.numbers(ol_cnt, 1, constants.MAX_OL_QUANTITY)
 
         return makeParameterDict(locals(), "w_id", "d_id", "c_id", "o_entry_d", "i_ids", "i_w_ids", "i_qtys")
     ## DEF
@@ -211,8 +332,7 @@ class Executor:
     ## ----------------------------------------------
     def generatePaymentParams(self):
         """Return parameters for PAYMENT"""
-        x = rand.number(1, 100)
-        y = rand.number(1, 100)
+        x, y = rand.numbers(2, 1, 100)
 
         w_id = self.makeWarehouseId()
         d_id = self.makeDistrictId()
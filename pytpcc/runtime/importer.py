@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+
+import csv
+import time
+import itertools
+import logging
+
+import constants
+from util import csvfile
+
+## ==============================================
+## CsvImporter
+## ==============================================
+class CsvImporter:
+    """
+        Streams the table CSV files written by the csv driver into another
+        driver's loadTuples, so a dataset that was generated once can be bulk
+        loaded many times. The rows are read in batches and converted back to
+        the types of the DDL's columns.
+    """
+
+    def __init__(self, handle, directory, ddl, batch_size=2500, stats=None):
+        self.handle = handle
+        ## The time spent reading the files counts as generation time
+        self.stats = stats
+        if stats: self.handle = stats.recorder(handle)
+        self.directory = directory
+        self.converters = csvfile.rowConverters(ddl)
+        self.batch_size = batch_size
+    ## DEF
+
+    ## ==============================================
+    ## execute
+    ## ==============================================
+    def execute(self):
+        ## Each loader process wrote its own part of every table, and every
+        ## part holds complete warehouses. The parts are imported one at a time,
+        ## so that the district and warehouse callbacks are made as soon as all
+        ## of the tables of a part's warehouses are in the driver.
+        parts = { }
+        for tableName in constants.ALL_TABLES:
+            files = csvfile.tableFiles(self.directory, tableName)
+            if not files:
+                logging.warn("No CSV files for %s in %s" % (tableName, self.directory))
+            for path in files:
+                parts.setdefault(csvfile.filePart(path, tableName), { }).setdefault(tableName, [ ]).append(path)
+        ## FOR
+        self.rows = dict([ (tableName, 0) for tableName in constants.ALL_TABLES ])
+        
+        items = [ (part, tables.pop(constants.TABLENAME_ITEM)) for part, tables in parts.items() if constants.TABLENAME_ITEM in tables ]
+        if items:
+            for part, files in items:
+                self.importFiles(constants.TABLENAME_ITEM, files)
+            self.handle.loadFinishItem()
+        ## IF
+        
+        for part in sorted(parts.keys(), key=lambda part: (part is not None, part)):
+            start = time.time()
+            districts = [ ]
+            for tableName in constants.ALL_TABLES:
+                if not tableName in parts[part]: continue
+                districts += self.importFiles(tableName, parts[part][tableName])
+            ## FOR
+            for w_id, d_id in sorted(districts):
+                self.handle.loadFinishDistrict(w_id, d_id)
+            warehouses = sorted(set([ w_id for w_id, d_id in districts ]))
+            for w_id in warehouses:
+                self.handle.loadFinishWarehouse(w_id)
+            logging.info("Imported %d warehouses from part %s of %s in %.1f sec" % (len(warehouses), part, self.directory, time.time() - start))
+        ## FOR
+        
+        for tableName in constants.ALL_TABLES:
+            logging.info("Imported %d %s rows" % (self.rows[tableName], tableName))
+        return (None)
+    ## DEF
+
+    ## ==============================================
+    ## importFiles
+    ## ==============================================
+    def importFiles(self, tableName, files):
+        """Load the rows of the given files of a table. Returns the (W_ID, D_ID) of every DISTRICT row."""
+        districts = [ ]
+        for path in files:
+            for tuples in self.readBatches(tableName, path):
+                self.handle.loadTuples(tableName, tuples)
+                self.rows[tableName] += len(tuples)
+                if tableName == constants.TABLENAME_DISTRICT:
+                    districts += [ (t[1], t[0]) for t in tuples ]
+            ## FOR
+        ## FOR
+        return (districts)
+    ## DEF
+
+    ## ==============================================
+    ## readBatches
+    ## ==============================================
+    def readBatches(self, tableName, path):
+        """Yields the rows of the given file in lists of at most batch_size tuples"""
+        numColumns, convert = self.converters[tableName]
+        logging.debug("Reading %s" % path)
+        with csvfile.openReader(path) as f:
+            reader = csv.reader(f)
+            while True:
+                rows = list(itertools.islice(reader, self.batch_size))
+                if not rows: break
+                assert len(rows[0]) == numColumns, "%s has %d columns, not %d" % (path, len(rows[0]), numColumns)
+                yield list(map(convert, rows))
+            ## WHILE
+    ## DEF
+## CLASS
@@ -31,10 +31,10 @@
 
 import os
 import sys
+import itertools
 
 import logging
 from datetime import datetime
-from random import shuffle
 from pprint import pprint,pformat
 
 import constants
@@ -42,298 +42,414 @@ from util import *
 
 class Loader:
     
-    def __init__(self, handle, scaleParameters, w_ids, needLoadItems):
+    def __init__(self, handle, scaleParameters, w_ids, needLoadItems, vectorized=None, cache=None, seed=None, timestamp=None, manifest=None, stats=None):
         self.handle = handle
         self.scaleParameters = scaleParameters
         self.w_ids = w_ids
         self.needLoadItems = needLoadItems
         self.batch_size = 2500
+        self.cache = cache
+
+        ## Generate whole columns at a time with NumPy whenever it is available,
+        ## otherwise use the bulk functions in util/rand.py
+        if vectorized is None: vectorized = columns.HAVE_NUMPY
+        self.vectorized = vectorized
+
+        ## Every (warehouse, table) pair draws from its own random stream derived
+        ## from the seed, and every row uses the same timestamp, so a warehouse's
+        ## contents do not depend on which process loads it or in what order
+        self.seed = seed
+        self.timestamp = timestamp if timestamp else datetime.now()
+
+        ## Record every completed part in the load manifest so that an
+        ## interrupted load can be resumed
+        self.manifest = manifest
+        if manifest: self.handle = manifest.recorder(handle)
+
+        ## Measure the rows, bytes, generation time and driver time of every table
+        self.stats = stats
+        if stats: self.handle = stats.recorder(self.handle)
         
     ## ==============================================
     ## execute
     ## ==============================================
     def execute(self):
-        
-        ## Item Table
+        for unit in self.remaining():
+            self.loadUnit(unit)
+        return (None)
+
+    ## ==============================================
+    ## units
+    ## ==============================================
+    def units(self):
+        """
+            Returns the units of work to load: datacache.ITEMS for the ITEM table
+            and the W_ID of each warehouse. w_ids may be any iterable, including
+            one that pulls from a work queue shared with other loaders, and may
+            itself contain datacache.ITEMS.
+        """
         if self.needLoadItems:
+            return itertools.chain([ datacache.ITEMS ], self.w_ids)
+        return iter(self.w_ids)
+    ## DEF
+
+    ## ==============================================
+    ## remaining
+    ## ==============================================
+    def remaining(self):
+        """
+            Yields the units that still have to be loaded. When resuming, the
+            units that a previous run finished are skipped and the partially
+            loaded ones are deleted from the driver.
+        """
+        resumed = self.manifest and self.manifest.resumed
+        for unit in self.units():
+            if not resumed:
+                yield unit
+            elif unit == datacache.ITEMS:
+                if self.manifest.itemsFinished:
+                    logging.info("Skipping ITEM table, it was loaded by a previous run")
+                    continue
+                self.handle.loadDeleteItems()
+                yield unit
+            else:
+                if unit in self.manifest.finished:
+                    logging.debug("Skipping warehouse %d, it was loaded by a previous run" % unit)
+                    continue
+                if self.manifest.isPartial(unit):
+                    self.handle.loadDeleteWarehouse(unit)
+                yield unit
+        ## FOR
+    ## DEF
+
+    ## ==============================================
+    ## loadUnit
+    ## ==============================================
+    def loadUnit(self, unit):
+        """Load the ITEM table or one warehouse"""
+        if self.stats: self.handle.restart()
+        if unit == datacache.ITEMS:
             logging.debug("Loading ITEM table")
-            self.loadItems()
+            self.loadCached(datacache.ITEMS, self.loadItems)
             self.handle.loadFinishItem()
-            
-        ## Then create the warehouse-specific tuples
-        for w_id in self.w_ids:
-            self.loadWarehouse(w_id)
-            self.handle.loadFinishWarehouse(w_id)
-        ## FOR
+        else:
+            self.handle.loadStartWarehouse(unit)
+            self.loadCached(unit, self.loadWarehouse, unit)
+            self.handle.loadFinishWarehouse(unit)
+    ## DEF
+
+    ## ==============================================
+    ## stream
+    ## ==============================================
+    def stream(self, w_id, tableName):
+        """Returns the random stream used to generate the given table of the given warehouse"""
+        if self.vectorized:
+            return columns.makeStream(self.seed, w_id, tableName)
+        return rand.makeStream(self.seed, w_id, tableName)
+    ## DEF
+
+    ## ==============================================
+    ## loadCached
+    ## ==============================================
+    def loadCached(self, unit, generate, *args):
+        """
+            Stream the given unit from the data cache if it is there. Otherwise
+            generate it and, if there is a cache, record it for later runs.
+        """
+        if self.cache is None:
+            return generate(*args)
+        if self.cache.contains(unit):
+            return self.cache.replay(unit, self.handle)
         
-        return (None)
+        recorder = self.cache.record(unit, self.handle)
+        self.handle = recorder
+        try:
+            generate(*args)
+        except:
+            recorder.discard()
+            raise
+        finally:
+            self.handle = recorder.handle
+        recorder.commit()
+    ## DEF
 
     ## ==============================================
     ## loadItems
     ## ==============================================
     def loadItems(self):
+        rng = self.stream(datacache.ITEMS, constants.TABLENAME_ITEM)
+        
         ## Select 10% of the rows to be marked "original"
-        originalRows = rand.selectUniqueIds(self.scaleParameters.items / 10, 1, self.scaleParameters.items)
+        originalRows = rng.selectUniqueIds(self.scaleParameters.items / 10, 1, self.scaleParameters.items)
         
         ## Load all of the items
-        tuples = [ ]
+        i_ids = range(1, self.scaleParameters.items+1)
         total_tuples = 0
-        for i in range(1, self.scaleParameters.items+1):
-            original = (i in originalRows)
-            tuples.append(self.generateItem(i, original))
-            total_tuples += 1
-            if len(tuples) == self.batch_size:
-                logging.debug("LOAD - %s: %5d / %d" % (constants.TABLENAME_ITEM, total_tuples, self.scaleParameters.items))
-                self.handle.loadTuples(constants.TABLENAME_ITEM, tuples)
-                tuples = [ ]
-        ## FOR
-        if len(tuples) > 0:
+        for batch in self.slices(len(i_ids)):
+            tuples = self.generateItems(rng, i_ids[batch], originalRows)
+            total_tuples += len(tuples)
             logging.debug("LOAD - %s: %5d / %d" % (constants.TABLENAME_ITEM, total_tuples, self.scaleParameters.items))
             self.handle.loadTuples(constants.TABLENAME_ITEM, tuples)
+        ## FOR
     ## DEF
 
     ## ==============================================
     ## loadWarehouse
     ## ==============================================
     def loadWarehouse(self, w_id):
-        logging.debug("LOAD - %s: %d / %d" % (constants.TABLENAME_WAREHOUSE, w_id, len(self.w_ids)))
+        logging.debug("LOAD - %s: %d" % (constants.TABLENAME_WAREHOUSE, w_id))
+        
+        w_rng = self.stream(w_id, constants.TABLENAME_WAREHOUSE)
+        d_rng = self.stream(w_id, constants.TABLENAME_DISTRICT)
+        c_rng = self.stream(w_id, constants.TABLENAME_CUSTOMER)
+        h_rng = self.stream(w_id, constants.TABLENAME_HISTORY)
+        o_rng = self.stream(w_id, constants.TABLENAME_ORDERS)
+        ol_rng = self.stream(w_id, constants.TABLENAME_ORDER_LINE)
+        s_rng = self.stream(w_id, constants.TABLENAME_STOCK)
         
         ## WAREHOUSE
-        w_tuples = [ self.generateWarehouse(w_id) ]
+        w_tuples = [ self.generateWarehouse(w_rng, w_id) ]
         self.handle.loadTuples(constants.TABLENAME_WAREHOUSE, w_tuples)
 
         ## DISTRICT
-        d_tuples = [ ]
+        ## Each table of a district is streamed to the driver in batches of at
+        ## most batch_size rows, so memory use does not grow with the district size
         for d_id in range(1, self.scaleParameters.districtsPerWarehouse+1):
             d_next_o_id = self.scaleParameters.customersPerDistrict + 1
-            d_tuples = [ self.generateDistrict(w_id, d_id, d_next_o_id) ]
+            d_tuples = [ self.generateDistrict(d_rng, w_id, d_id, d_next_o_id) ]
+            self.handle.loadTuples(constants.TABLENAME_DISTRICT, d_tuples)
             
-            c_tuples = [ ]
-            h_tuples = [ ]
+            c_ids = range(1, self.scaleParameters.customersPerDistrict+1)
             
             ## Select 10% of the customers to have bad credit
-            selectedRows = rand.selectUniqueIds(self.scaleParameters.customersPerDistrict / 10, 1, self.scaleParameters.customersPerDistrict)
+            selectedRows = c_rng.selectUniqueIds(self.scaleParameters.customersPerDistrict / 10, 1, self.scaleParameters.customersPerDistrict)
+            self.loadBatches(constants.TABLENAME_CUSTOMER,
+                             (self.generateCustomers(c_rng, w_id, d_id, c_ids[batch], selectedRows) for batch in self.slices(len(c_ids))))
             
             ## TPC-C 4.3.3.1. says that o_c_id should be a permutation of [1, 3000]. But since it
             ## is a c_id field, it seems to make sense to have it be a permutation of the
             ## customers. For the "real" thing this will be equivalent
-            cIdPermutation = [ ]
-
-            for c_id in range(1, self.scaleParameters.customersPerDistrict+1):
-                badCredit = (c_id in selectedRows)
-                c_tuples.append(self.generateCustomer(w_id, d_id, c_id, badCredit, True))
-                h_tuples.append(self.generateHistory(w_id, d_id, c_id))
-                cIdPermutation.append(c_id)
-            ## FOR
-            assert cIdPermutation[0] == 1
-            assert cIdPermutation[self.scaleParameters.customersPerDistrict - 1] == self.scaleParameters.customersPerDistrict
-            shuffle(cIdPermutation)
-            
-            o_tuples = [ ]
-            ol_tuples = [ ]
-            no_tuples = [ ]
+            cIdPermutation = o_rng.shuffled(c_ids)
             
-            for o_id in range(1, self.scaleParameters.customersPerDistrict+1):
-                o_ol_cnt = rand.number(constants.MIN_OL_CNT, constants.MAX_OL_CNT)
-                
-                ## The last newOrdersPerDistrict are new orders
-                newOrder = ((self.scaleParameters.customersPerDistrict - self.scaleParameters.newOrdersPerDistrict) < o_id)
-                o_tuples.append(self.generateOrder(w_id, d_id, o_id, cIdPermutation[o_id - 1], o_ol_cnt, newOrder))
-
-                ## Generate each OrderLine for the order
-                for ol_number in range(0, o_ol_cnt):
-                    ol_tuples.append(self.generateOrderLine(w_id, d_id, o_id, ol_number, self.scaleParameters.items, newOrder))
-                ## FOR
-
-                ## This is a new order: make one for it
-                if newOrder: no_tuples.append([o_id, d_id, w_id])
-            ## FOR
+            ## The last newOrdersPerDistrict are new orders
+            o_ids = c_ids
+            newOrders = [ (self.scaleParameters.customersPerDistrict - self.scaleParameters.newOrdersPerDistrict) < o_id for o_id in o_ids ]
+            o_ol_cnts = o_rng.numbers(len(o_ids), constants.MIN_OL_CNT, constants.MAX_OL_CNT)
             
-            self.handle.loadTuples(constants.TABLENAME_DISTRICT, d_tuples)
-            self.handle.loadTuples(constants.TABLENAME_CUSTOMER, c_tuples)
-            self.handle.loadTuples(constants.TABLENAME_ORDERS, o_tuples)
-            self.handle.loadTuples(constants.TABLENAME_ORDER_LINE, ol_tuples)
-            self.handle.loadTuples(constants.TABLENAME_NEW_ORDER, no_tuples)
-            self.handle.loadTuples(constants.TABLENAME_HISTORY, h_tuples)
+            self.loadBatches(constants.TABLENAME_ORDERS,
+                             (self.generateOrders(o_rng, w_id, d_id, o_ids[batch], cIdPermutation[batch], o_ol_cnts[batch], newOrders[batch]) \
+                              for batch in self.slices(len(o_ids))))
+            self.loadBatches(constants.TABLENAME_ORDER_LINE,
+                             (self.generateOrderLines(ol_rng, w_id, d_id, o_ids[batch], o_ol_cnts[batch], newOrders[batch]) \
+                              for batch in self.orderLineSlices(o_ol_cnts)))
+            no_o_ids = [ o_id for o_id, newOrder in zip(o_ids, newOrders) if newOrder ]
+            self.loadBatches(constants.TABLENAME_NEW_ORDER,
+                             ([ [ o_id, d_id, w_id ] for o_id in no_o_ids[batch] ] for batch in self.slices(len(no_o_ids))))
+            self.loadBatches(constants.TABLENAME_HISTORY,
+                             (self.generateHistories(h_rng, w_id, d_id, c_ids[batch]) for batch in self.slices(len(c_ids))))
             self.handle.loadFinishDistrict(w_id, d_id)
         ## FOR
         
         ## Select 10% of the stock to be marked "original"
-        s_tuples = [ ]
-        selectedRows = rand.selectUniqueIds(self.scaleParameters.items / 10, 1, self.scaleParameters.items)
+        selectedRows = s_rng.selectUniqueIds(self.scaleParameters.items / 10, 1, self.scaleParameters.items)
+        i_ids = range(1, self.scaleParameters.items+1)
         total_tuples = 0
-        for i_id in range(1, self.scaleParameters.items+1):
-            original = (i_id in selectedRows)
-            s_tuples.append(self.generateStock(w_id, i_id, original))
-            if len(s_tuples) >= self.batch_size:
-                logging.debug("LOAD - %s [W_ID=%d]: %5d / %d" % (constants.TABLENAME_STOCK, w_id, total_tuples, self.scaleParameters.items))
-                self.handle.loadTuples(constants.TABLENAME_STOCK, s_tuples)
-                s_tuples = [ ]
-            total_tuples += 1
-        ## FOR
-        if len(s_tuples) > 0:
+        for batch in self.slices(len(i_ids)):
+            s_tuples = self.generateStocks(s_rng, w_id, i_ids[batch], selectedRows)
+            total_tuples += len(s_tuples)
             logging.debug("LOAD - %s [W_ID=%d]: %5d / %d" % (constants.TABLENAME_STOCK, w_id, total_tuples, self.scaleParameters.items))
             self.handle.loadTuples(constants.TABLENAME_STOCK, s_tuples)
+        ## FOR
     ## DEF
 
     ## ==============================================
-    ## generateItem
+    ## loadBatches
     ## ==============================================
-    def generateItem(self, id, original):
-        i_id = id
-        i_im_id = rand.number(constants.MIN_IM, constants.MAX_IM)
-        i_name = rand.astring(constants.MIN_I_NAME, constants.MAX_I_NAME)
-        i_price = rand.fixedPoint(constants.MONEY_DECIMALS, constants.MIN_PRICE, constants.MAX_PRICE)
-        i_data = rand.astring(constants.MIN_I_DATA, constants.MAX_I_DATA)
-        if original: i_data = self.fillOriginal(i_data)
-
-        return [i_id, i_im_id, i_name, i_price, i_data]
+    def loadBatches(self, tableName, batches):
+        """Pass each batch of tuples produced by the given iterator to the driver"""
+        for tuples in batches:
+            self.handle.loadTuples(tableName, tuples)
     ## DEF
 
     ## ==============================================
-    ## generateWarehouse
+    ## slices
     ## ==============================================
-    def generateWarehouse(self, w_id):
-        w_tax = self.generateTax()
-        w_ytd = constants.INITIAL_W_YTD
-        w_address = self.generateAddress()
-        return [w_id] + w_address + [w_tax, w_ytd]
+    def slices(self, n):
+        """Splits the range [0, n) into slices of at most batch_size"""
+        for first in range(0, n, self.batch_size):
+            yield slice(first, min(first + self.batch_size, n))
     ## DEF
 
     ## ==============================================
-    ## generateDistrict
+    ## orderLineSlices
     ## ==============================================
-    def generateDistrict(self, d_w_id, d_id, d_next_o_id):
-        d_tax = self.generateTax()
-        d_ytd = constants.INITIAL_D_YTD
-        d_address = self.generateAddress()
-        return [d_id, d_w_id] + d_address + [d_tax, d_ytd, d_next_o_id]
+    def orderLineSlices(self, o_ol_cnts):
+        """Splits the orders into slices that have at most batch_size order lines"""
+        first = 0
+        lines = 0
+        for i, o_ol_cnt in enumerate(o_ol_cnts):
+            if lines + o_ol_cnt > self.batch_size:
+                yield slice(first, i)
+                first = i
+                lines = 0
+            lines += o_ol_cnt
+        ## FOR
+        if first < len(o_ol_cnts): yield slice(first, len(o_ol_cnts))
     ## DEF
 
     ## ==============================================
-    ## generateCustomer
+    ## generateItems
     ## ==============================================
-    def generateCustomer(self, c_w_id, c_d_id, c_id, badCredit, doesReplicateName):
-        c_first = rand.astring(constants.MIN_FIRST, constants.MAX_FIRST)
-        c_middle = constants.MIDDLE
+    def generateItems(self, rng, i_ids, originalRows):
+        n = len(i_ids)
+        i_im_ids = rng.numbers(n, constants.MIN_IM, constants.MAX_IM)
+        i_names = rng.astrings(n, constants.MIN_I_NAME, constants.MAX_I_NAME)
+        i_prices = rng.fixedPoints(n, constants.MONEY_DECIMALS, constants.MIN_PRICE, constants.MAX_PRICE)
+        i_datas = rng.astrings(n, constants.MIN_I_DATA, constants.MAX_I_DATA)
+        rng.embed(i_datas, [ i_id in originalRows for i_id in i_ids ], constants.ORIGINAL_STRING)
+        
+        return [ list(row) for row in zip(i_ids, i_im_ids, i_names, i_prices, i_datas) ]
+    ## DEF
 
-        assert 1 <= c_id and c_id <= constants.CUSTOMERS_PER_DISTRICT
-        if c_id <= 1000:
-            c_last = rand.makeLastName(c_id - 1)
-        else:
-            c_last = rand.makeRandomLastName(constants.CUSTOMERS_PER_DISTRICT)
-
-        c_phone = rand.nstring(constants.PHONE, constants.PHONE)
-        c_since = datetime.now()
-        c_credit = constants.BAD_CREDIT if badCredit else constants.GOOD_CREDIT
-        c_credit_lim = constants.INITIAL_CREDIT_LIM
-        c_discount = rand.fixedPoint(constants.DISCOUNT_DECIMALS, constants.MIN_DISCOUNT, constants.MAX_DISCOUNT)
-        c_balance = constants.INITIAL_BALANCE
-        c_ytd_payment = constants.INITIAL_YTD_PAYMENT
-        c_payment_cnt = constants.INITIAL_PAYMENT_CNT
-        c_delivery_cnt = constants.INITIAL_DELIVERY_CNT
-        c_data = rand.astring(constants.MIN_C_DATA, constants.MAX_C_DATA)
-
-        c_street1 = rand.astring(constants.MIN_STREET, constants.MAX_STREET)
-        c_street2 = rand.astring(constants.MIN_STREET, constants.MAX_STREET)
-        c_city = rand.astring(constants.MIN_CITY, constants.MAX_CITY)
-        c_state = rand.astring(constants.STATE, constants.STATE)
-        c_zip = self.generateZip()
-
-        return [ c_id, c_d_id, c_w_id, c_first, c_middle, c_last, \
-                c_street1, c_street2, c_city, c_state, c_zip, \
-                c_phone, c_since, c_credit, c_credit_lim, c_discount, c_balance, \
-                c_ytd_payment, c_payment_cnt, c_delivery_cnt, c_data ]
+    ## ==============================================
+    ## generateCustomers
+    ## ==============================================
+    def generateCustomers(self, rng, c_w_id, c_d_id, c_ids, badCredit):
+        n = len(c_ids)
+        c_firsts = rng.astrings(n, constants.MIN_FIRST, constants.MAX_FIRST)
+        c_lasts = rng.last_names_many(n, constants.CUSTOMERS_PER_DISTRICT)
+        c_lasts = [ rand.makeLastName(c_id - 1) if c_id <= 1000 else c_last for c_id, c_last in zip(c_ids, c_lasts) ]
+        c_phones = rng.nstrings(n, constants.PHONE, constants.PHONE)
+        c_since = self.timestamp
+        c_discounts = rng.fixedPoints(n, constants.DISCOUNT_DECIMALS, constants.MIN_DISCOUNT, constants.MAX_DISCOUNT)
+        c_datas = rng.astrings(n, constants.MIN_C_DATA, constants.MAX_C_DATA)
+        c_street1s = rng.astrings(n, constants.MIN_STREET, constants.MAX_STREET)
+        c_street2s = rng.astrings(n, constants.MIN_STREET, constants.MAX_STREET)
+        c_cities = rng.astrings(n, constants.MIN_CITY, constants.MAX_CITY)
+        c_states = rng.astrings(n, constants.STATE, constants.STATE)
+        c_zips = self.generateZips(rng, n)
+        
+        return [ [ c_id, c_d_id, c_w_id, c_first, constants.MIDDLE, c_last, \
+                   c_street1, c_street2, c_city, c_state, c_zip, \
+                   c_phone, c_since, constants.BAD_CREDIT if c_id in badCredit else constants.GOOD_CREDIT, \
+                   constants.INITIAL_CREDIT_LIM, c_discount, constants.INITIAL_BALANCE, \
+                   constants.INITIAL_YTD_PAYMENT, constants.INITIAL_PAYMENT_CNT, constants.INITIAL_DELIVERY_CNT, c_data ]
+                 for c_id, c_first, c_last, c_street1, c_street2, c_city, c_state, c_zip, c_phone, c_discount, c_data \
+                 in zip(c_ids, c_firsts, c_lasts, c_street1s, c_street2s, c_cities, c_states, c_zips, c_phones, c_discounts, c_datas) ]
     ## DEF
 
     ## ==============================================
-    ## generateOrder
+    ## generateOrders
     ## ==============================================
-    def generateOrder(self, o_w_id, o_d_id, o_id, o_c_id, o_ol_cnt, newOrder):
-        """Returns the generated o_ol_cnt value."""
-        o_entry_d = datetime.now()
-        o_carrier_id = constants.NULL_CARRIER_ID if newOrder else rand.number(constants.MIN_CARRIER_ID, constants.MAX_CARRIER_ID)
-        o_all_local = constants.INITIAL_ALL_LOCAL
-        return [ o_id, o_c_id, o_d_id, o_w_id, o_entry_d, o_carrier_id, o_ol_cnt, o_all_local ]
+    def generateOrders(self, rng, o_w_id, o_d_id, o_ids, o_c_ids, o_ol_cnts, newOrders):
+        o_entry_d = self.timestamp
+        o_carrier_ids = rng.numbers(len(o_ids), constants.MIN_CARRIER_ID, constants.MAX_CARRIER_ID)
+        return [ [ o_id, o_c_id, o_d_id, o_w_id, o_entry_d, constants.NULL_CARRIER_ID if newOrder else o_carrier_id, o_ol_cnt, constants.INITIAL_ALL_LOCAL ] \
+                 for o_id, o_c_id, o_ol_cnt, newOrder, o_carrier_id in zip(o_ids, o_c_ids, o_ol_cnts, newOrders, o_carrier_ids) ]
     ## DEF
 
     ## ==============================================
-    ## generateOrderLine
+    ## generateOrderLines
     ## ==============================================
-    def generateOrderLine(self, ol_w_id, ol_d_id, ol_o_id, ol_number, max_items, newOrder):
-        ol_i_id = rand.number(1, max_items)
-        ol_supply_w_id = ol_w_id
-        ol_delivery_d = datetime.now()
-        ol_quantity = constants.INITIAL_QUANTITY
-
-        if newOrder == False:
-            ol_amount = 0.00
-        else:
-            ol_amount = rand.fixedPoint(constants.MONEY_DECIMALS, constants.MIN_AMOUNT, constants.MAX_PRICE * constants.MAX_OL_QUANTITY)
-            ol_delivery_d = None
-        ol_dist_info = rand.astring(constants.DIST, constants.DIST)
+    def generateOrderLines(self, rng, ol_w_id, ol_d_id, o_ids, o_ol_cnts, newOrders):
+        ## Expand the per-order values into one entry per order line
+        ol_o_ids = [ ]
+        ol_numbers = [ ]
+        ol_new = [ ]
+        for o_id, o_ol_cnt, newOrder in zip(o_ids, o_ol_cnts, newOrders):
+            ol_o_ids.extend([ o_id ] * o_ol_cnt)
+            ol_numbers.extend(range(0, o_ol_cnt))
+            ol_new.extend([ newOrder ] * o_ol_cnt)
+        ## FOR
+        
+        n = len(ol_o_ids)
+        ol_i_ids = rng.numbers(n, 1, self.scaleParameters.items)
+        ol_delivery_d = self.timestamp
+        ol_amounts = rng.fixedPoints(n, constants.MONEY_DECIMALS, constants.MIN_AMOUNT, constants.MAX_PRICE * constants.MAX_OL_QUANTITY)
+        ol_dist_infos = rng.astrings(n, constants.DIST, constants.DIST)
+        
+        return [ [ ol_o_id, ol_d_id, ol_w_id, ol_number, ol_i_id, ol_w_id, None if newOrder else ol_delivery_d, \
+                   constants.INITIAL_QUANTITY, ol_amount if newOrder else 0.00, ol_dist_info ] \
+                 for ol_o_id, ol_number, ol_i_id, newOrder, ol_amount, ol_dist_info \
+                 in zip(ol_o_ids, ol_numbers, ol_i_ids, ol_new, ol_amounts, ol_dist_infos) ]
+    ## DEF
 
-        return [ ol_o_id, ol_d_id, ol_w_id, ol_number, ol_i_id, ol_supply_w_id, ol_delivery_d, ol_quantity, ol_amount, ol_dist_info ]
+    ## ==============================================
+    ## generateStocks
+    ## ==============================================
+    def generateStocks(self, rng, s_w_id, i_ids, originalRows):
+        n = len(i_ids)
+        s_quantities = rng.numbers(n, constants.MIN_QUANTITY, constants.MAX_QUANTITY)
+        s_datas = rng.astrings(n, constants.MIN_I_DATA, constants.MAX_I_DATA)
+        rng.embed(s_datas, [ i_id in originalRows for i_id in i_ids ], constants.ORIGINAL_STRING)
+        s_dists = zip(*[ rng.astrings(n, constants.DIST, constants.DIST) for i in range(0, constants.DISTRICTS_PER_WAREHOUSE) ])
+        
+        return [ [ s_i_id, s_w_id, s_quantity ] + list(s_dist) + [ 0, 0, 0, s_data ] \
+                 for s_i_id, s_quantity, s_dist, s_data in zip(i_ids, s_quantities, s_dists, s_datas) ]
     ## DEF
 
     ## ==============================================
-    ## generateStock
+    ## generateHistories
     ## ==============================================
-    def generateStock(self, s_w_id, s_i_id, original):
-        s_quantity = rand.number(constants.MIN_QUANTITY, constants.MAX_QUANTITY);
-        s_ytd = 0;
-        s_order_cnt = 0;
-        s_remote_cnt = 0;
+    def generateHistories(self, rng, h_c_w_id, h_c_d_id, h_c_ids):
+        h_date = self.timestamp
+        h_datas = rng.astrings(len(h_c_ids), constants.MIN_DATA, constants.MAX_DATA)
+        return [ [ h_c_id, h_c_d_id, h_c_w_id, h_c_d_id, h_c_w_id, h_date, constants.INITIAL_AMOUNT, h_data ] \
+                 for h_c_id, h_data in zip(h_c_ids, h_datas) ]
+    ## DEF
 
-        s_data = rand.astring(constants.MIN_I_DATA, constants.MAX_I_DATA);
-        if original: self.fillOriginal(s_data)
+    ## ==============================================
+    ## generateZips
+    ## ==============================================
+    def generateZips(self, rng, n):
+        length = constants.ZIP_LENGTH - len(constants.ZIP_SUFFIX)
+        return [ z + constants.ZIP_SUFFIX for z in rng.nstrings(n, length, length) ]
+    ## DEF
 
-        s_dists = [ ]
-        for i in range(0, constants.DISTRICTS_PER_WAREHOUSE):
-            s_dists.append(rand.astring(constants.DIST, constants.DIST))
-        
-        return [ s_i_id, s_w_id, s_quantity ] + \
-               s_dists + \
-               [ s_ytd, s_order_cnt, s_remote_cnt, s_data ]
+    ## ==============================================
+    ## generateWarehouse
+    ## ==============================================
+    def generateWarehouse(self, rng, w_id):
+        w_tax = self.generateTax(rng)
+        w_ytd = constants.INITIAL_W_YTD
+        w_address = self.generateAddress(rng)
+        return [w_id] + w_address + [w_tax, w_ytd]
     ## DEF
 
     ## ==============================================
-    ## generateHistory
+    ## generateDistrict
     ## ==============================================
-    def generateHistory(self, h_c_w_id, h_c_d_id, h_c_id):
-        h_w_id = h_c_w_id
-        h_d_id = h_c_d_id
-        h_date = datetime.now()
-        h_amount = constants.INITIAL_AMOUNT
-        h_data = rand.astring(constants.MIN_DATA, constants.MAX_DATA)
-        return [ h_c_id, h_c_d_id, h_c_w_id, h_d_id, h_w_id, h_date, h_amount, h_data ]
+    def generateDistrict(self, rng, d_w_id, d_id, d_next_o_id):
+        d_tax = self.generateTax(rng)
+        d_ytd = constants.INITIAL_D_YTD
+        d_address = self.generateAddress(rng)
+        return [d_id, d_w_id] + d_address + [d_tax, d_ytd, d_next_o_id]
     ## DEF
 
     ## ==============================================
     ## generateAddress
     ## ==============================================
-    def generateAddress(self):
+    def generateAddress(self, rng):
         """
             Returns a name and a street address 
             Used by both generateWarehouse and generateDistrict.
         """
-        name = rand.astring(constants.MIN_NAME, constants.MAX_NAME)
-        return [ name ] + self.generateStreetAddress()
+        name = rng.astrings(1, constants.MIN_NAME, constants.MAX_NAME)[0]
+        return [ name ] + self.generateStreetAddress(rng)
     ## DEF
 
     ## ==============================================
     ## generateStreetAddress
     ## ==============================================
-    def generateStreetAddress(self):
+    def generateStreetAddress(self, rng):
         """
             Returns a list for a street address
-            Used for warehouses, districts and customers.
+            Used for warehouses and districts.
         """
-        street1 = rand.astring(constants.MIN_STREET, constants.MAX_STREET)
-        street2 = rand.astring(constants.MIN_STREET, constants.MAX_STREET)
-        city = rand.astring(constants.MIN_CITY, constants.MAX_CITY)
-        state = rand.astring(constants.STATE, constants.STATE)
-        zip = self.generateZip()
+        street1, street2 = rng.astrings(2, constants.MIN_STREET, constants.MAX_STREET)
+        city = rng.astrings(1, constants.MIN_CITY, constants.MAX_CITY)[0]
+        state = rng.astrings(1, constants.STATE, constants.STATE)[0]
+        zip = self.generateZips(rng, 1)[0]
 
         return [ street1, street2, city, state, zip ]
     ## DEF
@@ -341,29 +457,7 @@ class Loader:
     ## ==============================================
     ## generateTax
     ## ==============================================
-    def generateTax(self):
-        return rand.fixedPoint(constants.TAX_DECIMALS, constants.MIN_TAX, constants.MAX_TAX)
-    ## DEF
-
-    ## ==============================================
-    ## generateZip
-    ## ==============================================
-    def generateZip(self):
-        length = constants.ZIP_LENGTH - len(constants.ZIP_SUFFIX)
-        return rand.nstring(length, length) + constants.ZIP_SUFFIX
-    ## DEF
-
-    ## ==============================================
-    ## fillOriginal
-    ## ==============================================
-    def fillOriginal(self, data):
-        """
-            a string with ORIGINAL_STRING at a random position
-        """
-        originalLength = len(constants.ORIGINAL_STRING)
-        position = rand.number(0, len(data) - originalLength)
-        out = data[:position] + constants.ORIGINAL_STRING + data[position + originalLength:]
-        assert len(out) == len(data)
-        return out
+    def generateTax(self, rng):
+        return rng.fixedPoints(1, constants.TAX_DECIMALS, constants.MIN_TAX, constants.MAX_TAX)[0]
     ## DEF
 ## CLASS
\ No newline at end of file
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import time
+import logging
+from datetime import datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import constants
+from util import *
+
+## ==============================================
+## ParameterStream
+## ==============================================
+class ParameterStream:
+    """
+        The transactions and parameters of an Executor, generated in batches
+        before they are needed so that the timed loop only has to take the
+        next one. With NumPy a whole batch is generated column by column, with
+        the same distributions as the Executor's generate*Params functions;
+        without it the batch is made by calling them. If the run uses up a
+        batch, the next one is generated when it is needed.
+    """
+
+    def __init__(self, executor, batchSize, seed=None, vectorized=None):
+        assert batchSize > 0
+        if vectorized is None: vectorized = columns.HAVE_NUMPY
+        self.executor = executor
+        self.scaleParameters = executor.scaleParameters
+        self.batchSize = batchSize
+        self.generator = columns.ColumnGenerator(seed) if vectorized else None
+        self.batches = 0
+        self.batch = [ ]
+        self.position = 0
+
+        self.txns = [ t[1] for t in executor.txn_select ]
+        self.bounds = [ t[0] for t in executor.txn_select ]
+        self.generators = {
+            constants.TransactionTypes.STOCK_LEVEL: self.generateStockLevelParams,
+            constants.TransactionTypes.DELIVERY: self.generateDeliveryParams,
+            constants.TransactionTypes.ORDER_STATUS: self.generateOrderStatusParams,
+            constants.TransactionTypes.PAYMENT: self.generatePaymentParams,
+            constants.TransactionTypes.NEW_ORDER: self.generateNewOrderParams
+        }
+        self.fill()
+    ## DEF
+
+    def next(self):
+        """Returns the next (txn, params)"""
+        if self.position == len(self.batch):
+            if self.batches == 1: logging.warn("Ran out of pre-generated transaction parameters, generating more during the run")
+            self.fill()
+        txn, params = self.batch[self.position]
+        self.batch[self.position] = None
+        self.position += 1
+        
+        ## The time is when the transaction runs, not when it was generated
+        if txn in constants.TIMESTAMP_PARAMS: params[constants.TIMESTAMP_PARAMS[txn]] = datetime.now()
+        return (txn, params)
+    ## DEF
+
+    def fill(self):
+        start = time.time()
+        if self.generator:
+            self.batch = self.generateBatch(self.batchSize)
+        else:
+            self.batch = [ self.executor.selectTransaction() for i in range(self.batchSize) ]
+        self.position = 0
+        self.batches += 1
+        logging.debug("Generated %d transaction parameters in %.2f sec" % (self.batchSize, time.time() - start))
+    ## DEF
+
+    ## ----------------------------------------------
+    ## generateBatch
+    ## ----------------------------------------------
+    def generateBatch(self, n):
+        """Choose n transactions from the mix and generate the parameters of each type together"""
+        rng = self.generator.rng
+        choices = numpy.searchsorted(self.bounds, rng.integers(0, self.bounds[-1], size=n), side="right")
+        batch = [ None ] * n
+        for i, txn in enumerate(self.txns):
+            positions = numpy.flatnonzero(choices == i).tolist()
+            if not positions: continue
+            for position, params in zip(positions, self.generators[txn](len(positions))):
+                batch[position] = (txn, params)
+        ## FOR
+        return batch
+    ## DEF
+
+    ## ----------------------------------------------
+    ## generateDeliveryParams
+    ## ----------------------------------------------
+    def generateDeliveryParams(self, n):
+        w_ids = self.makeWarehouseIds(n).tolist()
+        o_carrier_ids = self.generator.numbers(n, constants.MIN_CARRIER_ID, constants.MAX_CARRIER_ID)
+        return [ { "w_id": w_ids[i], "o_carrier_id": o_carrier_ids[i], "ol_delivery_d": None } for i in range(n) ]
+    ## DEF
+
+    ## ----------------------------------------------
+    ## generateNewOrderParams
+    ## ----------------------------------------------
+    def generateNewOrderParams(self, n):
+        rng = self.generator.rng
+        w_ids = self.makeWarehouseIds(n)
+        d_ids = self.makeDistrictIds(n).tolist()
+        c_ids = self.makeCustomerIds(n)
+        ol_cnts = rng.integers(constants.MIN_OL_CNT, constants.MAX_OL_CNT, size=n, endpoint=True)
+
+        ## All of the order lines are generated together and then cut up
+        lines = int(ol_cnts.sum())
+        i_ids = self.generator.nurand_many(lines, 8191, 1, self.scaleParameters.items)
+
+        ## 1% of items are from a remote warehouse
+        i_w_ids = numpy.repeat(w_ids, ol_cnts)
+        if self.scaleParameters.warehouses > 1:
+            remote = rng.integers(1, 100, size=lines, endpoint=True) == 1
+            i_w_ids[remote] = self.makeOtherWarehouseIds(i_w_ids[remote])
+        i_w_ids = i_w_ids.tolist()
+        i_qtys = self.generator.numbers(lines, 1, constants.MAX_OL_QUANTITY)
+
+        w_ids = w_ids.tolist()
+        ends = numpy.cumsum(ol_cnts).tolist()
+        starts = [ 0 ] + ends[:-1]
+        return [ { "w_id": w_ids[i], "d_id": d_ids[i], "c_id": c_ids[i], "o_entry_d": None,
+                   "i_ids": i_ids[starts[i]:ends[i]], "i_w_ids": i_w_ids[starts[i]:ends[i]], "i_qtys": i_qtys[starts[i]:ends[i]] } for i in range(n) ]
+    ## DEF
+
+    ## ----------------------------------------------
+    ## generateOrderStatusParams
+    ## ----------------------------------------------
+    def generateOrderStatusParams(self, n):
+        w_ids = self.makeWarehouseIds(n).tolist()
+        d_ids = self.makeDistrictIds(n).tolist()
+        
+        ## 60%: order status by last name, 40%: order status by id
+        byName = (self.generator.rng.integers(1, 100, size=n, endpoint=True) <= 60).tolist()
+        c_lasts = self.generator.last_names_many(n, self.scaleParameters.customersPerDistrict)
+        c_ids = self.makeCustomerIds(n)
+        return [ { "w_id": w_ids[i], "d_id": d_ids[i], "c_id": None if byName[i] else c_ids[i], "c_last": c_lasts[i] if byName[i] else None } for i in range(n) ]
+    ## DEF
+
+    ## ----------------------------------------------
+    ## generatePaymentParams
+    ## ----------------------------------------------
+    def generatePaymentParams(self, n):
+        rng = self.generator.rng
+        x = rng.integers(1, 100, size=n, endpoint=True)
+        y = rng.integers(1, 100, size=n, endpoint=True)
+        
+        w_ids = self.makeWarehouseIds(n)
+        d_ids = self.makeDistrictIds(n)
+        h_amounts = self.generator.fixedPoints(n, 2, constants.MIN_PAYMENT, constants.MAX_PAYMENT)
+
+        ## 85%: paying through own warehouse (or there is only 1 warehouse)
+        ## 15%: paying through another warehouse
+        c_w_ids = w_ids.copy()
+        c_d_ids = d_ids.copy()
+        if self.scaleParameters.warehouses > 1:
+            remote = x > 85
+            c_w_ids[remote] = self.makeOtherWarehouseIds(w_ids[remote])
+            c_d_ids[remote] = self.makeDistrictIds(int(remote.sum()))
+        ## IF
+
+        ## 60%: payment by last name, 40%: payment by id
+        byName = (y <= 60).tolist()
+        c_lasts = self.generator.last_names_many(n, self.scaleParameters.customersPerDistrict)
+        c_ids = self.makeCustomerIds(n)
+
+        w_ids, d_ids, c_w_ids, c_d_ids = w_ids.tolist(), d_ids.tolist(), c_w_ids.tolist(), c_d_ids.tolist()
+        return [ { "w_id": w_ids[i], "d_id": d_ids[i], "h_amount": h_amounts[i], "c_w_id": c_w_ids[i], "c_d_id": c_d_ids[i],
+                   "c_id": None if byName[i] else c_ids[i], "c_last": c_lasts[i] if byName[i] else None, "h_date": None } for i in range(n) ]
+    ## DEF
+
+    ## ----------------------------------------------
+    ## generateStockLevelParams
+    ## ----------------------------------------------
+    def generateStockLevelParams(self, n):
+        w_ids = self.makeWarehouseIds(n).tolist()
+        d_ids = self.makeDistrictIds(n).tolist()
+        thresholds = self.generator.numbers(n, constants.MIN_STOCK_LEVEL_THRESHOLD, constants.MAX_STOCK_LEVEL_THRESHOLD)
+        return [ { "w_id": w_ids[i], "d_id": d_ids[i], "threshold": thresholds[i] } for i in range(n) ]
+    ## DEF
+
+    def makeWarehouseIds(self, n):
+        return self.generator.rng.integers(self.scaleParameters.starting_warehouse, self.scaleParameters.ending_warehouse, size=n, endpoint=True)
+    ## DEF
+
+    def makeOtherWarehouseIds(self, w_ids):
+        """A random warehouse for each of w_ids that is not that warehouse"""
+        others = self.generator.rng.integers(self.scaleParameters.starting_warehouse, self.scaleParameters.ending_warehouse - 1, size=len(w_ids), endpoint=True)
+        return others + (others >= w_ids)
+    ## DEF
+
+    def makeDistrictIds(self, n):
+        return self.generator.rng.integers(1, self.scaleParameters.districtsPerWarehouse, size=n, endpoint=True)
+    ## DEF
+
+    def makeCustomerIds(self, n):
+        return self.generator.nurand_many(n, 1023, 1, self.scaleParameters.customersPerDistrict)
+    ## DEF
+## CLASS
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import os
+import time
+import queue
+import logging
+import traceback
+import multiprocessing
+
+from . import loader
+from util import loadstats
+
+## The number of messages that each generator may get ahead of the writer
+QUEUE_SIZE = 16
+
+## Messages that are not driver callbacks
+DONE = "__done__"
+ERROR = "__error__"
+
+## The callbacks that end a unit (the ITEM table or one warehouse)
+UNIT_BOUNDARIES = ("loadFinishItem", "loadFinishWarehouse")
+
+## ==============================================
+## generatorFunc
+## ==============================================
+def generatorFunc(tasks, output, scaleParameters, options):
+    """Loads the units from the tasks queue with a Loader whose driver calls are all put on the output queue"""
+    handle = QueueHandle(output)
+    start = time.time()
+    idle = 0.0
+    try:
+        l = loader.Loader(handle, scaleParameters, [ ], False, **options)
+        while True:
+            idle_start = time.time()
+            unit = tasks.get()
+            idle += time.time() - idle_start
+            if unit is None: break
+            l.loadUnit(unit)
+        ## WHILE
+    except (Exception, KeyboardInterrupt):
+        output.put((ERROR, traceback.format_exc()))
+        return
+    stats = { "rows": handle.rows, "time": time.time() - start - idle, "waitTime": handle.waitTime }
+    if l.stats: stats["load"] = l.stats.data()
+    output.put((DONE, stats))
+## DEF
+
+## ==============================================
+## QueueHandle
+## ==============================================
+class QueueHandle:
+    """
+        The driver handle of a generator process. Every call is put on the
+        generator's queue for the writer to apply to the real driver. The
+        queue is bounded, so a generator blocks once it is far enough ahead.
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.parent = os.getppid()
+        self.rows = 0
+        self.waitTime = 0.0
+    ## DEF
+
+    def __getattr__(self, name):
+        if name.startswith("__"): raise AttributeError(name)
+        return lambda *args: self.put((name, args))
+    ## DEF
+
+    def loadTuples(self, tableName, tuples):
+        self.rows += len(tuples)
+        self.put(("loadTuples", (tableName, tuples)))
+    ## DEF
+
+    def put(self, message):
+        start = time.time()
+        while True:
+            try:
+                self.output.put(message, timeout=1.0)
+                break
+            except queue.Full:
+                ## Don't block forever if the writer was killed
+                if os.getppid() != self.parent:
+                    self.output.cancel_join_thread()
+                    raise SystemExit(1)
+        ## WHILE
+        self.waitTime += time.time() - start
+    ## DEF
+## CLASS
+
+## ==============================================
+## PipelinedLoader
+## ==============================================
+class PipelinedLoader(loader.Loader):
+    """
+        Generates the data in separate processes while this process writes
+        it to the driver, so that generation and insertion overlap. Each
+        generator has its own bounded queue and the writer applies one whole
+        unit (the ITEM table or one warehouse) from a queue at a time, so the
+        driver sees exactly the same calls as it would from a Loader. The
+        writer hands out the units as the generators finish them.
+    """
+
+    def __init__(self, handle, scaleParameters, w_ids, needLoadItems, workers=2, queueSize=QUEUE_SIZE, **kwargs):
+        loader.Loader.__init__(self, handle, scaleParameters, w_ids, needLoadItems, **kwargs)
+        assert workers > 0
+        self.workers = workers
+        self.queueSize = queueSize
+
+        ## Writer stage statistics
+        self.rows = 0
+        self.writeTime = 0.0
+        self.waitTime = 0.0
+
+        ## The time between driver calls is spent waiting for the generators,
+        ## so the generation times come from the generators' own stats
+        if self.stats: self.handle.generating = False
+    ## DEF
+
+    ## ==============================================
+    ## execute
+    ## ==============================================
+    def execute(self):
+        options = {
+            "vectorized": self.vectorized,
+            "cache": self.cache,
+            "seed": self.seed,
+            "timestamp": self.timestamp,
+            "stats": loadstats.LoadStats() if self.stats else None,
+        }
+
+        self.pending = self.remaining()
+        self.tasks = [ ]
+        self.queues = [ ]
+        self.processes = [ ]
+        for i in range(self.workers):
+            tasks = multiprocessing.Queue()
+            q = multiprocessing.Queue(self.queueSize)
+            p = multiprocessing.Process(target=generatorFunc, args=(tasks, q, self.scaleParameters, options))
+            p.start()
+            self.tasks.append(tasks)
+            self.queues.append(q)
+            self.processes.append(p)
+        ## FOR
+        logging.debug("Started %d generator processes" % self.workers)
+
+        start = time.time()
+        try:
+            stats = self.drain()
+        finally:
+            for p in self.processes:
+                if p.is_alive(): p.terminate()
+                p.join()
+        ## TRY
+        self.showStats(stats, time.time() - start)
+        if self.stats:
+            for s in stats: self.stats.addGenerateTime(s["load"])
+
+        return (None)
+    ## DEF
+
+    ## ==============================================
+    ## assign
+    ## ==============================================
+    def assign(self, i):
+        """Hand the next unit to generator i, or tell it to stop if there are none left"""
+        if self.closed[i]: return
+        unit = next(self.pending, None)
+        if unit is None:
+            self.tasks[i].put(None)
+            self.closed[i] = True
+        else:
+            self.tasks[i].put(unit)
+            self.inflight[i] += 1
+    ## DEF
+
+    ## ==============================================
+    ## drain
+    ## ==============================================
+    def drain(self):
+        """Apply one unit from each generator in turn until they are all done"""
+        self.inflight = [ 0 ] * self.workers
+        self.closed = [ False ] * self.workers
+        ## Each generator only gets one unit at a time, so units stay on the
+        ## shared work queue for other loaders until there is capacity for them
+        for i in range(self.workers):
+            self.assign(i)
+        
+        stats = [ ]
+        active = list(range(self.workers))
+        while active:
+            for i in list(active):
+                ## Once a generator has nothing left it only sends its statistics
+                if self.inflight[i] == 0:
+                    name, args = self.next(self.queues[i], self.processes[i])
+                    if name == ERROR:
+                        raise RuntimeError("Generator process %d failed:\n%s" % (self.processes[i].pid, args))
+                    assert name == DONE, "Unexpected %s call from generator process %d" % (name, self.processes[i].pid)
+                    stats.append(args)
+                    active.remove(i)
+                    continue
+                ## IF
+                
+                while True:
+                    name, args = self.next(self.queues[i], self.processes[i])
+                    if name == ERROR:
+                        raise RuntimeError("Generator process %d failed:\n%s" % (self.processes[i].pid, args))
+
+                    start = time.time()
+                    getattr(self.handle, name)(*args)
+                    self.writeTime += time.time() - start
+                    if name == "loadTuples": self.rows += len(args[1])
+                    if name in UNIT_BOUNDARIES: break
+                ## WHILE
+                self.inflight[i] -= 1
+                self.assign(i)
+            ## FOR
+        ## WHILE
+        return (stats)
+    ## DEF
+
+    def next(self, source, process):
+        """Returns the next message from a generator, failing if it died without sending one"""
+        start = time.time()
+        try:
+            while True:
+                try:
+                    return source.get(timeout=1.0)
+                except queue.Empty:
+                    if not process.is_alive(): break
+            ## WHILE
+
+            ## Anything the generator sent before it exited is already in the pipe
+            try:
+                return source.get(timeout=1.0)
+            except queue.Empty:
+                raise RuntimeError("Generator process %d exited with code %s" % (process.pid, process.exitcode))
+        finally:
+            self.waitTime += time.time() - start
+    ## DEF
+
+    ## ==============================================
+    ## showStats
+    ## ==============================================
+    def showStats(self, stats, duration):
+        gen_rows = sum([ s["rows"] for s in stats ])
+        gen_busy = sum([ s["time"] - s["waitTime"] for s in stats ])
+        gen_time = sum([ s["time"] for s in stats ])
+        if duration <= 0 or gen_time <= 0: return
+
+        logging.info("Generate stage: %d processes, %d rows, %.0f rows/sec per process, %.0f%% blocked on full queues" % \
+                     (len(stats), gen_rows, gen_rows / max(gen_busy, 1e-6) / len(stats), 100.0 * (gen_time - gen_busy) / gen_time))
+        logging.info("Write stage: %d rows, %.0f rows/sec while writing, %.0f%% idle waiting for generators" % \
+                     (self.rows, self.rows / max(self.writeTime, 1e-6), 100.0 * self.waitTime / duration))
+        logging.info("Pipeline: %d rows in %.1f sec (%.0f rows/sec), the bottleneck is the %s stage" % \
+                     (self.rows, duration, self.rows / duration, "generate" if self.waitTime / duration > (gen_time - gen_busy) / gen_time else "write"))
+    ## DEF
+## CLASS
@@ -35,7 +35,13 @@ import re
 import argparse
 import glob
 import time
+import queue
+import inspect
+import functools
+import random
+import traceback
 import multiprocessing
+import concurrent.futures
 from configparser import ConfigParser
 from pprint import pprint,pformat
 
@@ -70,39 +76,88 @@ def getDrivers():
     return (drivers)
 ## DEF
 
+## ==============================================
+## createLoader
+## ==============================================
+def createLoader(driver, scaleParameters, args, w_ids, needLoadItems, cache, timestamp, manifest, stats):
+    options = { "vectorized": args['generator'] == columns.NUMPY, "cache": cache, "seed": args['seed'], "timestamp": timestamp,
+                "manifest": manifest, "stats": stats }
+    if args['load_workers'] > 0:
+        return pipeline.PipelinedLoader(driver, scaleParameters, w_ids, needLoadItems, workers=args['load_workers'], **options)
+    return loader.Loader(driver, scaleParameters, w_ids, needLoadItems, **options)
+## DEF
+
 ## ==============================================
 ## startLoading
 ## ==============================================
-def startLoading(driverClass, scaleParameters, args, config):
+def startLoading(driverClass, scaleParameters, args, config, cache, timestamp, manifest, stats):
+    ## The loaders are not daemonic processes, so they can fork generator
+    ## processes for --load-workers
     logging.debug("Creating client pool with %d processes" % args['clients'])
-    pool = multiprocessing.Pool(args['clients'])
+    pool = concurrent.futures.ProcessPoolExecutor(args['clients'])
     debug = logging.getLogger().isEnabledFor(logging.DEBUG)
     
-    # Split the warehouses into chunks
-    w_ids = map(lambda x: [ ], range(args['clients']))
+    # Put the ITEM table and every warehouse on a shared work queue that
+    # the loaders pull from until it is empty
+    manager = multiprocessing.Manager()
+    units = manager.Queue()
+    if not args['add_warehouses']: units.put(datacache.ITEMS)
     for w_id in range(scaleParameters.starting_warehouse, scaleParameters.ending_warehouse+1):
-        idx = w_id % args['clients']
-        w_ids[idx].append(w_id)
+        units.put(w_id)
     ## FOR
     
+    # remove non-serializable arguments
+    loader_args = args.copy()
+    if 'json_output' in loader_args:
+        del loader_args['json_output']
+    if 'config' in loader_args:
+        del loader_args['config']
+
     loader_results = [ ]
     for i in range(args['clients']):
-        r = pool.apply_async(loaderFunc, (driverClass, scaleParameters, args, config, w_ids[i], True))
+        r = pool.submit(loaderFunc, driverClass, scaleParameters, loader_args, config, units, cache, timestamp, manifest, True)
         loader_results.append(r)
     ## FOR
     
-    pool.close()
     logging.debug("Waiting for %d loaders to finish" % args['clients'])
-    pool.join()
+    pool.shutdown(wait=True)
+    manager.shutdown()
+    
+    times = [ ]
+    for r in loader_results:
+        r = r.result()
+        if r == -1: sys.exit(1)
+        w_ids = [ unit for unit in r['units'] if unit != datacache.ITEMS ]
+        logging.info("Loader %d: %d warehouses%s in %.1f sec" % \
+                     (r['pid'], len(w_ids), " and ITEM" if len(w_ids) < len(r['units']) else "", r['time']))
+        times.append(r['time'])
+        stats.add(r['stats'])
+    ## FOR
+    logging.info("Loader times: fastest %.1f sec, slowest %.1f sec" % (min(times), max(times)))
+## DEF
+
+## ==============================================
+## pullUnits
+## ==============================================
+def pullUnits(units, loaded):
+    """Yields units from the shared work queue until it is empty and records each one in loaded"""
+    while True:
+        try:
+            unit = units.get_nowait()
+        except queue.Empty:
+            return
+        loaded.append(unit)
+        yield unit
+    ## WHILE
 ## DEF
 
 ## ==============================================
 ## loaderFunc
 ## ==============================================
-def loaderFunc(driverClass, scaleParameters, args, config, w_ids, debug):
+def loaderFunc(driverClass, scaleParameters, args, config, units, cache, timestamp, manifest, debug):
     driver = driverClass(args['ddl'])
     assert driver != None
-    logging.debug("Starting client execution: %s [warehouses=%d]" % (driver, len(w_ids)))
+    logging.debug("Starting client execution: %s" % driver)
     
     config['load'] = True
     config['execute'] = False
@@ -110,8 +165,10 @@ def loaderFunc(driverClass, scaleParameters, args, config, w_ids, debug):
     driver.loadConfig(config)
    
     try:
-        loadItems = (1 in w_ids)
-        l = loader.Loader(driver, scaleParameters, w_ids, loadItems)
+        start = time.time()
+        loaded = [ ]
+        stats = loadstats.LoadStats()
+        l = createLoader(driver, scaleParameters, args, pullUnits(units, loaded), False, cache, timestamp, manifest, stats)
         driver.loadStart()
         l.execute()
         driver.loadFinish()   
@@ -122,7 +179,8 @@ def loaderFunc(driverClass, scaleParameters, args, config, w_ids, debug):
         #if debug:
         traceback.print_exc(file=sys.stdout)
         raise
-        
+    
+    return { "pid": os.getpid(), "units": loaded, "time": time.time() - start, "stats": stats.data() }
 ## DEF
 
 ## ==============================================
@@ -130,7 +188,7 @@ def loaderFunc(driverClass, scaleParameters, args, config, w_ids, debug):
 ## ==============================================
 def startExecution(driverClass, scaleParameters, args, config):
     logging.debug("Creating client pool with %d processes" % args['clients'])
-    pool = multiprocessing.Pool(args['clients'])
+    pool = multiprocessing.Pool(args['clients'], livemetrics.setChannel, (livemetrics.CHANNEL,))
     debug = logging.getLogger().isEnabledFor(logging.DEBUG)
     
     # remove non-serializable arguments
@@ -142,13 +200,13 @@ def startExecution(driverClass, scaleParameters, args, config):
 
     worker_results = [ ]
     for i in range(args['clients']):
-        r = pool.apply_async(executorFunc, (driverClass, scaleParameters, worker_args, config, debug,))
+        r = pool.apply_async(executorFunc, (driverClass, scaleParameters, worker_args, config, debug, i,))
         worker_results.append(r)
     ## FOR
     pool.close()
     pool.join()
     
-    total_results = results.Results()
+    total_results = results.Results(args['timing_details'], args['interval'])
     for asyncr in worker_results:
         asyncr.wait()
         r = asyncr.get()
@@ -163,21 +221,128 @@ def startExecution(driverClass, scaleParameters, args, config):
 ## ==============================================
 ## executorFunc
 ## ==============================================
-def executorFunc(driverClass, scaleParameters, args, config, debug):
-    driver = driverClass(args['ddl'])
-    assert driver != None
+def executorFunc(driverClass, scaleParameters, args, config, debug, client):
+    driver = createExecuteDriver(driverClass, args['ddl'], config)
     logging.debug("Starting client execution: %s" % driver)
+    return runClient(driverClass, driver, scaleParameters, args, config, client)
+## DEF
+
+## ==============================================
+## runClient
+## ==============================================
+def runClient(driverClass, driver, scaleParameters, args, config, client):
+    """
+        Run the executors of one client process. With --threads-per-client
+        each thread runs its own executor with its own driver connection,
+        and the given driver is not used.
+    """
+    threads = args['threads_per_client']
+    if threads == 1:
+        return runExecutor(driverClass, driver, scaleParameters, args, config, client)
     
+    logging.debug("Starting %d executor threads (GIL %s)" % (threads, "enabled" if getattr(sys, "_is_gil_enabled", lambda: True)() else "disabled"))
+    with concurrent.futures.ThreadPoolExecutor(threads, thread_name_prefix="client") as pool:
+        futures = [ pool.submit(threadFunc, driverClass, scaleParameters, args, config, client * threads + i) for i in range(threads) ]
+    total_results = results.Results(args['timing_details'], args['interval'])
+    for f in futures:
+        r = f.result()
+        if type(r) == int and r == -1: return -1
+        total_results.append(r)
+    ## FOR
+    return (total_results)
+## DEF
+
+def threadFunc(driverClass, scaleParameters, args, config, index):
+    driver = createExecuteDriver(driverClass, args['ddl'], config)
+    return runExecutor(driverClass, driver, scaleParameters, args, config, index)
+## DEF
+
+def createExecuteDriver(driverClass, ddl, config):
+    """A new driver connected for the execution phase"""
+    driver = driverClass(ddl)
+    assert driver != None
+    config = dict(config)
     config['execute'] = True
     config['reset'] = False
     driver.loadConfig(config)
+    return driver
+## DEF
 
-    e = executor.Executor(driver, scaleParameters, stop_on_error=args['stop_on_error'], weights=config['txn_weights'])
-    driver.executeStart()
-    results = e.execute(args['duration'], args['timing_details'])
-    driver.executeFinish()
+## ==============================================
+## runExecutor
+## ==============================================
+def runExecutor(driverClass, driver, scaleParameters, args, config, index):
+    """Run one executor's share of the workload on the given driver"""
+    replay = None
+    if args['replay_trace']:
+        replay = tracefile.TraceReader(args['replay_trace'], index, args['clients'] * args['threads_per_client'])
+    schedule = replay.schedule() if replay and args['replay_timing'] else createSchedule(args, index)
     
-    return results
+    asynchronous = args['terminals'] or inspect.iscoroutinefunction(driver.executeTransaction)
+    if asynchronous:
+        ## A blocking driver gets one instance per offload thread
+        factory = functools.partial(createExecuteDriver, driverClass, args['ddl'], config)
+        e = asyncexecutor.AsyncExecutor(driver, scaleParameters, args['terminals'] or 1, stop_on_error=args['stop_on_error'],
+                                        weights=config['txn_weights'], schedule=schedule,
+                                        driverFactory=factory, threads=args['offload_threads'])
+    else:
+        e = executor.Executor(driver, scaleParameters, stop_on_error=args['stop_on_error'], weights=config['txn_weights'],
+                              schedule=schedule)
+    createStream(e, args, index, replay)
+    e.interval = args['interval']
+    if args['timing_details'] or args['timing_file']:
+        e.events = eventlog.EventLog(args['timing_sample'], eventlog.partPath(args['timing_file'], index) if args['timing_file'] else None)
+    if livemetrics.CHANNEL is not None:
+        e.reporter = livemetrics.MetricsReporter(livemetrics.CHANNEL, index, args['interval'])
+    if args['record_trace']:
+        e.recorder = tracefile.TraceWriter(tracefile.partPath(args['record_trace'], index))
+    
+    ## The closed-loop executors (and their terminals) start one after the
+    ## other over the ramp-up, which is part of the warmup
+    executors = args['clients'] * args['threads_per_client']
+    warmup = args['warmup'] + args['ramp_up']
+    delay = float(args['ramp_up']) * index / executors
+    try:
+        if asynchronous:
+            step = float(args['ramp_up']) / executors / e.terminals
+            return e.execute(args['duration'], args['timing_details'], warmup, args['cooldown'], delay, step)
+        driver.executeStart()
+        results = e.execute(args['duration'], args['timing_details'], warmup, args['cooldown'], delay)
+        driver.executeFinish()
+        return results
+    finally:
+        if e.recorder: e.recorder.close()
+        if e.events is not None: e.events.close()
+        if e.reporter: e.reporter.close()
+## DEF
+
+def createStream(e, args, index, replay):
+    """Take the executor's transactions from the replayed trace, or generate them ahead of the run if --pregenerate is set"""
+    if replay:
+        logging.info("Replaying %d transactions from %s" % (len(replay.records), replay.path))
+        e.stream = replay
+        return
+    if not args['pregenerate']: return
+    start = time.time()
+    e.stream = paramstream.ParameterStream(e, args['pregenerate'], rand.streamSeed(args['seed'], "parameters", index))
+    logging.info("Pre-generated %d transaction parameters in %.2f sec" % (args['pregenerate'], time.time() - start))
+## DEF
+
+## ==============================================
+## createSchedule
+## ==============================================
+def createSchedule(args, index):
+    """The open-loop arrival schedule of the index'th executor, or None to run a closed loop"""
+    rates = { }
+    if args['rate']: rates[arrivals.MIX] = args['rate']
+    for txn, rate in args['txn_rate'] or [ ]:
+        rates[txn] = rates.get(txn, 0) + rate
+    if not rates: return None
+    
+    ## The executors share the target rate equally
+    executors = args['clients'] * args['threads_per_client']
+    rates = dict([ (txn, rate / executors) for txn, rate in rates.items() ])
+    return arrivals.ArrivalSchedule(rates, args['arrivals'], rand.streamSeed(args['seed'], "arrivals", index))
 ## DEF
 
 ## ==============================================
@@ -197,16 +362,64 @@ if __name__ == '__main__':
                          help='Number of Warehouses')
     aparser.add_argument('--duration', default=60, type=int, metavar='D',
                          help='How long to run the benchmark in seconds')
+    aparser.add_argument('--warmup', default=0, type=int, metavar='S',
+                         help='Run the workload for S seconds before the measured duration without counting it')
+    aparser.add_argument('--cooldown', default=0, type=int, metavar='S',
+                         help='Keep running the workload for S seconds after the measured duration without counting it')
+    aparser.add_argument('--ramp-up', default=0, type=int, metavar='S',
+                         help='Start the closed-loop clients one after the other over S seconds before the warmup')
+    aparser.add_argument('--interval', default=results.INTERVAL, type=float, metavar='S',
+                         help='Count the commits and aborts of each transaction in intervals of S seconds to report the stability of the throughput')
     aparser.add_argument('--frac-read', default=None, type=float,
                          help='fraction of reads')
     aparser.add_argument('--ddl', default=os.path.realpath(os.path.join(os.path.dirname(__file__), "tpcc.sql")),
                          help='Path to the TPC-C DDL SQL file')
     aparser.add_argument('--clients', default=1, type=int, metavar='N',
                          help='The number of blocking clients to fork')
+    aparser.add_argument('--threads-per-client', default=1, type=int, metavar='T',
+                         help='Run T executors in threads in each client, each with its own driver connection. Suits drivers that release the GIL while they wait, and free-threaded Python builds')
+    aparser.add_argument('--terminals', default=0, type=int, metavar='N',
+                         help='Run N concurrent terminals in each client with asyncio. Drivers without async transactions run them in threads, one driver connection each')
+    aparser.add_argument('--offload-threads', default=None, type=int, metavar='N',
+                         help='The number of threads per client for a blocking driver under --terminals (default: one per terminal, at most %d)' % asyncexecutor.MAX_THREADS)
+    aparser.add_argument('--pregenerate', default=0, type=int, metavar='N',
+                         help='Generate the parameters of N transactions per executor before the timed run, with NumPy if it is installed, so that the run only has to take the next one')
+    aparser.add_argument('--rate', default=None, type=float, metavar='TPS',
+                         help='Run an open loop that starts transactions from the usual mix at TPS per second in total, however long they take, and time them from their scheduled start')
+    aparser.add_argument('--txn-rate', default=None, type=arrivals.parseRate, action='append', metavar='TXN=TPS',
+                         help='Also start the transaction TXN (e.g. NEW_ORDER) at TPS per second in total in the open loop. May be given more than once')
+    aparser.add_argument('--arrivals', default=arrivals.POISSON, choices=arrivals.DISTRIBUTIONS,
+                         help='Space the open-loop arrivals as a Poisson process or at fixed intervals')
+    aparser.add_argument('--record-trace', default=None, metavar='FILE',
+                         help='Record the transactions that are run, with their parameters and the times at which they were issued, in FILE')
+    aparser.add_argument('--replay-trace', default=None, metavar='FILE',
+                         help='Run the transactions recorded in FILE instead of generating them, as fast as possible or with --replay-timing')
+    aparser.add_argument('--replay-timing', action='store_true',
+                         help='Start the replayed transactions at the times at which they were originally issued')
     aparser.add_argument('--stop-on-error', action='store_true',
                          help='Stop the transaction execution when the driver throws an exception.')
     aparser.add_argument('--no-load', action='store_true',
                          help='Disable loading the data')
+    aparser.add_argument('--seed', default=None, type=int,
+                         help='Seed for the data generator. Each warehouse and table gets its own stream derived from it, so loads are reproducible')
+    aparser.add_argument('--generator', default=None, choices=sorted(columns.GENERATORS.keys()),
+                         help='The data generator (default: numpy if it is installed). The generators give different data for the same --seed')
+    aparser.add_argument('--data-cache', default=None, metavar='DIR',
+                         help='Directory in which to cache generated data and reuse it in later loads')
+    aparser.add_argument('--load-workers', default=0, type=int, metavar='N',
+                         help='Generate the data in N processes per client that feed the driver through bounded queues, so that generation and insertion overlap')
+    aparser.add_argument('--load-manifest', default=None, metavar='FILE',
+                         help='Record the progress of the load in FILE so that it can be resumed with --resume-load')
+    aparser.add_argument('--resume-load', action='store_true',
+                         help='Resume the load recorded in --load-manifest, skipping finished warehouses and reloading partial ones')
+    aparser.add_argument('--add-warehouses', action='store_true',
+                         help='Load only the warehouses after the ones already in the database, up to --warehouses, without reloading ITEM')
+    aparser.add_argument('--snapshot', default=None, metavar='NAME',
+                         help='Save a snapshot of the loaded database under NAME')
+    aparser.add_argument('--restore', default=None, metavar='NAME',
+                         help='Restore the database from the snapshot NAME instead of loading it')
+    aparser.add_argument('--import-csv', default=None, metavar='DIR',
+                         help='Load the table CSV files that the csv driver wrote to DIR instead of generating the data')
     aparser.add_argument('--no-execute', action='store_true',
                          help='Disable executing the workload')
     aparser.add_argument('--print-config', action='store_true',
@@ -215,11 +428,41 @@ if __name__ == '__main__':
                          help='append json-formatted performance numbers to file')
     aparser.add_argument('--timing-details', action='store_true',
                          help='Capture timing details on each query')
+    aparser.add_argument('--timing-file', default=None, metavar='FILE',
+                         help='Write the start and end time and outcome of each transaction to the binary event log FILE as the run goes')
+    aparser.add_argument('--timing-sample', default=1, type=int, metavar='N',
+                         help='Only log the timing details of every Nth transaction')
+    aparser.add_argument('--live', action='store_true',
+                         help='Show the throughput, aborts, errors and latency of the clients every --interval seconds during the run')
+    aparser.add_argument('--live-json', action='store_true',
+                         help='Add the metrics of every --interval seconds of the run (including the warmup and cooldown) to the --json-output')
     aparser.add_argument('--debug', action='store_true',
                          help='Enable debug log messages')
     args = vars(aparser.parse_args())
 
     if args['debug']: logging.getLogger().setLevel(logging.DEBUG)
+    if args['resume_load']:
+        if not args['load_manifest']: aparser.error("--resume-load requires --load-manifest")
+        if args['reset']: aparser.error("--resume-load cannot be combined with --reset")
+    if min(args['warmup'], args['cooldown'], args['ramp_up']) < 0: aparser.error("--warmup, --cooldown and --ramp-up must not be negative")
+    if args['live_json'] and not args['json_output']: aparser.error("--live-json requires --json-output")
+    if args['generator'] == columns.NUMPY and not columns.HAVE_NUMPY: aparser.error("--generator numpy requires NumPy")
+    if args['timing_sample'] < 1: aparser.error("--timing-sample must be at least 1")
+    if args['interval'] <= 0: aparser.error("--interval must be positive")
+    if args['threads_per_client'] < 1: aparser.error("--threads-per-client must be at least 1")
+    if args['pregenerate'] < 0: aparser.error("--pregenerate must not be negative")
+    if args['replay_timing'] and not args['replay_trace']: aparser.error("--replay-timing requires --replay-trace")
+    if args['replay_trace'] and (args['rate'] or args['txn_rate'] or args['pregenerate']):
+        aparser.error("--replay-trace cannot be combined with --rate, --txn-rate or --pregenerate")
+    if args['replay_trace'] and args['record_trace'] and os.path.realpath(args['replay_trace']) == os.path.realpath(args['record_trace']):
+        aparser.error("--record-trace cannot overwrite the replayed trace")
+    if args['terminals'] < 0: aparser.error("--terminals must not be negative")
+    if args['offload_threads'] is not None and args['offload_threads'] <= 0: aparser.error("--offload-threads must be positive")
+    if args['rate'] is not None and args['rate'] <= 0: aparser.error("--rate must be positive")
+    if any([ rate <= 0 for txn, rate in args['txn_rate'] or [ ] ]): aparser.error("--txn-rate must be positive")
+    if args['add_warehouses']:
+        if args['reset'] or args['no_load'] or args['restore'] or args['import_csv']:
+            aparser.error("--add-warehouses cannot be combined with --reset, --no-load, --restore or --import-csv")
         
     ## Create a handle to the target client driver
     driverClass = createDriverClass(args['system'])
@@ -265,36 +508,137 @@ if __name__ == '__main__':
 
     ## Create ScaleParameters
     scaleParameters = scaleparameters.makeWithScaleFactor(args['warehouses'], args['scalefactor'])
-    nurand = rand.setNURand(nurand.makeForLoad())
+    
+    ## The warehouses that this run loads. --add-warehouses only loads the
+    ## ones after the warehouses that the driver says are already loaded
+    loadParameters = scaleParameters
+    previous = None
+    if args['add_warehouses']:
+        previous = driver.readMetadata()
+        assert previous, "%s has no record of a previous load to add warehouses to" % driver
+        ## New warehouses with other NURand constants would mix C_LAST
+        ## distributions within the database
+        assert "nurand" in previous, "%s does not record the NURand constants of the previous load, so it has to be reloaded instead" % driver
+        assert "generator" in previous, "%s does not record the data generator of the previous load, so it has to be reloaded instead" % driver
+        for key, value in scaleParameters.data().items():
+            if key in previous and key != "warehouses":
+                assert previous[key] == value, "The database was loaded with %s=%s, not %s" % (key, previous[key], value)
+        assert previous["warehouses"] < scaleParameters.ending_warehouse, \
+            "The database already has %d warehouses" % previous["warehouses"]
+        loadParameters = scaleparameters.makeWithScaleFactor(scaleParameters.ending_warehouse - previous["warehouses"], args['scalefactor'], previous["warehouses"] + 1)
+        logging.info("Adding warehouses %d to %d" % (loadParameters.starting_warehouse, loadParameters.ending_warehouse))
+    elif args['no_load'] or args['restore']:
+        ## Run against the whole dataset that the last load recorded
+        previous = driver.readMetadata()
+        if previous and "items" in previous and any([ previous[k] != v for k, v in scaleParameters.data().items() ]):
+            scaleParameters = scaleparameters.makeFromData(previous)
+            logging.info("Using the scale recorded by the last load:\n%s" % scaleParameters)
+    ## IF
+    
+    manifest = None
+    if args['load_manifest'] and not args['no_load'] and not args['restore'] and not args['import_csv']:
+        manifest = loadmanifest.LoadManifest(args['load_manifest'])
+    if manifest and args['resume_load']:
+        ## The rest of the data has to be generated exactly like the part
+        ## that is already loaded
+        manifest.read()
+        manifest.checkScale(scaleParameters)
+        if args['seed'] is None: args['seed'] = manifest.seed()
+        assert args['seed'] == manifest.seed(), "Load manifest '%s' was written with --seed %s" % (manifest.path, manifest.seed())
+        if args['seed'] is not None: random.seed(args['seed'])
+        nurand = rand.setNURand(manifest.nurandC())
+        if args['generator'] is None: args['generator'] = manifest.generator()
+        manifest.checkGenerator(args['generator'])
+    elif args['add_warehouses']:
+        ## The new warehouses are generated like the ones already loaded
+        if args['seed'] is None: args['seed'] = previous.get("seed")
+        if args['seed'] is None:
+            logging.warn("The previous load had no --seed, so the added warehouses will not hold the same data as a full load of %d warehouses" % scaleParameters.warehouses)
+        if args['seed'] is not None: random.seed(args['seed'])
+        nurand = rand.setNURand(nurand.NURandC(*previous["nurand"]))
+        if args['generator'] is None: args['generator'] = previous["generator"][0]
+        assert previous["generator"] == [ args['generator'], columns.GENERATORS[args['generator']] ], \
+            "The database was loaded with version %d of the %s data generator, not version %d of %s" % \
+            (previous["generator"][1], previous["generator"][0], columns.GENERATORS[args['generator']], args['generator'])
+    else:
+        if args['seed'] is not None: random.seed(args['seed'])
+        nurand = rand.setNURand(nurand.makeForLoad())
+    if args['generator'] is None: args['generator'] = columns.defaultGenerator()
+    assert args['generator'] != columns.NUMPY or columns.HAVE_NUMPY, "NumPy is required for the numpy data generator"
+    if manifest and not manifest.resumed: manifest.create(loadParameters, args['seed'], rand.nurandVar, args['generator'])
     if args['debug']: logging.debug("Scale Parameters:\n%s" % scaleParameters)
     
     ## DATA LOADER!!!
     load_time = None
-    if not args['no_load']:
+    load_stats = None
+    if args['restore']:
+        logging.info("Restoring TPC-C benchmark data from snapshot '%s'" % args['restore'])
+        driver.restore(args['restore'])
+    elif args['import_csv']:
+        logging.info("Importing TPC-C benchmark data from %s using %s" % (args['import_csv'], driver))
+        load_start = time.time()
+        load_stats = loadstats.LoadStats()
+        driver.loadStart()
+        importer.CsvImporter(driver, args['import_csv'], args['ddl'], stats=load_stats).execute()
+        driver.loadFinish()
+        driver.loadFinalize()
+        load_time = time.time() - load_start
+        logging.info(load_stats.show())
+    elif not args['no_load']:
         logging.info("Loading TPC-C benchmark data using %s" % (driver))
+        cache = None
+        if args['data_cache']:
+            cache = datacache.DataCache(args['data_cache'], loadParameters, args['seed'], rand.nurandVar, args['generator'])
         load_start = time.time()
+        load_timestamp = datetime.datetime.now()
         if args['clients'] == 1:
-            l = loader.Loader(driver, scaleParameters, range(scaleParameters.starting_warehouse, scaleParameters.ending_warehouse+1), True)
+            load_stats = loadstats.LoadStats()
+            l = createLoader(driver, loadParameters, args, range(loadParameters.starting_warehouse, loadParameters.ending_warehouse+1),
+                             not args['add_warehouses'], cache, load_timestamp, manifest, load_stats)
             driver.loadStart()
             l.execute()
             driver.loadFinish()
         else:
-            startLoading(driverClass, scaleParameters, args, config)
+            load_stats = loadstats.LoadStats(processes=0)
+            startLoading(driverClass, loadParameters, args, config, cache, load_timestamp, manifest, load_stats)
+        driver.loadFinalize()
         load_time = time.time() - load_start
+        
+        metadata = scaleParameters.data()
+        metadata["seed"] = args['seed']
+        metadata["generator"] = [ args['generator'], columns.GENERATORS[args['generator']] ]
+        metadata["nurand"] = [ rand.nurandVar.cLast, rand.nurandVar.cId, rand.nurandVar.orderLineItemId ]
+        driver.writeMetadata(metadata)
+        logging.info(load_stats.show())
     ## IF
+    if args['snapshot']:
+        driver.snapshot(args['snapshot'])
     
     ## WORKLOAD DRIVER!!!
     if not args['no_execute']:
-        if args['clients'] == 1:
-            e = executor.Executor(driver, scaleParameters, stop_on_error=args['stop_on_error'], weights=config['txn_weights'])
-            driver.executeStart()
-            results = e.execute(args['duration'], args['timing_details'])
-            driver.executeFinish()
-        else:
-            results = startExecution(driverClass, scaleParameters, args, config)
+        monitor = None
+        if args['live'] or args['live_json']:
+            monitor = livemetrics.LiveMonitor(multiprocessing.Queue(), args['interval'], args['live'])
+            livemetrics.setChannel(monitor.channel)
+            monitor.start()
+        try:
+            if args['clients'] == 1:
+                results = runClient(driverClass, driver, scaleParameters, args, config, 0)
+            else:
+                results = startExecution(driverClass, scaleParameters, args, config)
+        finally:
+            if monitor: monitor.stop()
         assert results
+        if args['record_trace']:
+            parts = [ tracefile.partPath(args['record_trace'], i) for i in range(args['clients'] * args['threads_per_client']) ]
+            tracefile.merge(args['record_trace'], [ p for p in parts if os.path.exists(p) ])
+        if args['timing_file']:
+            parts = [ eventlog.partPath(args['timing_file'], i) for i in range(args['clients'] * args['threads_per_client']) ]
+            eventlog.merge(args['timing_file'], [ p for p in parts if os.path.exists(p) ])
         if args['json_output']:
-            json.dump(results.data(load_time), args['json_output'])
+            res = results.data(load_time, load_stats.data() if load_stats else None)
+            if args['live_json']: res["Live"] = monitor.snapshots
+            json.dump(res, args['json_output'])
             args['json_output'].write("\n")
         print(results.show(load_time))
     ## IF
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import heapq
+import random
+
+import constants
+
+## The ways in which the arrival times of an open-loop schedule are spaced
+POISSON = "poisson"
+FIXED = "fixed"
+DISTRIBUTIONS = (POISSON, FIXED)
+
+## The key of the stream whose transactions are drawn from the usual mix
+MIX = None
+
+def parseRate(spec):
+    """
+        Parses a per-transaction rate of the form NAME=TPS, where NAME is
+        one of the TransactionTypes (case does not matter).
+    """
+    name, sep, value = spec.partition("=")
+    name = name.strip().upper()
+    if not sep or not hasattr(constants.TransactionTypes, name):
+        raise ValueError("Expected TXN=TPS with TXN one of %s, not '%s'" % (", ".join(transactionTypes()), spec))
+    return (getattr(constants.TransactionTypes, name), float(value))
+## DEF
+
+def transactionTypes():
+    return sorted([ t for t in vars(constants.TransactionTypes) if not t.startswith("_") ])
+## DEF
+
+## ==============================================
+## ArrivalSchedule
+## ==============================================
+class ArrivalSchedule:
+    """
+        The times at which an open-loop client starts its transactions,
+        independently of how long the previous ones took. Each rate is its
+        own stream of arrivals, either a Poisson process or one arrival every
+        1/rate seconds starting at a random phase, and next() merges them in
+        time order. The MIX stream leaves the choice of transaction to the
+        Executor; the others always run the same transaction.
+    """
+
+    def __init__(self, rates, distribution=POISSON, seed=None):
+        assert distribution in DISTRIBUTIONS, "Unknown arrival distribution '%s'" % distribution
+        assert rates, "An arrival schedule needs at least one rate"
+        self.rates = rates
+        self.poisson = (distribution == POISSON)
+        self.rng = random.Random(seed)
+
+        self.streams = [ ]
+        for i, (txn, rate) in enumerate(sorted(rates.items(), key=lambda x: str(x[0]))):
+            assert rate > 0, "The rate of %s must be positive, not %s" % (txn or "the mix", rate)
+            first = self.interval(rate) if self.poisson else self.rng.random() / rate
+            self.streams.append((first, i, txn, rate))
+        ## FOR
+        heapq.heapify(self.streams)
+    ## DEF
+
+    def __str__(self):
+        return "%.2f txn/s on a %s schedule" % (self.totalRate(), "Poisson" if self.poisson else "fixed")
+    ## DEF
+
+    def interval(self, rate):
+        if self.poisson: return self.rng.expovariate(rate)
+        return 1.0 / rate
+    ## DEF
+
+    def next(self):
+        """Returns the next arrival as (seconds since the start, txn), where txn is MIX or a transaction type"""
+        offset, i, txn, rate = self.streams[0]
+        heapq.heapreplace(self.streams, (offset + self.interval(rate), i, txn, rate))
+        return (offset, txn)
+    ## DEF
+
+    def totalRate(self):
+        return sum(self.rates.values())
+    ## DEF
+## CLASS
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+
+import os
+import glob
+import shutil
+import struct
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+from . import schema
+
+HAVE_NUMPY = (numpy is not None)
+HAVE_ARROW = (pyarrow is not None)
+
+## npy: one NumPy file per column in a directory per table.
+## arrow: one Arrow IPC file per table.
+FORMATS = ("npy", "arrow")
+
+BUFFER_SIZE = 1 << 20
+
+## Every .npy file starts with a header of this size, so the header can be
+## rewritten in place once the number of rows is known. A multiple of 64
+## keeps the data aligned for mmap.
+HEADER_SIZE = 128
+
+## Integer and string columns have no NULL value of their own, so their
+## NULLs are recorded in a separate boolean file next to the column.
+## Floats use NaN and timestamps use NaT.
+NULLS_SUFFIX = ".nulls"
+
+def numpyType(column):
+    """The fixed-width NumPy dtype of a Column"""
+    if column.type == "TINYINT": return numpy.dtype("int8")
+    if column.type == "SMALLINT": return numpy.dtype("int16")
+    if column.type in ("INT", "INTEGER"): return numpy.dtype("int32")
+    if column.type in schema.INTEGER_TYPES: return numpy.dtype("int64")
+    if column.type in schema.FLOAT_TYPES: return numpy.dtype("float64")
+    if column.type in schema.TIMESTAMP_TYPES: return numpy.dtype("datetime64[us]")
+    assert column.width, "Column %s of type %s has no width" % (column.name, column.type)
+    return numpy.dtype("S%d" % column.width)
+## DEF
+
+def arrowType(column):
+    """The Arrow type of a Column"""
+    if column.type == "TINYINT": return pyarrow.int8()
+    if column.type == "SMALLINT": return pyarrow.int16()
+    if column.type in ("INT", "INTEGER"): return pyarrow.int32()
+    if column.type in schema.INTEGER_TYPES: return pyarrow.int64()
+    if column.type in schema.FLOAT_TYPES: return pyarrow.float64()
+    if column.type in schema.TIMESTAMP_TYPES: return pyarrow.timestamp("us")
+    return pyarrow.string()
+## DEF
+
+def columnPath(directory, tableName, columnName, part=None):
+    name = columnName if part is None else "%s-%s" % (columnName, part)
+    return os.path.join(directory, tableName, "%s.npy" % name)
+## DEF
+
+def nullsPath(path):
+    """The path of the NULL mask of the given column file"""
+    return path[:-len(".npy")] + NULLS_SUFFIX + ".npy"
+## DEF
+
+def arrowPath(directory, tableName, part=None):
+    name = tableName if part is None else "%s-%s" % (tableName, part)
+    return os.path.join(directory, "%s.arrow" % name)
+## DEF
+
+def writeHeader(output, dtype, rows):
+    """Writes a version 1.0 .npy header of exactly HEADER_SIZE bytes at the start of output"""
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (numpy.lib.format.dtype_to_descr(dtype), rows)
+    header = header.ljust(HEADER_SIZE - 10 - 1) + "\n"
+    output.seek(0)
+    output.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+## DEF
+
+## ==============================================
+## NumpyColumnWriter
+## ==============================================
+class NumpyColumnWriter:
+    """Appends batches of values to a .npy file whose header is written by finish()"""
+
+    def __init__(self, path, column):
+        self.path = path
+        self.column = column
+        self.dtype = numpyType(column)
+        ## Only integer and string columns need a separate NULL mask
+        self.masked = column.nullable and self.dtype.kind in "iS"
+        self.rows = 0
+        self.output = open(path, "wb", buffering=BUFFER_SIZE)
+        self.output.write(b"\0" * HEADER_SIZE)
+        self.nulls = None
+    ## DEF
+
+    def append(self, values):
+        mask = None
+        if self.masked and None in values:
+            mask = numpy.fromiter((v is None for v in values), dtype=bool, count=len(values))
+            fill = "" if self.dtype.kind == "S" else 0
+            values = [ fill if v is None else v for v in values ]
+        if self.dtype.kind == "S":
+            assert max(map(len, values)) <= self.dtype.itemsize, "Value too long for %s" % self.column.name
+        data = numpy.array(values, dtype=self.dtype)
+        self.output.write(data.view(numpy.uint8).data)
+        
+        ## The mask file is only created once the first NULL shows up
+        if mask is not None and self.nulls is None:
+            self.nulls = open(nullsPath(self.path), "wb", buffering=BUFFER_SIZE)
+            self.nulls.write(b"\0" * (HEADER_SIZE + self.rows))
+        if self.nulls is not None:
+            self.nulls.write((mask if mask is not None else numpy.zeros(len(values), dtype=bool)).data)
+        self.rows += len(values)
+    ## DEF
+
+    def finish(self):
+        writeHeader(self.output, self.dtype, self.rows)
+        self.output.close()
+        if self.nulls is not None:
+            writeHeader(self.nulls, numpy.dtype(bool), self.rows)
+            self.nulls.close()
+    ## DEF
+## CLASS
+
+## ==============================================
+## NumpyTableWriter
+## ==============================================
+class NumpyTableWriter:
+    """Splits each batch of tuples into its columns and appends them to one .npy file per column"""
+
+    def __init__(self, directory, tableName, columns, part=None):
+        os.makedirs(os.path.join(directory, tableName), exist_ok=True)
+        self.writers = [ NumpyColumnWriter(columnPath(directory, tableName, c.name, part), c) for c in columns ]
+        self.rows = 0
+    ## DEF
+
+    def append(self, tuples):
+        for writer, values in zip(self.writers, zip(*tuples)):
+            writer.append(values)
+        self.rows += len(tuples)
+    ## DEF
+
+    def finish(self):
+        for writer in self.writers:
+            writer.finish()
+    ## DEF
+## CLASS
+
+## ==============================================
+## ArrowTableWriter
+## ==============================================
+class ArrowTableWriter:
+    """Appends each batch of tuples as a record batch to an Arrow IPC file"""
+
+    def __init__(self, directory, tableName, columns, part=None):
+        assert HAVE_ARROW, "The pyarrow module is required for the arrow format"
+        self.schema = pyarrow.schema([ pyarrow.field(c.name, arrowType(c), c.nullable) for c in columns ])
+        self.sink = pyarrow.OSFile(arrowPath(directory, tableName, part), "wb")
+        self.writer = pyarrow.ipc.new_file(self.sink, self.schema)
+        self.rows = 0
+    ## DEF
+
+    def append(self, tuples):
+        arrays = [ pyarrow.array(values, type=field.type) for values, field in zip(zip(*tuples), self.schema) ]
+        self.writer.write_batch(pyarrow.record_batch(arrays, schema=self.schema))
+        self.rows += len(tuples)
+    ## DEF
+
+    def finish(self):
+        self.writer.close()
+        self.sink.close()
+    ## DEF
+## CLASS
+
+## ==============================================
+## Merging
+## ==============================================
+
+def mergeParts(directory, tableName):
+    """Combines the part files written by the loader processes into a single file per column"""
+    arrowParts = sorted(glob.glob(arrowPath(directory, tableName, "*")))
+    if arrowParts:
+        mergeArrow(arrowPath(directory, tableName), arrowParts)
+    
+    parts = { }
+    for path in glob.glob(columnPath(directory, tableName, "*", "*")):
+        if path.endswith(NULLS_SUFFIX + ".npy"): continue
+        columnName = os.path.basename(path).rsplit("-", 1)[0]
+        parts.setdefault(columnName, [ ]).append(path)
+    for columnName, paths in parts.items():
+        mergeColumn(columnPath(directory, tableName, columnName), sorted(paths))
+## DEF
+
+def mergeColumn(target, parts):
+    """Concatenates the data of the given .npy files, and of their NULL masks if any part has one"""
+    arrays = [ numpy.load(path, mmap_mode="r") for path in parts ]
+    rows = sum([ len(a) for a in arrays ])
+    with open(target, "wb", buffering=BUFFER_SIZE) as output:
+        writeHeader(output, arrays[0].dtype, rows)
+        for path in parts:
+            with open(path, "rb") as f:
+                f.seek(HEADER_SIZE)
+                shutil.copyfileobj(f, output, BUFFER_SIZE)
+        ## FOR
+    ## WITH
+    
+    nulls = [ nullsPath(path) for path in parts ]
+    if any([ os.path.exists(path) for path in nulls ]):
+        with open(nullsPath(target), "wb", buffering=BUFFER_SIZE) as output:
+            writeHeader(output, numpy.dtype(bool), rows)
+            for path, a in zip(nulls, arrays):
+                if os.path.exists(path):
+                    output.write(numpy.load(path, mmap_mode="r").view(numpy.uint8).data)
+                else:
+                    output.write(b"\0" * len(a))
+            ## FOR
+        ## WITH
+    ## IF
+    del arrays
+    for path in parts + nulls:
+        if os.path.exists(path): os.unlink(path)
+    logging.debug("Merged %d parts into %s" % (len(parts), target))
+## DEF
+
+def mergeArrow(target, parts):
+    """Copies the record batches of the given Arrow IPC files into a single file"""
+    writer = None
+    with pyarrow.OSFile(target, "wb") as sink:
+        for path in parts:
+            reader = pyarrow.ipc.open_file(pyarrow.memory_map(path))
+            if writer is None: writer = pyarrow.ipc.new_file(sink, reader.schema)
+            for i in range(reader.num_record_batches):
+                writer.write_batch(reader.get_batch(i))
+        ## FOR
+        writer.close()
+    ## WITH
+    for path in parts:
+        os.unlink(path)
+    logging.debug("Merged %d parts into %s" % (len(parts), target))
+## DEF
+
+## ==============================================
+## Reading
+## ==============================================
+
+def loadTable(directory, tableName):
+    """
+        Memory-maps an exported table without copying it. Returns a
+        pyarrow.Table for the arrow format. For the npy format it returns a
+        dict from each column name to its array, which is a masked array if
+        the column has NULLs.
+    """
+    path = arrowPath(directory, tableName)
+    if os.path.exists(path):
+        assert HAVE_ARROW, "The pyarrow module is required to read '%s'" % path
+        return pyarrow.ipc.open_file(pyarrow.memory_map(path)).read_all()
+    
+    columns = { }
+    for path in sorted(glob.glob(os.path.join(directory, tableName, "*.npy"))):
+        if path.endswith(NULLS_SUFFIX + ".npy"): continue
+        data = numpy.load(path, mmap_mode="r")
+        nulls = nullsPath(path)
+        if os.path.exists(nulls):
+            data = numpy.ma.masked_array(data, numpy.load(nulls, mmap_mode="r"))
+        columns[os.path.basename(path)[:-len(".npy")]] = data
+    ## FOR
+    return (columns)
+## DEF
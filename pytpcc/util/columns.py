@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import rand
+
+HAVE_NUMPY = (numpy is not None)
+
+## The data generators and the version of the data that each one generates.
+## They generate different data from the same seed, so the generator is
+## recorded along with the seed of a load. Bump a generator's version
+## whenever the data that it generates changes.
+NUMPY = "numpy"
+PYTHON = "python"
+GENERATORS = { NUMPY: 1, PYTHON: 1 }
+
+def defaultGenerator():
+    """The NumPy generator if NumPy is installed, otherwise the pure-Python one"""
+    return NUMPY if HAVE_NUMPY else PYTHON
+## DEF
+
+def makeStream(seed, *key):
+    """A ColumnGenerator seeded by rand.streamSeed(seed, *key)."""
+    return ColumnGenerator(rand.streamSeed(seed, *key))
+## DEF
+
+## ==============================================
+## ColumnGenerator
+## ==============================================
+class ColumnGenerator:
+    """
+        Generates whole columns of random values with NumPy.
+        It has the same interface as the bulk functions in util/rand.py and
+        every method returns plain Python lists so that the rows built from
+        them can be handed to any driver's loadTuples.
+    """
+
+    def __init__(self, seed=None):
+        assert HAVE_NUMPY, "NumPy is required for vectorized data generation"
+        self.rng = numpy.random.default_rng(seed)
+    ## DEF
+
+    def numbers(self, n, minimum, maximum):
+        """n random integers in the range [minimum, maximum]."""
+        return self.rng.integers(minimum, maximum, size=n, endpoint=True).tolist()
+    ## DEF
+
+    def fixedPoints(self, n, decimal_places, minimum, maximum):
+        """n random fixed-point values in the range [minimum, maximum]."""
+        assert decimal_places > 0
+        assert minimum < maximum
+        multiplier = 10 ** decimal_places
+        int_min = int(minimum * multiplier + 0.5)
+        int_max = int(maximum * multiplier + 0.5)
+        values = self.rng.integers(int_min, int_max, size=n, endpoint=True)
+        return (values / float(multiplier)).tolist()
+    ## DEF
+
+    def astrings(self, n, minimum_length, maximum_length):
+        """n random alphabetic strings with lengths in range [minimum_length, maximum_length]."""
+        return self.randomStrings(n, minimum_length, maximum_length, rand.ALPHA_CHARACTERS)
+    ## DEF
+
+    def nstrings(self, n, minimum_length, maximum_length):
+        """n random numeric strings with lengths in range [minimum_length, maximum_length]."""
+        return self.randomStrings(n, minimum_length, maximum_length, rand.NUMERIC_CHARACTERS)
+    ## DEF
+
+    def randomStrings(self, n, minimum_length, maximum_length, characters):
+        ## Draw one fixed-width block of characters for all n strings and then
+        ## cut each string out of its row at its own random length
+        lengths = self.rng.integers(minimum_length, maximum_length, size=n, endpoint=True).tolist()
+        table = numpy.frombuffer(characters.encode("ascii"), dtype=numpy.uint8)
+        chars = table[self.rng.integers(0, len(characters), size=(n, maximum_length))]
+        block = chars.tobytes().decode("ascii")
+        return [ block[i*maximum_length:i*maximum_length + l] for i, l in enumerate(lengths) ]
+    ## DEF
+
+    def embed(self, strings, mask, marker):
+        """Overwrite marker at a random position in every string whose mask entry is True."""
+        selected = [ i for i, m in enumerate(mask) if m ]
+        if not selected: return strings
+        lengths = numpy.array([ len(strings[i]) for i in selected ])
+        positions = (self.rng.random(len(selected)) * (lengths - len(marker) + 1)).astype(numpy.int64).tolist()
+        for i, position in zip(selected, positions):
+            data = strings[i]
+            strings[i] = data[:position] + marker + data[position + len(marker):]
+        return strings
+    ## DEF
+
+    def nurand_many(self, n, a, x, y):
+        """n non-uniform random numbers, as defined by TPC-C 2.1.6. (page 20)."""
+        assert x <= y
+        c = rand.nurandConstant(a)
+        values = self.rng.integers(0, a, size=n, endpoint=True) | self.rng.integers(x, y, size=n, endpoint=True)
+        return (((values + c) % (y - x + 1)) + x).tolist()
+    ## DEF
+
+    def last_names_many(self, n, maxCID):
+        """n non-uniform random last names, as defined by TPC-C 4.3.2.3."""
+        min_cid = 999
+        if (maxCID - 1) < min_cid: min_cid = maxCID - 1
+        return [ rand.LAST_NAMES[i] for i in self.nurand_many(n, 255, 0, min_cid) ]
+    ## DEF
+
+    def selectUniqueIds(self, numUnique, minimum, maximum):
+        """A set of numUnique distinct ids from the range [minimum, maximum]."""
+        ids = self.rng.choice(maximum - minimum + 1, size=int(numUnique), replace=False) + minimum
+        return set(ids.tolist())
+    ## DEF
+
+    def shuffled(self, values):
+        """A randomly permuted copy of the given list."""
+        return [ values[i] for i in self.rng.permutation(len(values)).tolist() ]
+    ## DEF
+## CLASS
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+
+import io
+import os
+import glob
+import gzip
+import functools
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from . import schema
+
+HAVE_ZSTD = (zstandard is not None)
+
+BUFFER_SIZE = 1 << 20
+
+## The file name suffix of each supported compression
+COMPRESSIONS = {
+    "none": "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+## Level 1 gzip and level 3 zstd keep the compression ahead of the generator
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+def tablePath(directory, tableName, compression, part=None):
+    """The path of a table's CSV file. Loader processes each write their own part."""
+    name = tableName if part is None else "%s-%s" % (tableName, part)
+    return os.path.join(directory, "%s.csv%s" % (name, COMPRESSIONS[compression]))
+## DEF
+
+def tableFiles(directory, tableName):
+    """All of the CSV files that hold rows of the given table, in name order"""
+    files = [ ]
+    for suffix in COMPRESSIONS.values():
+        files += glob.glob(os.path.join(directory, "%s.csv%s" % (tableName, suffix)))
+        files += glob.glob(os.path.join(directory, "%s-*.csv%s" % (tableName, suffix)))
+    return sorted(files)
+## DEF
+
+def filePart(path, tableName):
+    """The part that a file from tableFiles holds, or None if it holds the whole table"""
+    name = os.path.basename(path)[len(tableName):]
+    name = name[:name.index(".csv")]
+    return name[1:] if name else None
+## DEF
+
+def openWriter(path, compression):
+    """Opens a buffered text stream that compresses into the given file"""
+    if compression == "gzip":
+        raw = gzip.GzipFile(path, "wb", compresslevel=GZIP_LEVEL)
+    elif compression == "zstd":
+        assert HAVE_ZSTD, "The zstandard module is required for zstd compression"
+        raw = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, "wb"))
+    else:
+        assert compression == "none", "Unsupported compression '%s'" % compression
+        raw = io.FileIO(path, "wb")
+    return io.TextIOWrapper(io.BufferedWriter(raw, BUFFER_SIZE), encoding="utf-8", newline="")
+## DEF
+
+def openReader(path):
+    """Opens a buffered text stream over a file written by openWriter"""
+    if path.endswith(COMPRESSIONS["gzip"]):
+        raw = gzip.GzipFile(path, "rb")
+    elif path.endswith(COMPRESSIONS["zstd"]):
+        assert HAVE_ZSTD, "The zstandard module is required to read '%s'" % path
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    else:
+        raw = io.FileIO(path, "rb")
+    return io.TextIOWrapper(io.BufferedReader(raw, BUFFER_SIZE), encoding="utf-8", newline="")
+## DEF
+
+## ==============================================
+## Row conversion
+## ==============================================
+## The CSV files hold every value as text and NULL as an empty field. The
+## converters turn the fields back into the values that the Loader generated.
+
+## Every row of a load has the same timestamp, so parse each distinct value
+## once and hand out the same datetime object, like the Loader does
+parseTimestamp = functools.lru_cache(maxsize=64)(datetime.fromisoformat)
+
+def rowConverters(ddl):
+    """
+        Returns a dict from each table name in the DDL file to a (number of
+        columns, converter) pair. Each converter is compiled into a single
+        expression that builds the whole tuple, which is much faster than
+        calling a function per value.
+    """
+    converters = { }
+    for tableName, columns in schema.readTables(ddl).items():
+        fields = [ ]
+        for i, column in enumerate(columns):
+            if column.type in schema.INTEGER_TYPES:
+                field = "int(row[%d])" % i
+            elif column.type in schema.FLOAT_TYPES:
+                field = "float(row[%d])" % i
+            elif column.type in schema.TIMESTAMP_TYPES:
+                field = "parseTimestamp(row[%d])" % i
+            else:
+                fields.append("row[%d]" % i)
+                continue
+            if column.nullable: field = "(%s if row[%d] else None)" % (field, i)
+            fields.append(field)
+        ## FOR
+        converter = eval("lambda row: [ %s ]" % ", ".join(fields), { "parseTimestamp": parseTimestamp })
+        converters[tableName] = (len(fields), converter)
+    ## FOR
+    return (converters)
+## DEF
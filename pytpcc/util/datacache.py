@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import os
+import json
+import pickle
+import hashlib
+import logging
+
+from . import columns
+
+## Bump this whenever the generated data or the file layout changes
+FORMAT_VERSION = 2
+
+## The unit id used for the ITEM table. Warehouses use their W_ID.
+ITEMS = 0
+
+## Records in a unit file are (tableName, tuples) pairs. A record whose
+## tableName is FINISH_DISTRICT marks a loadFinishDistrict callback.
+FINISH_DISTRICT = None
+
+BUFFER_SIZE = 1 << 20
+
+def makeKey(scaleParameters, seed, nurandC, generator):
+    """
+        Returns the cache key for a dataset. Each warehouse is generated
+        independently of the total number of warehouses, so that value is
+        not part of the key and a cache can be reused at larger scales.
+        The generators give different data, so the generator is part of it.
+    """
+    values = {
+        "version": FORMAT_VERSION,
+        "items": scaleParameters.items,
+        "districtsPerWarehouse": scaleParameters.districtsPerWarehouse,
+        "customersPerDistrict": scaleParameters.customersPerDistrict,
+        "newOrdersPerDistrict": scaleParameters.newOrdersPerDistrict,
+        "seed": seed,
+        "cLast": nurandC.cLast,
+        "cId": nurandC.cId,
+        "orderLineItemId": nurandC.orderLineItemId,
+        "generator": generator,
+        "generatorVersion": columns.GENERATORS[generator],
+    }
+    digest = hashlib.sha1(json.dumps(values, sort_keys=True).encode("utf-8")).hexdigest()
+    return (digest[:16], values)
+## DEF
+
+## ==============================================
+## DataCache
+## ==============================================
+class DataCache:
+    """
+        An on-disk cache of the tuples generated by the Loader. Each unit
+        (the ITEM table or one warehouse) is stored in its own file as a
+        stream of pickled loadTuples batches, in the order the Loader
+        produced them, so replaying a unit makes exactly the same driver
+        calls as generating it.
+    """
+
+    def __init__(self, directory, scaleParameters, seed, nurandC, generator):
+        key, values = makeKey(scaleParameters, seed, nurandC, generator)
+        self.directory = os.path.join(directory, key)
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, "key.json"), "w") as f:
+                json.dump(values, f, indent=2, sort_keys=True)
+        ## IF
+        if seed is None:
+            logging.warn("Data cache %s is keyed by random NURand constants; use --seed to reuse it in later runs" % self.directory)
+    ## DEF
+
+    def path(self, unit):
+        if unit == ITEMS:
+            return os.path.join(self.directory, "ITEM.data")
+        return os.path.join(self.directory, "W%06d.data" % unit)
+    ## DEF
+
+    def contains(self, unit):
+        return os.path.exists(self.path(unit))
+    ## DEF
+
+    def replay(self, unit, handle):
+        """Stream the cached unit into the given driver"""
+        logging.debug("Loading unit %d from data cache %s" % (unit, self.directory))
+        with open(self.path(unit), "rb", buffering=BUFFER_SIZE) as f:
+            while True:
+                try:
+                    tableName, value = pickle.load(f)
+                except EOFError:
+                    break
+                if tableName is FINISH_DISTRICT:
+                    handle.loadFinishDistrict(*value)
+                else:
+                    handle.loadTuples(tableName, value)
+            ## WHILE
+    ## DEF
+
+    def record(self, unit, handle):
+        """Returns a driver wrapper that writes everything passed to it into the cache"""
+        return DataCacheRecorder(self.path(unit), handle)
+    ## DEF
+## CLASS
+
+## ==============================================
+## DataCacheRecorder
+## ==============================================
+class DataCacheRecorder:
+    """
+        Forwards every call to the wrapped driver and appends the batches to
+        a temporary file. The file only becomes visible in the cache when the
+        unit is committed, so an interrupted load never leaves a partial unit.
+    """
+
+    def __init__(self, path, handle):
+        self.path = path
+        self.handle = handle
+        self.tmp_path = "%s.tmp-%d" % (path, os.getpid())
+        self.output = open(self.tmp_path, "wb", buffering=BUFFER_SIZE)
+    ## DEF
+
+    def __getattr__(self, name):
+        return getattr(self.handle, name)
+    ## DEF
+
+    def loadTuples(self, tableName, tuples):
+        pickle.dump((tableName, tuples), self.output, pickle.HIGHEST_PROTOCOL)
+        return self.handle.loadTuples(tableName, tuples)
+    ## DEF
+
+    def loadFinishDistrict(self, w_id, d_id):
+        pickle.dump((FINISH_DISTRICT, (w_id, d_id)), self.output, pickle.HIGHEST_PROTOCOL)
+        return self.handle.loadFinishDistrict(w_id, d_id)
+    ## DEF
+
+    def commit(self):
+        self.output.close()
+        os.replace(self.tmp_path, self.path)
+    ## DEF
+
+    def discard(self):
+        self.output.close()
+        os.unlink(self.tmp_path)
+    ## DEF
+## CLASS
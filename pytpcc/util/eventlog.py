@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import os
+import sys
+import array
+import struct
+import logging
+
+import constants
+
+MAGIC = b"TPCCEVT1"
+BUFFER_SIZE = 1 << 20
+
+## The number of events that are kept in memory before they are written out
+FLUSH_EVENTS = 1 << 16
+
+## An event log file starts with the sampling rate of the log, followed
+## by a sequence of chunks. Each chunk is the number of
+## events in it followed by its four columns: the transaction codes (see
+## constants.TRANSACTION_CODES), the start and end times in nanoseconds
+## since the epoch, and whether each transaction committed. The columns are
+## little-endian and can be read with numpy.frombuffer.
+HEADER = struct.Struct("<I")
+CHUNK = struct.Struct("<I")
+COLUMNS = [ ("codes", "B"), ("starts", "q"), ("ends", "q"), ("status", "B") ]
+
+ABORTED = 0
+COMMITTED = 1
+
+def partPath(path, index):
+    """The file that the index'th executor writes its events to"""
+    return "%s.part-%d" % (path, index)
+## DEF
+
+def read(path):
+    """Read an event log file into an EventLog"""
+    with open(path, "rb") as f:
+        assert f.read(len(MAGIC)) == MAGIC, "'%s' is not an event log" % path
+        events = EventLog(HEADER.unpack(f.read(HEADER.size))[0])
+        while True:
+            header = f.read(CHUNK.size)
+            if not header: break
+            n = CHUNK.unpack(header)[0]
+            for name, typecode in COLUMNS:
+                column = array.array(typecode)
+                column.frombytes(f.read(n * column.itemsize))
+                if sys.byteorder != "little": column.byteswap()
+                getattr(events, name).extend(column)
+            ## FOR
+        ## WHILE
+    return events
+## DEF
+
+def merge(path, parts):
+    """Concatenate the executors' event logs into one file and delete them"""
+    count = 0
+    sample = None
+    with open(path, "wb", buffering=BUFFER_SIZE) as output:
+        output.write(MAGIC)
+        for part in parts:
+            with open(part, "rb") as f:
+                assert f.read(len(MAGIC)) == MAGIC, "'%s' is not an event log" % part
+                header = f.read(HEADER.size)
+                if sample is None:
+                    sample = HEADER.unpack(header)[0]
+                    output.write(header)
+                assert HEADER.unpack(header)[0] == sample, "'%s' is not sampled 1 in %d like the other parts" % (part, sample)
+                while True:
+                    header = f.read(CHUNK.size)
+                    if not header: break
+                    n = CHUNK.unpack(header)[0]
+                    output.write(header)
+                    output.write(f.read(n * sum([ array.array(t).itemsize for name, t in COLUMNS ])))
+                    count += n
+                ## WHILE
+            ## WITH
+            os.unlink(part)
+        ## FOR
+        if sample is None: output.write(HEADER.pack(1))
+    ## WITH
+    logging.info("Logged %d transaction events in %s" % (count, path))
+## DEF
+
+## ==============================================
+## EventLog
+## ==============================================
+class EventLog:
+    """
+        The start and end time and outcome of the transactions, kept as one
+        compact array per column rather than as an object per transaction.
+        With sample=N only every Nth transaction is logged. With a path the
+        events are written to that file whenever FLUSH_EVENTS of them have
+        been collected, so the log only holds the latest ones in memory.
+    """
+
+    def __init__(self, sample=1, path=None):
+        assert sample >= 1
+        self.sample = sample
+        self.seen = 0
+        self.path = path
+        self.output = None
+        if path:
+            self.output = open(path, "wb", buffering=BUFFER_SIZE)
+            self.output.write(MAGIC)
+            self.output.write(HEADER.pack(sample))
+        for name, typecode in COLUMNS:
+            setattr(self, name, array.array(typecode))
+    ## DEF
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["output"] = None
+        return state
+    ## DEF
+
+    def __len__(self):
+        return len(self.codes)
+    ## DEF
+
+    def record(self, txn, start_ns, end_ns, committed):
+        self.seen += 1
+        if self.sample > 1 and self.seen % self.sample: return
+        self.codes.append(constants.TRANSACTION_CODES.index(txn))
+        self.starts.append(start_ns)
+        self.ends.append(end_ns)
+        self.status.append(COMMITTED if committed else ABORTED)
+        if self.output and len(self.codes) >= FLUSH_EVENTS: self.flush()
+    ## DEF
+
+    def flush(self):
+        if not self.codes: return
+        self.output.write(CHUNK.pack(len(self.codes)))
+        for name, typecode in COLUMNS:
+            column = getattr(self, name)
+            if sys.byteorder != "little": column.byteswap()
+            self.output.write(column.tobytes())
+            setattr(self, name, array.array(typecode))
+        ## FOR
+    ## DEF
+
+    def close(self):
+        """Write out the remaining events if the log goes to a file"""
+        if not self.output: return
+        self.flush()
+        self.output.close()
+        self.output = None
+    ## DEF
+
+    def append(self, other):
+        """Add the events that another EventLog still holds in memory. The logs have to be sampled alike."""
+        if other.seen:
+            if not self.seen: self.sample = other.sample
+            assert self.sample == other.sample, "Cannot merge event logs sampled 1 in %d and 1 in %d" % (self.sample, other.sample)
+        self.seen += other.seen
+        for name, typecode in COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+    ## DEF
+
+    def data(self):
+        """The events in memory as a JSON-friendly dict of columns"""
+        return {
+            "Txns": constants.TRANSACTION_CODES,
+            "Sample": self.sample,
+            "Code": self.codes.tolist(),
+            "Start": self.starts.tolist(),
+            "End": self.ends.tolist(),
+            "Committed": self.status.tolist(),
+        }
+    ## DEF
+## CLASS
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import math
+
+## Each power of two is split into 2^(SUB_BUCKET_BITS-1) buckets, so a
+## recorded value is within 1/2^(SUB_BUCKET_BITS-1) of the value reported for it
+SUB_BUCKET_BITS = 8
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+## The percentiles that summary() reports
+PERCENTILES = [ 50.0, 90.0, 99.0, 99.9 ]
+
+def bucketIndex(value):
+    """The bucket that a non-negative integer value falls in"""
+    if value < SUB_BUCKETS: return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+## DEF
+
+def bucketRange(index):
+    """The lowest and highest values in a bucket"""
+    if index < SUB_BUCKETS: return (index, index)
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    lowest = (index - (shift << (SUB_BUCKET_BITS - 1))) << shift
+    return (lowest, lowest + (1 << shift) - 1)
+## DEF
+
+def fromData(data):
+    """A Histogram from the output of Histogram.data()"""
+    h = Histogram()
+    h.merge(data)
+    return h
+## DEF
+
+## ==============================================
+## Histogram
+## ==============================================
+class Histogram:
+    """
+        A log-linear (HDR-style) histogram of integer values, such as
+        latencies in nanoseconds. The buckets are exact below SUB_BUCKETS
+        and grow with the values above it, so every value is kept to a fixed
+        relative precision whatever its size. Only the buckets that have been
+        used are stored, and histograms are merged by adding their counts.
+    """
+
+    def __init__(self):
+        self.counts = { }
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+    ## DEF
+
+    def record(self, value):
+        value = max(0, int(value))
+        index = bucketIndex(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min: self.min = value
+        if self.max is None or value > self.max: self.max = value
+    ## DEF
+
+    def merge(self, other):
+        """Add the values of another Histogram or of its data() to this one"""
+        if isinstance(other, Histogram): other = other.data()
+        if not other["count"]: return
+        for index, cnt in other["counts"]:
+            self.counts[index] = self.counts.get(index, 0) + cnt
+        self.count += other["count"]
+        self.total += other["total"]
+        self.min = other["min"] if self.min is None else min(self.min, other["min"])
+        self.max = other["max"] if self.max is None else max(self.max, other["max"])
+    ## DEF
+
+    def percentile(self, p):
+        """The highest value of the bucket that holds the p'th percentile, but at most the maximum"""
+        if not self.count: return None
+        rank = max(1, int(math.ceil(self.count * p / 100.0)))
+        seen = 0
+        for index in sorted(self.counts.keys()):
+            seen += self.counts[index]
+            if seen >= rank: return min(bucketRange(index)[1], self.max)
+        return self.max
+    ## DEF
+
+    def mean(self):
+        if not self.count: return None
+        return self.total / float(self.count)
+    ## DEF
+
+    def summary(self, scale=1.0):
+        """The percentiles, mean and maximum, multiplied by scale (e.g. 1e-6 for nanoseconds to milliseconds)"""
+        if not self.count: return None
+        ret = dict([ ("p%g" % p, self.percentile(p) * scale) for p in PERCENTILES ])
+        ret["max"] = self.max * scale
+        ret["mean"] = self.mean() * scale
+        return ret
+    ## DEF
+
+    def data(self):
+        """A JSON-friendly copy of the histogram that merge() and fromData() accept"""
+        return { "count": self.count, "total": self.total, "min": self.min, "max": self.max,
+                 "counts": sorted(self.counts.items()) }
+    ## DEF
+## CLASS
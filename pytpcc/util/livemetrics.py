@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import sys
+import time
+import queue
+import logging
+import threading
+
+from . import histogram
+
+## The channel that the executors of this process send their metrics to, if any
+CHANNEL = None
+
+## How long after the end of an interval the monitor waits for the
+## executors' metrics for it before it shows the interval
+LATENESS = 0.5
+
+def setChannel(channel):
+    """Set the channel of this process. It is the initializer of the client processes."""
+    global CHANNEL
+    CHANNEL = channel
+## DEF
+
+## ==============================================
+## MetricsReporter
+## ==============================================
+class MetricsReporter:
+    """
+        Collects the commits, aborts, errors and latencies of one executor's
+        transactions in the current interval, and puts them on the channel
+        as one message when the next interval starts. A background thread
+        sends each interval when it ends even if the executor is stuck in a
+        transaction. The intervals are numbered from the epoch, so the
+        messages of all of the executors line up. Transactions in the warmup
+        and cooldown are included.
+    """
+
+    def __init__(self, channel, source, interval):
+        self.channel = channel
+        self.source = source
+        self.interval = interval
+        self.bucket = None
+        self.metrics = { }
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="metrics-reporter", daemon=True)
+        self.thread.start()
+    ## DEF
+
+    def run(self):
+        while not self.stopped.wait(self.interval - time.time() % self.interval):
+            with self.lock:
+                self.advance()
+        ## WHILE
+    ## DEF
+
+    def advance(self):
+        bucket = int(time.time() // self.interval)
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+    ## DEF
+
+    def txnMetrics(self, txn):
+        if not txn in self.metrics:
+            self.metrics[txn] = { "Ct": 0, "Aborts": 0, "Errors": 0, "Histogram": histogram.Histogram() }
+        return self.metrics[txn]
+    ## DEF
+
+    def record(self, txn, latency_ns, committed):
+        with self.lock:
+            self.advance()
+            m = self.txnMetrics(txn)
+            if committed:
+                m["Ct"] += 1
+                m["Histogram"].record(latency_ns)
+            else:
+                m["Aborts"] += 1
+    ## DEF
+
+    def error(self, txn):
+        """Count a failed attempt to execute a transaction"""
+        with self.lock:
+            self.advance()
+            self.txnMetrics(txn)["Errors"] += 1
+    ## DEF
+
+    def flush(self):
+        if not self.metrics: return
+        for m in self.metrics.values():
+            m["Histogram"] = m["Histogram"].data()
+        self.channel.put((self.source, self.bucket, self.metrics))
+        self.metrics = { }
+    ## DEF
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        with self.lock:
+            self.flush()
+    ## DEF
+## CLASS
+
+## ==============================================
+## LiveMonitor
+## ==============================================
+class LiveMonitor:
+    """
+        Receives the executors' metrics in a background thread of the parent
+        process, and shows the throughput, aborts, errors and latency of every
+        interval as soon as it has ended, so that a run that is going badly
+        can be stopped early. Every interval is shown, with zeros if nothing
+        finished in it. Each interval is also kept as a snapshot.
+    """
+
+    def __init__(self, channel, interval, show=True):
+        self.channel = channel
+        self.interval = interval
+        self.show = show
+        self.pending = { }
+        self.snapshots = [ ]
+        self.totals = { "Ct": 0, "Aborts": 0, "Errors": 0 }
+        self.late = 0
+        self.next = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="live-metrics", daemon=True)
+    ## DEF
+
+    def start(self):
+        self.started = time.time()
+        self.next = int(self.started // self.interval)
+        self.thread.start()
+    ## DEF
+
+    def stop(self):
+        """Show the remaining intervals once the executors have sent everything"""
+        self.stopped.set()
+        self.thread.join()
+        if self.late: logging.debug("%d live metrics messages arrived after their interval was shown" % self.late)
+    ## DEF
+
+    def run(self):
+        while True:
+            try:
+                self.receive(self.channel.get(timeout=0.1))
+            except queue.Empty:
+                if self.stopped.is_set(): break
+            ## TRY
+            ready = time.time() - LATENESS
+            while (self.next + 1) * self.interval <= ready:
+                self.showInterval(self.next)
+            ## WHILE
+        ## WHILE
+        last = max(self.pending.keys()) if self.pending else self.next - 1
+        while self.next <= last:
+            self.showInterval(self.next)
+        ## WHILE
+    ## DEF
+
+    def receive(self, message):
+        source, bucket, metrics = message
+        if bucket < self.next:
+            self.late += 1
+            return
+        pending = self.pending.setdefault(bucket, { })
+        for txn, m in metrics.items():
+            if not txn in pending:
+                pending[txn] = { "Ct": 0, "Aborts": 0, "Errors": 0, "Histogram": histogram.Histogram() }
+            for key in [ "Ct", "Aborts", "Errors" ]:
+                pending[txn][key] += m[key]
+            pending[txn]["Histogram"].merge(m["Histogram"])
+        ## FOR
+    ## DEF
+
+    def showInterval(self, bucket):
+        metrics = self.pending.pop(bucket, { })
+        self.next = bucket + 1
+        total = histogram.Histogram()
+        snapshot = { "Time": bucket * self.interval, "Txns": { } }
+        for txn in sorted(metrics.keys()):
+            m = metrics[txn]
+            total.merge(m["Histogram"])
+            snapshot["Txns"][txn] = { "Ct": m["Ct"], "Aborts": m["Aborts"], "Errors": m["Errors"],
+                                      "Latency": m["Histogram"].summary(1e-9) }
+        ## FOR
+        counts = dict([ (key, sum([ m[key] for m in metrics.values() ])) for key in self.totals.keys() ])
+        for key in counts.keys():
+            self.totals[key] += counts[key]
+        snapshot.update(counts)
+        snapshot["Latency"] = total.summary(1e-9)
+        self.snapshots.append(snapshot)
+        if not self.show: return
+
+        elapsed = (bucket + 1) * self.interval - self.started
+        line = "[%6.0fs] %8.1f txn/s" % (elapsed, counts["Ct"] / self.interval)
+        for txn in sorted(metrics.keys()):
+            line += "  %s %.0f" % (txn, metrics[txn]["Ct"] / self.interval)
+        line += "  aborts %d  errors %d" % (counts["Aborts"], counts["Errors"])
+        if total.count:
+            line += "  p50 %.1f ms  p99 %.1f ms" % (total.percentile(50.0) * 1e-6, total.percentile(99.0) * 1e-6)
+        line += "  (%d txns)" % self.totals["Ct"]
+        print(line)
+        sys.stdout.flush()
+    ## DEF
+## CLASS
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import os
+import json
+import logging
+
+from . import nurand
+from . import columns
+
+## ==============================================
+## LoadManifest
+## ==============================================
+class LoadManifest:
+    """
+        Records which parts of the database have been completely loaded so
+        that an interrupted load can be resumed. The manifest is a file of
+        JSON lines: a header describing the dataset followed by one record per
+        event. Every loader process appends to the same file, and each record
+        is a single O_APPEND write, so records from different processes never
+        interleave.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.itemsFinished = False
+        self.started = set()
+        self.finished = set()
+        self.districts = { }
+        self.resumed = False
+        self.fd = None
+    ## DEF
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["fd"] = None
+        return state
+    ## DEF
+
+    def create(self, scaleParameters, seed, nurandC, generator):
+        """Start a new manifest for a fresh load"""
+        self.header = {
+            "items": scaleParameters.items,
+            "districtsPerWarehouse": scaleParameters.districtsPerWarehouse,
+            "customersPerDistrict": scaleParameters.customersPerDistrict,
+            "newOrdersPerDistrict": scaleParameters.newOrdersPerDistrict,
+            "seed": seed,
+            "nurand": [ nurandC.cLast, nurandC.cId, nurandC.orderLineItemId ],
+            "generator": [ generator, columns.GENERATORS[generator] ],
+        }
+        with open(self.path, "w") as f:
+            f.write(json.dumps({ "header": self.header }) + "\n")
+    ## DEF
+
+    def read(self):
+        """Read back the state recorded by a previous load"""
+        with open(self.path) as f:
+            for line in f:
+                ## The last line may be incomplete if the process was killed mid-write
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "header" in record:
+                    self.header = record["header"]
+                elif record.get("event") == "item":
+                    self.itemsFinished = True
+                elif record.get("event") == "start":
+                    self.started.add(record["w_id"])
+                elif record.get("event") == "warehouse":
+                    self.finished.add(record["w_id"])
+                elif record.get("event") == "district":
+                    self.districts.setdefault(record["w_id"], set()).add(record["d_id"])
+            ## FOR
+        assert self.header != None, "Load manifest '%s' has no header" % self.path
+        self.resumed = True
+        logging.info("Load manifest %s: %d warehouses finished, %d partially loaded, ITEM %s" % \
+                     (self.path, len(self.finished), len(self.started - self.finished), "finished" if self.itemsFinished else "not finished"))
+    ## DEF
+
+    def checkScale(self, scaleParameters):
+        """Make sure that the resumed load uses the same dataset parameters"""
+        for key in [ "items", "districtsPerWarehouse", "customersPerDistrict", "newOrdersPerDistrict" ]:
+            assert self.header[key] == getattr(scaleParameters, key), \
+                "Load manifest '%s' was written with %s=%s, not %s" % (self.path, key, self.header[key], getattr(scaleParameters, key))
+    ## DEF
+
+    def seed(self):
+        return self.header["seed"]
+    ## DEF
+
+    def generator(self):
+        """The data generator that the original load used"""
+        assert "generator" in self.header, "Load manifest '%s' does not record its data generator" % self.path
+        return self.header["generator"][0]
+    ## DEF
+
+    def checkGenerator(self, generator):
+        """Make sure that the resumed load generates the same data as the original one"""
+        self.generator()
+        recorded = self.header.get("generator")
+        assert recorded == [ generator, columns.GENERATORS[generator] ], \
+            "Load manifest '%s' was written with version %d of the %s data generator, not version %d of %s" % \
+            (self.path, recorded[1], recorded[0], columns.GENERATORS[generator], generator)
+    ## DEF
+
+    def nurandC(self):
+        """The NURand constants that the original load used"""
+        return nurand.NURandC(*self.header["nurand"])
+    ## DEF
+
+    def isPartial(self, w_id):
+        """True if the given warehouse was started but not finished"""
+        return w_id in self.started and w_id not in self.finished
+    ## DEF
+
+    def append(self, record):
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self.fd, (json.dumps(record) + "\n").encode("utf-8"))
+    ## DEF
+
+    def recorder(self, handle):
+        """Returns a driver wrapper that records each completed part in this manifest"""
+        return LoadManifestRecorder(self, handle)
+    ## DEF
+## CLASS
+
+## ==============================================
+## LoadManifestRecorder
+## ==============================================
+class LoadManifestRecorder:
+    """
+        Forwards every call to the wrapped driver and appends a record to the
+        manifest once the driver has returned from one of the load callbacks.
+    """
+
+    def __init__(self, manifest, handle):
+        self.manifest = manifest
+        self.handle = handle
+    ## DEF
+
+    def __getattr__(self, name):
+        return getattr(self.handle, name)
+    ## DEF
+
+    def loadStartWarehouse(self, w_id):
+        self.manifest.append({ "event": "start", "w_id": w_id })
+        return self.handle.loadStartWarehouse(w_id)
+    ## DEF
+
+    def loadFinishItem(self):
+        result = self.handle.loadFinishItem()
+        self.manifest.append({ "event": "item" })
+        return result
+    ## DEF
+
+    def loadFinishWarehouse(self, w_id):
+        result = self.handle.loadFinishWarehouse(w_id)
+        self.manifest.append({ "event": "warehouse", "w_id": w_id })
+        return result
+    ## DEF
+
+    def loadFinishDistrict(self, w_id, d_id):
+        result = self.handle.loadFinishDistrict(w_id, d_id)
+        self.manifest.append({ "event": "district", "w_id": w_id, "d_id": d_id })
+        return result
+    ## DEF
+## CLASS
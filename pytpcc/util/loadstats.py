@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+
+import time
+
+## The number of rows of each batch whose size is measured to estimate
+## the size of the whole batch
+SAMPLE_ROWS = 16
+
+## The size of a value that is not a string
+VALUE_BYTES = 8
+
+def rowBytes(row):
+    return sum([ len(v) if isinstance(v, str) else (0 if v is None else VALUE_BYTES) for v in row ])
+## DEF
+
+def estimateBytes(tuples):
+    """Estimates the size of a batch of tuples from a sample of its rows"""
+    n = len(tuples)
+    if n <= SAMPLE_ROWS: return sum(map(rowBytes, tuples))
+    sample = tuples[::n // SAMPLE_ROWS][:SAMPLE_ROWS]
+    return int(sum(map(rowBytes, sample)) * n / len(sample))
+## DEF
+
+## ==============================================
+## LoadStats
+## ==============================================
+class LoadStats:
+    """
+        Per-table statistics of a data load: the number of rows, their
+        estimated size in bytes, the time spent generating them and the time
+        spent inside the driver's loadTuples. The time spent in the other
+        driver callbacks (mostly commits) is counted separately. The stats of
+        several loader processes are combined with add().
+    """
+
+    ## The per-table fields, in the order of the lists in self.tables
+    FIELDS = ("Rows", "Bytes", "GenerateTime", "DriverTime")
+
+    def __init__(self, processes=1):
+        self.tables = { }
+        self.callbackTime = 0.0
+        self.processes = processes
+    ## DEF
+
+    def table(self, tableName):
+        if not tableName in self.tables:
+            self.tables[tableName] = [ 0, 0, 0.0, 0.0 ]
+        return self.tables[tableName]
+    ## DEF
+
+    def recorder(self, handle):
+        """Returns a driver wrapper that measures every call into this object"""
+        return LoadStatsRecorder(self, handle)
+    ## DEF
+
+    def add(self, data):
+        """Add the numbers of another process, as returned by its data()"""
+        for tableName, values in data["Tables"].items():
+            t = self.table(tableName)
+            for i, field in enumerate(LoadStats.FIELDS):
+                t[i] += values[field]
+        ## FOR
+        self.callbackTime += data["CallbackTime"]
+        self.processes += data["Processes"]
+    ## DEF
+
+    def addGenerateTime(self, data):
+        """Take only the generation times from data, for loaders whose tuples are generated elsewhere"""
+        for tableName, values in data["Tables"].items():
+            self.table(tableName)[2] += values["GenerateTime"]
+    ## DEF
+
+    def data(self):
+        tables = { }
+        for tableName, values in self.tables.items():
+            tables[tableName] = dict(zip(LoadStats.FIELDS, values))
+        return { "Tables": tables, "CallbackTime": self.callbackTime, "Processes": self.processes }
+    ## DEF
+
+    def show(self):
+        col_width = 14
+        f = "\n  %-12s" + (("%" + str(col_width) + "s") * 6)
+        ret = "Load statistics (%d processes)" % self.processes
+        ret += f % ("", "Rows", "MB", "Generate (s)", "Driver (s)", "Rows/s gen", "Rows/s driver")
+        totals = [ 0, 0, 0.0, 0.0 ]
+        for tableName in sorted(self.tables.keys()):
+            rows, size, generateTime, driverTime = self.tables[tableName]
+            ret += f % (tableName, rows, "%.1f" % (size / 1048576.0), "%.2f" % generateTime, "%.2f" % driverTime,
+                        "%.0f" % (rows / generateTime if generateTime else 0), "%.0f" % (rows / driverTime if driverTime else 0))
+            totals = [ a + b for a, b in zip(totals, self.tables[tableName]) ]
+        ## FOR
+        rows, size, generateTime, driverTime = totals
+        ret += f % ("TOTAL", rows, "%.1f" % (size / 1048576.0), "%.2f" % generateTime, "%.2f" % driverTime,
+                    "%.0f" % (rows / generateTime if generateTime else 0), "%.0f" % (rows / driverTime if driverTime else 0))
+        ret += "\n  Other driver callbacks: %.2f s" % self.callbackTime
+        return ret
+    ## DEF
+## CLASS
+
+## ==============================================
+## LoadStatsRecorder
+## ==============================================
+class LoadStatsRecorder:
+    """
+        Forwards every call to the wrapped driver and measures it. The time
+        between two driver calls is spent producing the next batch, so it is
+        counted as the generation time of the table of that batch.
+    """
+
+    def __init__(self, stats, handle):
+        self.stats = stats
+        self.handle = handle
+        self.generating = True
+        self.last = time.time()
+    ## DEF
+
+    def __getattr__(self, name):
+        if name.startswith("__"): raise AttributeError(name)
+        method = getattr(self.handle, name)
+        if not name.startswith("load"): return method
+        def callback(*args):
+            start = time.time()
+            try:
+                return method(*args)
+            finally:
+                self.last = time.time()
+                self.stats.callbackTime += self.last - start
+        return callback
+    ## DEF
+
+    def restart(self):
+        """Start measuring generation time from now, e.g. at the start of a unit"""
+        self.last = time.time()
+    ## DEF
+
+    def loadTuples(self, tableName, tuples):
+        t = self.stats.table(tableName)
+        if self.generating: t[2] += time.time() - self.last
+        t[0] += len(tuples)
+        t[1] += estimateBytes(tuples)
+        start = time.time()
+        try:
+            return self.handle.loadTuples(tableName, tuples)
+        finally:
+            self.last = time.time()
+            t[3] += self.last - start
+    ## DEF
+## CLASS
@@ -30,9 +30,12 @@
 # -----------------------------------------------------------------------
 
 import random
+import hashlib
 from . import nurand
 
 SYLLABLES = [ "BAR", "OUGHT", "ABLE", "PRI", "PRES", "ESE", "ANTI", "CALLY", "ATION", "EING" ]
+ALPHA_CHARACTERS = "abcdefghijklmnopqrstuvwxyz"
+NUMERIC_CHARACTERS = "0123456789"
 
 nurandVar = None # NURand
 def setNURand(nu):
@@ -40,23 +43,27 @@ def setNURand(nu):
     nurandVar = nu
 ## DEF
 
-def NURand(a, x, y):
-    """A non-uniform random number, as defined by TPC-C 2.1.6. (page 20)."""
+def nurandConstant(a):
+    """The run-time constant C used by NURand for the given value of A."""
     global nurandVar
-    assert x <= y
     if nurandVar is None:
         setNURand(nurand.makeForLoad())
     
     if a == 255:
-        c = nurandVar.cLast
+        return nurandVar.cLast
     elif a == 1023:
-        c = nurandVar.cId
+        return nurandVar.cId
     elif a == 8191:
-        c = nurandVar.orderLineItemId
+        return nurandVar.orderLineItemId
     else:
-        raise Exception("a = " + a + " is not a supported value")
-    
-    return (((number(0, a) | number(x, y)) + c) % (y - x + 1)) + x
+        raise Exception("a = %s is not a supported value" % a)
+## DEF
+
+def NURand(a, x, y):
+    """A non-uniform random number, as defined by TPC-C 2.1.6. (page 20)."""
+    assert x <= y
+    c = nurandConstant(a)
+    return (((random.randrange(a + 1) | random.randrange(x, y + 1)) + c) % (y - x + 1)) + x
 ## DEF
 
 def number(minimum, maximum):
@@ -94,35 +101,22 @@ def fixedPoint(decimal_places, minimum, maximum):
 ## DEF
 
 def selectUniqueIds(numUnique, minimum, maximum):
-    rows = set()
-    for i in range(0, int(numUnique)):
-        index = None
-        while index == None or index in rows:
-            index = number(minimum, maximum)
-        ## WHILE
-        rows.add(index)
-    ## FOR
-    assert len(rows) == numUnique
-    return rows
+    return DEFAULT_STREAM.selectUniqueIds(numUnique, minimum, maximum)
 ## DEF
 
 def astring(minimum_length, maximum_length):
     """A random alphabetic string with length in range [minimum_length, maximum_length]."""
-    return randomString(minimum_length, maximum_length, 'a', 26)
+    return DEFAULT_STREAM.astrings(1, minimum_length, maximum_length)[0]
 ## DEF
 
 def nstring(minimum_length, maximum_length):
     """A random numeric string with length in range [minimum_length, maximum_length]."""
-    return randomString(minimum_length, maximum_length, '0', 10)
+    return DEFAULT_STREAM.nstrings(1, minimum_length, maximum_length)[0]
 ## DEF
 
 def randomString(minimum_length, maximum_length, base, numCharacters):
-    length = number(minimum_length, maximum_length)
-    baseByte = ord(base)
-    string = ""
-    for i in range(length):
-        string += chr(baseByte + number(0, numCharacters-1))
-    return string
+    characters = "".join(chr(ord(base) + i) for i in range(numCharacters))
+    return DEFAULT_STREAM.randomStrings(1, minimum_length, maximum_length, characters)[0]
 ## DEF
 
 def makeLastName(number):
@@ -137,5 +131,161 @@ def makeRandomLastName(maxCID):
     """A non-uniform random last name, as defined by TPC-C 4.3.2.3. The name will be limited to maxCID."""
     min_cid = 999
     if (maxCID - 1) < min_cid: min_cid = maxCID - 1
-    return makeLastName(NURand(255, 0, min_cid))
+    return LAST_NAMES[NURand(255, 0, min_cid)]
+## DEF
+
+## All 1000 possible last names, indexed by number
+LAST_NAMES = [ makeLastName(i) for i in range(1000) ]
+
+## ==============================================
+## Bulk random values
+## ==============================================
+
+def streamSeed(seed, *key):
+    """
+        Derive the seed of an independent random stream from the global seed
+        and a key such as (w_id, tableName). Returns None if seed is None.
+    """
+    if seed is None: return None
+    data = ":".join(map(str, (seed,) + key)).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(data).digest()[:16], "big")
+## DEF
+
+def makeStream(seed, *key):
+    """A RandomStream with its own generator seeded by streamSeed(seed, *key)."""
+    return RandomStream(random.Random(streamSeed(seed, *key)))
+## DEF
+
+class RandomStream:
+    """
+        Bulk random values drawn from one generator. Each method draws its
+        entropy for all n values in one call and slices it up.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+    ## DEF
+
+    def numbers(self, n, minimum, maximum):
+        """n random integers in the range [minimum, maximum]."""
+        return self.rng.choices(range(minimum, maximum + 1), k=n)
+    ## DEF
+
+    def fixedPoints(self, n, decimal_places, minimum, maximum):
+        """n random fixed-point values in the range [minimum, maximum]."""
+        assert decimal_places > 0
+        assert minimum < maximum
+
+        multiplier = float(10 ** decimal_places)
+        int_min = int(minimum * multiplier + 0.5)
+        int_max = int(maximum * multiplier + 0.5)
+
+        return [ v / multiplier for v in self.numbers(n, int_min, int_max) ]
+    ## DEF
+
+    def astrings(self, n, minimum_length, maximum_length):
+        """n random alphabetic strings with lengths in range [minimum_length, maximum_length]."""
+        return self.randomStrings(n, minimum_length, maximum_length, ALPHA_CHARACTERS)
+    ## DEF
+
+    def nstrings(self, n, minimum_length, maximum_length):
+        """n random numeric strings with lengths in range [minimum_length, maximum_length]."""
+        return self.randomStrings(n, minimum_length, maximum_length, NUMERIC_CHARACTERS)
+    ## DEF
+
+    def randomStrings(self, n, minimum_length, maximum_length, characters):
+        ## Draw the characters for all n strings in one block and slice it up
+        lengths = self.numbers(n, minimum_length, maximum_length)
+        block = "".join(self.rng.choices(characters, k=sum(lengths)))
+        out = [ ]
+        offset = 0
+        for length in lengths:
+            out.append(block[offset:offset + length])
+            offset += length
+        return out
+    ## DEF
+
+    def embed(self, strings, mask, marker):
+        """Overwrite marker at a random position in every string whose mask entry is True."""
+        for i, m in enumerate(mask):
+            if not m: continue
+            data = strings[i]
+            position = self.rng.randrange(len(data) - len(marker) + 1)
+            strings[i] = data[:position] + marker + data[position + len(marker):]
+        ## FOR
+        return strings
+    ## DEF
+
+    def nurand_many(self, n, a, x, y):
+        """n non-uniform random numbers, as defined by TPC-C 2.1.6. (page 20)."""
+        assert x <= y
+        c = nurandConstant(a)
+        modulus = y - x + 1
+        return [ (((r0 | r1) + c) % modulus) + x for r0, r1 in zip(self.numbers(n, 0, a), self.numbers(n, x, y)) ]
+    ## DEF
+
+    def last_names_many(self, n, maxCID):
+        """n non-uniform random last names, as defined by TPC-C 4.3.2.3. The names will be limited to maxCID."""
+        min_cid = 999
+        if (maxCID - 1) < min_cid: min_cid = maxCID - 1
+        return [ LAST_NAMES[i] for i in self.nurand_many(n, 255, 0, min_cid) ]
+    ## DEF
+
+    def selectUniqueIds(self, numUnique, minimum, maximum):
+        """A set of numUnique distinct ids from the range [minimum, maximum]."""
+        rows = set(self.rng.sample(range(minimum, maximum + 1), int(numUnique)))
+        assert len(rows) == numUnique
+        return rows
+    ## DEF
+
+    def shuffled(self, values):
+        """A randomly permuted copy of the given list."""
+        values = list(values)
+        self.rng.shuffle(values)
+        return values
+    ## DEF
+## CLASS
+
+## The stream behind the module-level functions below, which draw from the
+## global random module like the rest of this file
+DEFAULT_STREAM = RandomStream(random)
+
+def numbers(n, minimum, maximum):
+    """n random integers in the range [minimum, maximum]."""
+    return DEFAULT_STREAM.numbers(n, minimum, maximum)
+## DEF
+
+def fixedPoints(n, decimal_places, minimum, maximum):
+    """n random fixed-point values in the range [minimum, maximum]."""
+    return DEFAULT_STREAM.fixedPoints(n, decimal_places, minimum, maximum)
+## DEF
+
+def astrings(n, minimum_length, maximum_length):
+    """n random alphabetic strings with lengths in range [minimum_length, maximum_length]."""
+    return DEFAULT_STREAM.astrings(n, minimum_length, maximum_length)
+## DEF
+
+def nstrings(n, minimum_length, maximum_length):
+    """n random numeric strings with lengths in range [minimum_length, maximum_length]."""
+    return DEFAULT_STREAM.nstrings(n, minimum_length, maximum_length)
+## DEF
+
+def embed(strings, mask, marker):
+    """Overwrite marker at a random position in every string whose mask entry is True."""
+    return DEFAULT_STREAM.embed(strings, mask, marker)
+## DEF
+
+def nurand_many(n, a, x, y):
+    """n non-uniform random numbers, as defined by TPC-C 2.1.6. (page 20)."""
+    return DEFAULT_STREAM.nurand_many(n, a, x, y)
+## DEF
+
+def last_names_many(n, maxCID):
+    """n non-uniform random last names, as defined by TPC-C 4.3.2.3. The names will be limited to maxCID."""
+    return DEFAULT_STREAM.last_names_many(n, maxCID)
+## DEF
+
+def shuffled(values):
+    """A randomly permuted copy of the given list."""
+    return DEFAULT_STREAM.shuffled(values)
 ## DEF
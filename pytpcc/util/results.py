@@ -24,31 +24,64 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 # -----------------------------------------------------------------------
 
+import math
 import logging
 import time
 
+import constants
+from . import histogram
+from . import eventlog
+
+## The length in seconds of the intervals of the time series
+INTERVAL = 1.0
+
 class Results:
     
-    def __init__(self, log_timing_details=False):
-        self.log_timing_details = log_timing_details
-        if self.log_timing_details:
-            self.timing_details = []
+    def __init__(self, log_timing_details=False, interval=INTERVAL, events=None):
+        ## The EventLog of the individual transactions, if any
+        self.events = events
+        if self.events is None and log_timing_details:
+            self.events = eventlog.EventLog()
+        ## The livemetrics.MetricsReporter that every transaction is reported to, if any
+        self.reporter = None
 
         self.start = None
         self.stop = None
+        self.end = None
         self.txn_id = 0
         
         self.txn_counters = { }
         self.txn_times = { }
+        self.txn_aborts = { }
         self.running = { }
+        ## The open-loop arrivals in the measured window that were never started
+        self.missed = 0
+
+        ## The latency of each transaction in nanoseconds
+        self.histograms = { }
+
+        ## The commits and aborts of each transaction in each interval. The
+        ## intervals are numbered from the epoch, so that the series of
+        ## different clients line up when they are merged.
+        self.interval = interval
+        self.series = { }
 
+    def __getstate__(self):
+        ## The reporter holds the channel to the parent, which can't be pickled
+        state = self.__dict__.copy()
+        state["reporter"] = None
+        return state
         
-    def startBenchmark(self):
-        """Mark the benchmark as having been started"""
+    def startBenchmark(self, warmup=0, duration=None):
+        """Mark the benchmark as having been started. Transactions that start in the first
+        warmup seconds, or more than duration seconds after those, are run but not counted.
+        Returns the time at which the benchmark started."""
         assert self.start == None
         logging.debug("Starting benchmark statistics collection")
-        self.start = time.time()
-        return self.start
+        now = time.time()
+        self.start = now + warmup
+        if duration is not None: self.end = self.start + duration
+        return now
         
     def stopBenchmark(self):
         """Mark the benchmark as having been stopped"""
@@ -56,34 +89,57 @@ class Results:
         assert self.stop == None
         logging.debug("Stopping benchmark statistics collection")
         self.stop = time.time()
+        if self.end != None: self.stop = min(self.stop, self.end)
+        self.stop = max(self.stop, self.start)
+
+    def isMeasured(self, txn_start):
+        """True if a transaction that started at txn_start is counted"""
+        return self.start <= txn_start and (self.end == None or txn_start <= self.end)
+        
+    def missTransaction(self, scheduled):
+        """Count an open-loop arrival scheduled at the given time that could not be started before the end"""
+        if self.isMeasured(scheduled): self.missed += 1
         
-    def startTransaction(self, txn):
+    def startTransaction(self, txn, start=None):
+        """Start timing a transaction, from the given time if it was scheduled to start earlier"""
         self.txn_id += 1
         id = self.txn_id
-        self.running[id] = (txn, time.time())
+        start_ns = time.perf_counter_ns()
+        epoch_ns = time.time_ns()
+        now = epoch_ns / 1e9
+        if start is not None:
+            late_ns = int(max(0, now - start) * 1e9)
+            start_ns -= late_ns
+            epoch_ns -= late_ns
+        self.running[id] = (txn, start if start is not None else now, start_ns, epoch_ns)
         return id
         
     def abortTransaction(self, id):
         """Abort a transaction and discard its times"""
         assert id in self.running
-        txn_name, txn_start = self.running[id]
+        txn_name, txn_start, txn_start_ns, txn_start_epoch_ns = self.running[id]
         del self.running[id]
+        if self.reporter is not None: self.reporter.record(txn_name, time.perf_counter_ns() - txn_start_ns, False)
+        if not self.isMeasured(txn_start): return
+
+        txn_end = time.time()
+        self.txn_aborts[txn_name] = self.txn_aborts.get(txn_name, 0) + 1
+        self.addToSeries(txn_name, txn_end, 1)
 
-        if self.log_timing_details:
-            txn_end = time.time()
-            self.timing_details.append({
-                "txn_name": txn_name,
-                "start_time": txn_start,
-                "end_time": txn_end,
-                "success": False
-            })
+        if self.events is not None:
+            self.events.record(txn_name, txn_start_epoch_ns, txn_start_epoch_ns + time.perf_counter_ns() - txn_start_ns, False)
         
     def stopTransaction(self, id):
         """Record that the benchmark completed an invocation of the given transaction"""
         assert id in self.running
-        txn_name, txn_start = self.running[id]
+        txn_name, txn_start, txn_start_ns, txn_start_epoch_ns = self.running[id]
         del self.running[id]
+        latency_ns = time.perf_counter_ns() - txn_start_ns
+        if self.reporter is not None: self.reporter.record(txn_name, latency_ns, True)
+        if not self.isMeasured(txn_start): return
         
+        if not txn_name in self.histograms: self.histograms[txn_name] = histogram.Histogram()
+        self.histograms[txn_name].record(latency_ns)
         txn_end = time.time()
         duration = txn_end - txn_start
         total_time = self.txn_times.get(txn_name, 0)
@@ -91,16 +147,32 @@ class Results:
         
         total_cnt = self.txn_counters.get(txn_name, 0)
         self.txn_counters[txn_name] = total_cnt + 1
+        self.addToSeries(txn_name, txn_end, 0)
+
+        if self.events is not None:
+            self.events.record(txn_name, txn_start_epoch_ns, txn_start_epoch_ns + latency_ns, True)
 
-        if self.log_timing_details:
-            self.timing_details.append({
-                "txn_name": txn_name,
-                "start_time": txn_start,
-                "end_time": txn_end,
-                "success": True
-            })
+    def addToSeries(self, txn_name, txn_end, column):
+        counts = self.series.setdefault(int(txn_end // self.interval), { })
+        if not txn_name in counts: counts[txn_name] = [ 0, 0 ]
+        counts[txn_name][column] += 1
 
     def append(self, r):
+        assert self.interval == r.interval, "Cannot merge time series with %s and %s second intervals" % (self.interval, r.interval)
+        for txn_name, h in r.histograms.items():
+            if not txn_name in self.histograms: self.histograms[txn_name] = histogram.Histogram()
+            self.histograms[txn_name].merge(h)
+        for txn_name, cnt in r.txn_aborts.items():
+            self.txn_aborts[txn_name] = self.txn_aborts.get(txn_name, 0) + cnt
+        self.missed += r.missed
+        for bucket, counts in r.series.items():
+            for txn_name, (commits, aborts) in counts.items():
+                merged = self.series.setdefault(bucket, { }).setdefault(txn_name, [ 0, 0 ])
+                merged[0] += commits
+                merged[1] += aborts
+        ## FOR
+        if self.events is not None and r.events is not None:
+            self.events.append(r.events)
         for txn_name in r.txn_counters.keys():
             orig_cnt = self.txn_counters.get(txn_name, 0)
             orig_time = self.txn_times.get(txn_name, 0)
@@ -121,7 +193,7 @@ class Results:
     def __str__(self):
         return self.show()
         
-    def data(self, load_time = None):
+    def data(self, load_time = None, load_stats = None):
         if self.start == None:
             return "Benchmark not started"
         if self.stop == None:
@@ -131,29 +203,68 @@ class Results:
         res = {}
         if load_time:
             res["LoadTime"] = load_time
+        if load_stats:
+            res["LoadStats"] = load_stats
 
         total_time = 0
         total_cnt = 0
+        total_aborts = 0
         res["Txns"] = []
-        for txn in sorted(self.txn_counters.keys()):
-            txn_time = self.txn_times[txn]
-            txn_cnt = self.txn_counters[txn]
-            rate = txn_cnt / txn_time
-            res["Txns"].append({ "Txn": txn, "Ct": txn_cnt, "Time": txn_time })
+        for txn in sorted(set(self.txn_counters.keys()) | set(self.txn_aborts.keys())):
+            txn_time = self.txn_times.get(txn, 0)
+            txn_cnt = self.txn_counters.get(txn, 0)
+            txn_aborts = self.txn_aborts.get(txn, 0)
+            h = self.histograms.get(txn, histogram.Histogram())
+            res["Txns"].append({ "Txn": txn, "Ct": txn_cnt, "Time": txn_time, "Aborts": txn_aborts,
+                                 "Latency": h.summary(1e-9), "Histogram": h.data() })
             total_time += txn_time
             total_cnt += txn_cnt
-        res["TxnsTotal"] = { "Ct": total_cnt, "Time": total_time, "Duration": duration }
-        if self.log_timing_details:
-            res["TxnsDetail"] = self.timing_details
+            total_aborts += txn_aborts
+        total_histogram = histogram.Histogram()
+        for h in self.histograms.values(): total_histogram.merge(h)
+        res["TxnsTotal"] = { "Ct": total_cnt, "Time": total_time, "Duration": duration, "Aborts": total_aborts,
+                             "Missed": self.missed, "Latency": total_histogram.summary(1e-9) }
+
+        ## The tpmC is the number of NEW_ORDER transactions per minute (TPC-C 5.4.2)
+        if duration > 0:
+            res["tpmC"] = self.txn_counters.get(constants.TransactionTypes.NEW_ORDER, 0) * 60.0 / duration
+        res["tpmCStability"] = self.stability()
+        res["TimeSeries"] = self.timeSeries()
+        if self.events is not None and len(self.events) > 0:
+            res["TxnsDetail"] = self.events.data()
         return res
 
 
+    def stability(self):
+        """The mean, standard deviation, minimum and maximum of the tpmC over the whole
+        intervals of the run, or None if there are none"""
+        if self.start == None or self.stop == None: return None
+        first = int(math.ceil(self.start / self.interval))
+        last = int(math.floor(self.stop / self.interval))
+        tpmc = [ self.series.get(b, { }).get(constants.TransactionTypes.NEW_ORDER, [ 0, 0 ])[0] * 60.0 / self.interval for b in range(first, last) ]
+        if not tpmc: return None
+        mean = sum(tpmc) / len(tpmc)
+        stddev = math.sqrt(sum([ (x - mean)**2 for x in tpmc ]) / len(tpmc))
+        return { "Intervals": len(tpmc), "Interval": self.interval, "Mean": mean, "Stddev": stddev, "Min": min(tpmc), "Max": max(tpmc) }
+
+    def timeSeries(self):
+        """The commits and aborts of each transaction in each interval, from the
+        first interval in which any transaction finished to the last one"""
+        if not self.series: return None
+        buckets = range(min(self.series.keys()), max(self.series.keys()) + 1)
+        txns = sorted(set([ txn for counts in self.series.values() for txn in counts.keys() ]))
+        series = { "Interval": self.interval, "Start": buckets[0] * self.interval - self.start, "Commits": { }, "Aborts": { } }
+        for txn in txns:
+            series["Commits"][txn] = [ self.series.get(b, { }).get(txn, [ 0, 0 ])[0] for b in buckets ]
+            series["Aborts"][txn] = [ self.series.get(b, { }).get(txn, [ 0, 0 ])[1] for b in buckets ]
+        return series
+
     def show(self, load_time = None):
-        data = self.data()
+        data = self.data(load_time)
 
         col_width = 16
-        total_width = (col_width*4)+2
-        f = "\n  " + (("%-" + str(col_width) + "s")*4)
+        total_width = (col_width*5)+2
+        f = "\n  " + (("%-" + str(col_width) + "s")*5)
         line = "-"*total_width
 
         ret = u"" + "="*total_width + "\n"
@@ -162,7 +273,7 @@ class Results:
 
         duration = data["TxnsTotal"]["Duration"]
         ret += "Execution Results after %d seconds\n%s" % (duration, line)
-        ret += f % ("", "Executed", u"Time (us)", "Rate")
+        ret += f % ("", "Executed", "Aborted", u"Time (us)", "Rate")
 
         total_time = 0
         total_cnt = 0
@@ -170,13 +281,30 @@ class Results:
             txn = txn_data["Txn"]
             txn_time = txn_data["Time"]
             txn_cnt = txn_data["Ct"]
-            rate = u"%.02f txn/s" % ((txn_cnt / txn_time))
-            ret += f % (txn, str(txn_cnt), str(int(txn_time * 1000000)), rate)
+            rate = u"%.02f txn/s" % ((txn_cnt / duration if duration > 0 else 0))
+            ret += f % (txn, str(txn_cnt), str(txn_data["Aborts"]), str(int(txn_time * 1000000)), rate)
         total_cnt = data["TxnsTotal"]["Ct"]
         total_time = data["TxnsTotal"]["Time"]
-        total_rate = "%.02f txn/s" % ((total_cnt / duration))
-        concurrency = "%.02f" % (total_time / duration)
-        ret += f % ("TOTAL", str(total_cnt), str(int(duration * 1000000)), total_rate)
+        total_rate = "%.02f txn/s" % ((total_cnt / duration if duration > 0 else 0))
+        ret += f % ("TOTAL", str(total_cnt), str(data["TxnsTotal"]["Aborts"]), str(int(duration * 1000000)), total_rate)
+        if data["TxnsTotal"]["Missed"]:
+            ret += "\n\n%d scheduled transactions could not be started before the end" % data["TxnsTotal"]["Missed"]
+
+        ## Latency percentiles in milliseconds
+        percentiles = [ "p%g" % p for p in histogram.PERCENTILES ] + [ "max" ]
+        g = "\n  " + (("%-" + str(col_width) + "s") + ("%-" + str(col_width * 4 // len(percentiles)) + "s") * len(percentiles))
+        ret += "\n\nLatency (ms)\n%s" % line
+        ret += g % tuple([ "" ] + percentiles)
+        for txn, latency in [ (t["Txn"], t["Latency"]) for t in data["Txns"] ] + [ ("TOTAL", data["TxnsTotal"]["Latency"]) ]:
+            if not latency: continue
+            ret += g % tuple([ txn ] + [ "%.2f" % (latency[p] * 1000) for p in percentiles ])
+
+        if "tpmC" in data:
+            ret += "\n\ntpmC: %.2f" % data["tpmC"]
+            stability = data["tpmCStability"]
+            if stability:
+                ret += " (over %d intervals of %g sec: stddev %.2f, min %.2f, max %.2f)" % \
+                       (stability["Intervals"], stability["Interval"], stability["Stddev"], stability["Min"], stability["Max"])
 
         return ret
 ## CLASS
@@ -32,15 +32,16 @@
 
 import constants
 
-def makeDefault(warehouses):
+def makeDefault(warehouses, startingWarehouse=1):
     return ScaleParameters(constants.NUM_ITEMS, \
                            warehouses, \
                            constants.DISTRICTS_PER_WAREHOUSE, \
                            constants.CUSTOMERS_PER_DISTRICT, \
-                           constants.INITIAL_NEW_ORDERS_PER_DISTRICT)
+                           constants.INITIAL_NEW_ORDERS_PER_DISTRICT, \
+                           startingWarehouse)
 ## DEF
 
-def makeWithScaleFactor(warehouses, scaleFactor):
+def makeWithScaleFactor(warehouses, scaleFactor, startingWarehouse=1):
     assert scaleFactor >= 1.0
 
     items = int(constants.NUM_ITEMS/scaleFactor)
@@ -49,17 +50,24 @@ def makeWithScaleFactor(warehouses, scaleFactor):
     customers = int(max(constants.CUSTOMERS_PER_DISTRICT/scaleFactor, 1))
     newOrders = int(max(constants.INITIAL_NEW_ORDERS_PER_DISTRICT/scaleFactor, 0))
 
-    return ScaleParameters(items, warehouses, districts, customers, newOrders)
+    return ScaleParameters(items, warehouses, districts, customers, newOrders, startingWarehouse)
+## DEF
+
+def makeFromData(data, startingWarehouse=1):
+    """Recreates the ScaleParameters that data() returned, for the warehouses from startingWarehouse on"""
+    return ScaleParameters(data["items"], data["warehouses"] - startingWarehouse + 1, data["districtsPerWarehouse"], \
+                           data["customersPerDistrict"], data["newOrdersPerDistrict"], startingWarehouse)
 ## DEF
 
 class ScaleParameters:
     
-    def __init__(self, items, warehouses, districtsPerWarehouse, customersPerDistrict, newOrdersPerDistrict):
+    def __init__(self, items, warehouses, districtsPerWarehouse, customersPerDistrict, newOrdersPerDistrict, startingWarehouse=1):
         assert 1 <= items and items <= constants.NUM_ITEMS
         self.items = items
         assert warehouses > 0
         self.warehouses = warehouses
-        self.starting_warehouse = 1
+        assert startingWarehouse > 0
+        self.starting_warehouse = startingWarehouse
         assert 1 <= districtsPerWarehouse and districtsPerWarehouse <= constants.DISTRICTS_PER_WAREHOUSE
         self.districtsPerWarehouse = districtsPerWarehouse
         assert 1 <= customersPerDistrict and customersPerDistrict <= constants.CUSTOMERS_PER_DISTRICT
@@ -70,9 +78,21 @@ class ScaleParameters:
         self.ending_warehouse = (self.warehouses + self.starting_warehouse - 1)
     ## DEF
 
+    def data(self):
+        """The dataset parameters. warehouses is the last W_ID, so that the data describes the whole database."""
+        return {
+            "items": self.items,
+            "warehouses": self.ending_warehouse,
+            "districtsPerWarehouse": self.districtsPerWarehouse,
+            "customersPerDistrict": self.customersPerDistrict,
+            "newOrdersPerDistrict": self.newOrdersPerDistrict,
+        }
+    ## DEF
+
     def __str__(self):
         out =  "%d items\n" % self.items
         out += "%d warehouses\n" % self.warehouses
+        if self.starting_warehouse != 1: out += "warehouses %d to %d\n" % (self.starting_warehouse, self.ending_warehouse)
         out += "%d districts/warehouse\n" % self.districtsPerWarehouse
         out += "%d customers/district\n" % self.customersPerDistrict
         out += "%d initial new orders/district" % self.newOrdersPerDistrict
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+
+import re
+import collections
+
+## A column of a CREATE TABLE statement. The width is the length of a
+## CHAR/VARCHAR column and None for every other type.
+Column = collections.namedtuple("Column", [ "name", "type", "width", "nullable" ])
+
+## The words that start a table constraint instead of a column definition
+CONSTRAINTS = ("CONSTRAINT", "PRIMARY", "UNIQUE", "FOREIGN", "KEY", "CHECK")
+
+INTEGER_TYPES = ("TINYINT", "SMALLINT", "INT", "INTEGER", "BIGINT")
+FLOAT_TYPES = ("FLOAT", "DOUBLE", "DECIMAL", "NUMERIC", "REAL")
+TIMESTAMP_TYPES = ("TIMESTAMP", "DATETIME", "DATE")
+
+def readTables(ddl):
+    """
+        Parses the CREATE TABLE statements of a DDL file and returns a dict
+        from each table name to the list of its Columns, in the order of the
+        values in the tuples that the Loader generates.
+    """
+    with open(ddl) as f:
+        statements = "".join([ l for l in f if not l.strip().startswith("--") ]).split(";")
+    tables = { }
+    for statement in statements:
+        m = re.match(r"\s*CREATE\s+TABLE\s+(\w+)\s*\((.*)\)\s*$", statement, re.IGNORECASE | re.DOTALL)
+        if not m: continue
+        columns = [ ]
+        for line in m.group(2).split("\n"):
+            c = re.match(r"\s*(\w+)\s+(\w+)(?:\s*\(\s*(\d+)\s*\))?", line)
+            if not c or c.group(1).upper() in CONSTRAINTS: continue
+            width = int(c.group(3)) if c.group(3) else None
+            nullable = not re.search(r"\bNOT\s+NULL\b", line, re.IGNORECASE)
+            columns.append(Column(c.group(1).upper(), c.group(2).upper(), width, nullable))
+        ## FOR
+        tables[m.group(1).upper()] = columns
+    ## FOR
+    return (tables)
+## DEF
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------
+# Copyright (C) 2011
+# Andy Pavlo
+# http://www.cs.brown.edu/~pavlo/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# -----------------------------------------------------------------------
+
+import os
+import mmap
+import heapq
+import struct
+import logging
+from datetime import datetime
+
+import constants
+from . import arrivals
+
+MAGIC = b"TPCCTRC1"
+BUFFER_SIZE = 1 << 20
+
+## Every record starts with the time at which the transaction was issued, in
+## seconds since its executor started, and the transaction's code. The rest
+## of the record is that transaction's parameters. The timestamp parameters
+## are not stored, since a replayed transaction runs at the current time.
+RECORD = struct.Struct("<dB")
+DELIVERY = struct.Struct("<IB")          # w_id, o_carrier_id
+NEW_ORDER = struct.Struct("<IHIB")       # w_id, d_id, c_id, ol_cnt, then the order lines
+ORDER_STATUS = struct.Struct("<IHI")     # w_id, d_id, c_id, then c_last
+PAYMENT = struct.Struct("<IHdIHI")       # w_id, d_id, h_amount, c_w_id, c_d_id, c_id, then c_last
+STOCK_LEVEL = struct.Struct("<IHB")      # w_id, d_id, threshold
+
+## The length of a missing string. c_id is 0 when it is missing.
+NULL_STRING = 0xFF
+
+def partPath(path, index):
+    """The file that the index'th executor records its part of the trace in"""
+    return "%s.part-%d" % (path, index)
+## DEF
+
+def packString(value):
+    if value is None: return bytes([ NULL_STRING ])
+    data = value.encode("utf-8")
+    assert len(data) < NULL_STRING
+    return bytes([ len(data) ]) + data
+## DEF
+
+def unpackString(buffer, offset):
+    length = buffer[offset]
+    if length == NULL_STRING: return (None, offset + 1)
+    return (bytes(buffer[offset+1:offset+1+length]).decode("utf-8"), offset + 1 + length)
+## DEF
+
+def packParams(txn, params):
+    p = params
+    if txn == constants.TransactionTypes.DELIVERY:
+        return DELIVERY.pack(p["w_id"], p["o_carrier_id"])
+    elif txn == constants.TransactionTypes.NEW_ORDER:
+        n = len(p["i_ids"])
+        return NEW_ORDER.pack(p["w_id"], p["d_id"], p["c_id"], n) + \
+               struct.pack("<%dI%dI%dB" % (n, n, n), *(p["i_ids"] + p["i_w_ids"] + p["i_qtys"]))
+    elif txn == constants.TransactionTypes.ORDER_STATUS:
+        return ORDER_STATUS.pack(p["w_id"], p["d_id"], p["c_id"] or 0) + packString(p["c_last"])
+    elif txn == constants.TransactionTypes.PAYMENT:
+        return PAYMENT.pack(p["w_id"], p["d_id"], p["h_amount"], p["c_w_id"], p["c_d_id"], p["c_id"] or 0) + packString(p["c_last"])
+    elif txn == constants.TransactionTypes.STOCK_LEVEL:
+        return STOCK_LEVEL.pack(p["w_id"], p["d_id"], p["threshold"])
+    assert False, "Unexpected TransactionType: " + txn
+## DEF
+
+def unpackParams(txn, buffer, offset):
+    """Returns the parameters of the record at offset and the offset of the next record"""
+    if txn == constants.TransactionTypes.DELIVERY:
+        w_id, o_carrier_id = DELIVERY.unpack_from(buffer, offset)
+        params = { "w_id": w_id, "o_carrier_id": o_carrier_id, "ol_delivery_d": None }
+        return (params, offset + DELIVERY.size)
+    elif txn == constants.TransactionTypes.NEW_ORDER:
+        w_id, d_id, c_id, n = NEW_ORDER.unpack_from(buffer, offset)
+        offset += NEW_ORDER.size
+        lines = struct.unpack_from("<%dI%dI%dB" % (n, n, n), buffer, offset)
+        params = { "w_id": w_id, "d_id": d_id, "c_id": c_id, "o_entry_d": None,
+                   "i_ids": list(lines[:n]), "i_w_ids": list(lines[n:2*n]), "i_qtys": list(lines[2*n:]) }
+        return (params, offset + 9 * n)
+    elif txn == constants.TransactionTypes.ORDER_STATUS:
+        w_id, d_id, c_id = ORDER_STATUS.unpack_from(buffer, offset)
+        c_last, offset = unpackString(buffer, offset + ORDER_STATUS.size)
+        return ({ "w_id": w_id, "d_id": d_id, "c_id": c_id or None, "c_last": c_last }, offset)
+    elif txn == constants.TransactionTypes.PAYMENT:
+        w_id, d_id, h_amount, c_w_id, c_d_id, c_id = PAYMENT.unpack_from(buffer, offset)
+        c_last, offset = unpackString(buffer, offset + PAYMENT.size)
+        params = { "w_id": w_id, "d_id": d_id, "h_amount": h_amount, "c_w_id": c_w_id, "c_d_id": c_d_id,
+                   "c_id": c_id or None, "c_last": c_last, "h_date": None }
+        return (params, offset)
+    elif txn == constants.TransactionTypes.STOCK_LEVEL:
+        w_id, d_id, threshold = STOCK_LEVEL.unpack_from(buffer, offset)
+        return ({ "w_id": w_id, "d_id": d_id, "threshold": threshold }, offset + STOCK_LEVEL.size)
+    assert False, "Unexpected TransactionType: " + txn
+## DEF
+
+def readRecords(path):
+    """Yields (time, txn, params, data) for every record in a trace file, where data is the encoded record"""
+    with open(path, "rb") as f:
+        assert f.read(len(MAGIC)) == MAGIC, "'%s' is not a transaction trace" % path
+        if os.fstat(f.fileno()).st_size == len(MAGIC): return
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    ## WITH
+    try:
+        offset = len(MAGIC)
+        while offset < len(buffer):
+            issued, code = RECORD.unpack_from(buffer, offset)
+            txn = constants.TRANSACTION_CODES[code]
+            params, end = unpackParams(txn, buffer, offset + RECORD.size)
+            yield (issued, txn, params, buffer[offset:end])
+            offset = end
+        ## WHILE
+    finally:
+        buffer.close()
+## DEF
+
+def merge(path, parts):
+    """Merge the executors' parts of a trace into one file in the order in which they were issued, and delete them"""
+    with open(path, "wb", buffering=BUFFER_SIZE) as f:
+        f.write(MAGIC)
+        count = 0
+        for record in heapq.merge(*[ readRecords(part) for part in parts ], key=lambda r: r[0]):
+            f.write(record[3])
+            count += 1
+    ## WITH
+    for part in parts: os.unlink(part)
+    logging.info("Recorded %d transactions in %s" % (count, path))
+## DEF
+
+## ==============================================
+## TraceWriter
+## ==============================================
+class TraceWriter:
+    """Records the transactions that an executor issues"""
+
+    def __init__(self, path):
+        self.path = path
+        self.output = open(path, "wb", buffering=BUFFER_SIZE)
+        self.output.write(MAGIC)
+    ## DEF
+
+    def record(self, issued, txn, params):
+        self.output.write(RECORD.pack(issued, constants.TRANSACTION_CODES.index(txn)) + packParams(txn, params))
+    ## DEF
+
+    def close(self):
+        self.output.close()
+    ## DEF
+## CLASS
+
+## ==============================================
+## TraceReader
+## ==============================================
+class TraceReader:
+    """
+        The index'th of count executors' share of a recorded trace: every
+        count'th transaction, starting from the index'th. It has the same
+        next() as a ParameterStream and raises StopIteration at the end of
+        the trace. schedule() returns the arrival schedule that replays the
+        transactions at the times at which they were originally issued.
+    """
+
+    def __init__(self, path, index=0, count=1):
+        self.path = path
+        self.records = [ (issued, txn, params) for i, (issued, txn, params, data) in enumerate(readRecords(path)) if i % count == index ]
+        ## The issue times stay after next() has dropped the records
+        self.times = [ issued for issued, txn, params in self.records ]
+        self.position = 0
+        logging.debug("Read %d transactions from trace %s" % (len(self.records), path))
+    ## DEF
+
+    def next(self):
+        if self.position == len(self.records): raise StopIteration()
+        issued, txn, params = self.records[self.position]
+        self.records[self.position] = None
+        self.position += 1
+        
+        if txn in constants.TIMESTAMP_PARAMS: params[constants.TIMESTAMP_PARAMS[txn]] = datetime.now()
+        return (txn, params)
+    ## DEF
+
+    def schedule(self):
+        return TraceSchedule(self)
+    ## DEF
+## CLASS
+
+## ==============================================
+## TraceSchedule
+## ==============================================
+class TraceSchedule:
+    """
+        An arrival schedule with one arrival for each transaction of a trace,
+        at the time at which it was issued. The arrivals are MIX arrivals, so
+        that the Executor takes the transaction itself from the trace.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.position = 0
+    ## DEF
+
+    def __str__(self):
+        return "replaying %s at its original timing" % self.reader.path
+    ## DEF
+
+    def next(self):
+        ## The n'th arrival is the reader's n'th transaction. The schedule keeps
+        ## its own position, since arrivals that are missed at the end of a run
+        ## are never taken from the reader.
+        if self.position == len(self.reader.times): return (float("inf"), arrivals.MIX)
+        issued = self.reader.times[self.position]
+        self.position += 1
+        return (issued, arrivals.MIX)
+    ## DEF
+## CLASS
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import constants
+from util import arrivals, results, tracefile
+from runtime import executor
+
+def writeTrace(path, count, step):
+    """A trace of count DELIVERY transactions issued step seconds apart"""
+    w = tracefile.TraceWriter(path)
+    for i in range(count):
+        w.record(i * step, constants.TransactionTypes.DELIVERY, { "w_id": 1, "o_carrier_id": i % 10 + 1 })
+    w.close()
+    return path
+## DEF
+
+def test_schedule_follows_trace(tmp_path):
+    reader = tracefile.TraceReader(writeTrace(str(tmp_path / "t.trace"), 3, 0.5))
+    schedule = reader.schedule()
+    assert [ schedule.next() for i in range(4) ] == [ (0.0, arrivals.MIX), (0.5, arrivals.MIX), (1.0, arrivals.MIX), (float("inf"), arrivals.MIX) ]
+    assert reader.next()[1]["o_carrier_id"] == 1
+## DEF
+
+def test_drain_schedule_past_duration(tmp_path):
+    reader = tracefile.TraceReader(writeTrace(str(tmp_path / "t.trace"), 10, 0.1))
+    e = executor.Executor(None, None, schedule=reader.schedule())
+    e.stream = reader
+    r = results.Results()
+    start = r.startBenchmark(0, 0.45)
+    e.startSchedule()
+
+    ## The first transaction ran and the second one is due after the end
+    offset, txn, params = e.nextArrival()
+    assert (offset, txn) == (0.0, constants.TransactionTypes.DELIVERY)
+    offset = e.schedule.next()[0]
+    e.drainSchedule(r, start, 0.45, offset)
+    assert e.missed == 4
+    assert r.missed == 4
+    assert e.schedule.next()[0] == pytest.approx(0.6)
+## DEF
+
+def test_drain_schedule_to_end_of_trace(tmp_path):
+    reader = tracefile.TraceReader(writeTrace(str(tmp_path / "t.trace"), 5, 0.1))
+    e = executor.Executor(None, None, schedule=reader.schedule())
+    r = results.Results()
+    start = r.startBenchmark(0, 60)
+    e.startSchedule()
+    e.drainSchedule(r, start, 60, e.schedule.next()[0])
+    assert e.missed == 5
+    assert e.schedule.next()[0] == float("inf")
+## DEF